@@ -14,4 +14,11 @@
 
 """LLM Auditor for verifying & refining LLM-generated answers using the web."""
 
+import dotenv
+
+# The agents read their settings from the environment when they are imported,
+# so .env is loaded first, also when they do not run under adk web, e.g. in
+# batch mode. Variables that are already set are kept.
+dotenv.load_dotenv(dotenv.find_dotenv(usecwd=True))
+
 from . import agent as agent
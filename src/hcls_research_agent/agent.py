@@ -14,9 +14,12 @@
 
 """HCLS Research Agent for supporting researchers with pubmed access."""
 
+import os
+
 from google.adk.agents import LlmAgent
 
-from . import prompt
+from . import prompt, router, warmup
+from .shared_libraries import compaction, telemetry
 from .sub_agents.hypothesis_agent import hypothesis_agent
 from .sub_agents.research_question_agent import research_question_agent
 from .sub_agents.search_agent import search_agent
@@ -30,6 +33,20 @@ hcls_researcher = LlmAgent(
     ),
     instruction=prompt.ROOT_PROMPT,
     sub_agents=[research_question_agent, search_agent, hypothesis_agent],
+    # The router answers clear routing decisions before they are measured.
+    before_model_callback=[
+        router.route,
+        compaction.compact_history,
+        telemetry.before_model_callback,
+    ],
+    after_model_callback=telemetry.after_model_callback,
+    before_tool_callback=telemetry.before_tool_callback,
+    after_tool_callback=telemetry.after_tool_callback,
 )
 
+if port := os.getenv("METRICS_PORT"):
+    telemetry.serve_metrics(int(port))
+if warmup.ENABLED:
+    warmup.warmup()
+
 root_agent = hcls_researcher
@@ -0,0 +1,269 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Headless batch runs of many research questions.
+
+Reads research questions from a JSONL file, one {"id": ..., "question": ...}
+object per line, and runs each through the research question, search and
+hypothesis agents without a user, answering their questions with the
+configured email and approval. Results are appended to a JSONL file as soon
+as each question is done, so a rerun with the same output file skips the
+questions that already succeeded.
+
+    python -m hcls_research_agent.batch questions.jsonl results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import TextIO
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+from .agent import root_agent
+from .shared_libraries import telemetry
+
+APP_NAME = "hcls_research_batch"
+# Number of questions researched at the same time. All of them share the
+# NCBI rate limiter of the process.
+DEFAULT_CONCURRENCY = 4
+# Number of user messages after which a question is given up.
+DEFAULT_MAX_TURNS = 8
+
+BATCH_INSTRUCTION = """This session runs in a non-interactive batch mode. There is no user to answer questions.
+Whenever you would ask the user to confirm, agree or choose, assume they agree with your proposal and continue with the next step.
+The user's email address for PubMed is {email}. Never ask for it.
+Do not greet the user."""
+
+FIRST_MESSAGE = "My research question is: {question}"
+# The answers of the user by the step the session state is at.
+FOLLOW_UPS = {
+    "research_question": "Yes, I agree. Please continue.",
+    "pubmed_results": (
+        "Yes, I agree. Please search PubMed for it. My email address is {email}."
+    ),
+    "hypotheses": "Yes, please create hypotheses from these results.",
+}
+
+
+def batch_agent(email: str) -> BaseAgent:
+    """Returns a copy of the agent tree instructed to run without a user."""
+    return root_agent.clone(
+        update={"global_instruction": BATCH_INSTRUCTION.format(email=email)}
+    )
+
+
+def follow_up(state: dict, email: str) -> str:
+    """Returns the answer of the user that moves a session to the next step."""
+    if not state.get("research_question"):
+        return FOLLOW_UPS["research_question"]
+    if not state.get("pubmed_results"):
+        return FOLLOW_UPS["pubmed_results"].format(email=email)
+    return FOLLOW_UPS["hypotheses"]
+
+
+def completed_ids(path: str) -> set[str]:
+    """Returns the IDs of the questions with a successful result in a file."""
+    ids: set[str] = set()
+    if not os.path.exists(path):
+        return ids
+    with open(path) as results:
+        for line in results:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by an interrupted run
+            if result.get("status") == "ok":
+                ids.add(str(result["id"]))
+    return ids
+
+
+def read_questions(path: str) -> list[dict]:
+    """Reads the questions of a JSONL file, numbering those without an ID."""
+    questions = []
+    with open(path) as lines:
+        for number, line in enumerate(lines, start=1):
+            if line.strip():
+                item = json.loads(line)
+                item["id"] = str(item.get("id", number))
+                questions.append(item)
+    return questions
+
+
+async def research(
+    runner: Runner, item: dict, email: str, max_turns: int = DEFAULT_MAX_TURNS
+) -> dict:
+    """
+    Runs one research question through the agents until they hypothesize.
+
+    Returns:
+        A dictionary with the "id" and "question" of the item, its "status"
+        ("ok" or "incomplete"), the "research_question", "pubmed_results" and
+        "hypotheses", the number of "turns", the total "seconds", the
+        "seconds_by_agent" and the model "tokens" used.
+    """
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="batch"
+    )
+    start = time.perf_counter()
+    last = start
+    seconds_by_agent: defaultdict[str, float] = defaultdict(float)
+    invocations: set[str] = set()
+    hypotheses = ""
+    message = FIRST_MESSAGE.format(question=item["question"])
+    turns = 0
+    while turns < max_turns and not hypotheses:
+        turns += 1
+        async for event in runner.run_async(
+            user_id=session.user_id,
+            session_id=session.id,
+            new_message=Content(role="user", parts=[Part(text=message)]),
+        ):
+            now = time.perf_counter()
+            seconds_by_agent[event.author] += now - last
+            last = now
+            invocations.add(event.invocation_id)
+            if (
+                event.author == "hypothesis_agent"
+                and event.is_final_response()
+                and event.content
+                and event.content.parts
+            ):
+                hypotheses = "".join(part.text or "" for part in event.content.parts)
+        state = await _state(runner, session.id)
+        message = follow_up(state, email)
+
+    state = await _state(runner, session.id)
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "status": "ok" if hypotheses else "incomplete",
+        "research_question": state.get("research_question"),
+        "pubmed_results": state.get("pubmed_results"),
+        "hypotheses": hypotheses or None,
+        "turns": turns,
+        "seconds": round(time.perf_counter() - start, 3),
+        "seconds_by_agent": {
+            agent: round(seconds, 3) for agent, seconds in seconds_by_agent.items()
+        },
+        "tokens": sum(
+            telemetry.ledger.summary(invocation_id).get("model", {}).get("tokens", 0)
+            for invocation_id in invocations
+        ),
+    }
+
+
+async def _state(runner: Runner, session_id: str) -> dict:
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id="batch", session_id=session_id
+    )
+    return dict(session.state) if session else {}
+
+
+async def run_batch(
+    questions: list[dict],
+    output: TextIO,
+    email: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> dict:
+    """
+    Researches questions concurrently and writes a result line for each.
+
+    Returns:
+        The number of questions by status.
+    """
+    runner = Runner(
+        agent=batch_agent(email),
+        app_name=APP_NAME,
+        session_service=InMemorySessionService(),
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    counts: defaultdict[str, int] = defaultdict(int)
+
+    async def run(item: dict) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await research(runner, item, email, max_turns)
+            except Exception as e:  # noqa: BLE001 - one failure must not stop the batch
+                result = {
+                    "id": item["id"],
+                    "question": item["question"],
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}",
+                    "seconds": round(time.perf_counter() - start, 3),
+                }
+        counts[result["status"]] += 1
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        print(f"{result['id']}: {result['status']} in {result['seconds']:.1f}s")
+
+    await asyncio.gather(*(run(item) for item in questions))
+    return dict(counts)
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Researches the questions of a JSONL file and appends the results to another."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("questions", help='JSONL file of {"id": ..., "question": ...}')
+    parser.add_argument("results", help="JSONL file the results are appended to")
+    parser.add_argument(
+        "--email",
+        default=os.getenv("NCBI_EMAIL"),
+        help="email given to the E-utilities (default: NCBI_EMAIL)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="questions researched at the same time (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-turns",
+        type=int,
+        default=DEFAULT_MAX_TURNS,
+        help="user messages per question before giving up (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    if not args.email:
+        parser.error("an email is required, set NCBI_EMAIL or pass --email")
+
+    done = completed_ids(args.results)
+    questions = [q for q in read_questions(args.questions) if q["id"] not in done]
+    print(f"Researching {len(questions)} questions, {len(done)} already done")
+    with open(args.results, "a") as output:
+        if output.tell() and not _ends_with_newline(args.results):
+            output.write("\n")  # after a line cut off by an interrupted run
+        counts = asyncio.run(
+            run_batch(questions, output, args.email, args.concurrency, args.max_turns)
+        )
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
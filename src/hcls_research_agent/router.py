@@ -0,0 +1,159 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Rule-based fast path for the routing decisions of the root agent.
+
+Most turns of the root agent only pick the next specialist agent, e.g. after
+the user answered "Yes" or gave an email address. When the session state
+and the user message make that choice unambiguous, route() answers the model
+call of the root agent with a transfer_to_agent call instead of asking the
+model. Every other message falls back to the model.
+"""
+
+import os
+import re
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai.types import Content, FunctionCall, Part
+
+from .shared_libraries import telemetry
+
+# Set FAST_ROUTER=0 to route every message with the model.
+ENABLED = os.getenv("FAST_ROUTER", "1") != "0"
+
+_EMAIL = re.compile(r"^\s*<?[\w.+-]+@[\w-]+(\.[\w-]+)+>?\s*[.!]?\s*$")
+_GREETING = re.compile(
+    r"^\s*(hi|hello|hey|good (morning|afternoon|evening))\b[\s\w]{0,20}[.!]*\s*$",
+    re.IGNORECASE,
+)
+_AFFIRMATIVE = re.compile(
+    r"^\s*(yes|yeah|yep|sure|ok(ay)?|go ahead|continue|proceed|sounds good"
+    r"|looks good|perfect|great|please do|let'?s go|i'?m fine with (this|that|it))"
+    r"\b[\s\w,']{0,40}[.!]*\s*$",
+    re.IGNORECASE,
+)
+# Messages that change or question the plan are left to the model.
+_HESITANT = re.compile(
+    r"\b(no|not|don'?t|never|wait|stop|change|revise|instead|but|why|how)\b|\?",
+    re.IGNORECASE,
+)
+_SEARCH = re.compile(r"\b(search|pubmed|literature|articles?)\b", re.IGNORECASE)
+_HYPOTHESES = re.compile(r"\bhypothes[ei]s\b", re.IGNORECASE)
+# A message of this many words without a state is taken as a research question.
+MIN_QUESTION_WORDS = 4
+# The words of the research question agent once the question meets its
+# criteria. Its output_key also holds its feedback on rejected questions.
+VALIDATED = "This is an excellent research question!"
+
+
+def _user_message(llm_request: LlmRequest) -> str | None:
+    # Only the first model call of a turn answers the user; later calls follow
+    # tool results or the events of other agents, passed on as "For context:".
+    if not llm_request.contents:
+        return None
+    last = llm_request.contents[-1]
+    if last.role == "model" or not last.parts:
+        return None
+    if any(part.function_response for part in last.parts):
+        return None
+    text = " ".join(part.text for part in last.parts if part.text).strip()
+    if not text or text.startswith("For context:"):
+        return None
+    return text
+
+
+def decide(state: dict, message: str) -> str | None:
+    """
+    Returns the agent that handles a user message, if the choice is clear.
+
+    Args:
+        state: The session state
+        message: The text of the user message
+
+    Returns:
+        The name of the agent to transfer to, or None to let the model decide.
+    """
+    if _EMAIL.match(message):
+        # Only the search agent asks for an email address.
+        return "search_agent" if _is_validated(state) else None
+    if not state.get("research_question"):
+        return "research_question_agent" if _is_question(message) else None
+    if _HESITANT.search(message):
+        return None
+    if not state.get("pubmed_results"):
+        if not _is_validated(state):
+            # Answers to the feedback on a rejected question are left to the
+            # model, like the root prompt asks.
+            return None
+        if _AFFIRMATIVE.match(message) or _SEARCH.search(message):
+            return "search_agent"
+        return None
+    if _HYPOTHESES.search(message) or _AFFIRMATIVE.match(message):
+        return "hypothesis_agent"
+    return None
+
+
+def _is_validated(state: dict) -> bool:
+    return VALIDATED in str(state.get("research_question", ""))
+
+
+def _is_question(message: str) -> bool:
+    if _GREETING.match(message) or _AFFIRMATIVE.match(message):
+        return False
+    return len(message.split()) >= MIN_QUESTION_WORDS
+
+
+def route(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> LlmResponse | None:
+    """
+    Answers the model call of the root agent with a transfer, if it is clear.
+
+    Decisions are counted in hcls_router_decisions_total, by result ("hit"
+    if the model was skipped, "miss" if not) and agent.
+    """
+    if not ENABLED:
+        return None
+    message = _user_message(llm_request)
+    if message is None:
+        return None
+    agent = decide(callback_context.state.to_dict(), message)
+    if agent is None:
+        telemetry.metrics.inc("hcls_router_decisions_total", result="miss")
+        return None
+    telemetry.metrics.inc("hcls_router_decisions_total", result="hit", agent=agent)
+    return LlmResponse(
+        content=Content(
+            role="model",
+            parts=[
+                Part(
+                    function_call=FunctionCall(
+                        name="transfer_to_agent", args={"agent_name": agent}
+                    )
+                )
+            ],
+        )
+    )
+
+
+def hit_rate() -> float:
+    """Returns the share of user messages routed without the model."""
+    hits = sum(
+        telemetry.metrics.get("hcls_router_decisions_total", result="hit", agent=name)
+        for name in ("research_question_agent", "search_agent", "hypothesis_agent")
+    )
+    misses = telemetry.metrics.get("hcls_router_decisions_total", result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
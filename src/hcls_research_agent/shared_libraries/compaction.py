@@ -0,0 +1,206 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compaction of superseded search results in the history sent to the model.
+
+Every model call resends the whole session history, including the results
+of searches the user has since refined. Only the latest result set matters,
+so the responses of earlier searches are replaced with short stubs of their
+search string, number of articles and PMIDs before the request is sent. This
+includes the results other agents see as context, like the hypothesis agent
+the searches of the search agent. The session events themselves are not
+changed.
+"""
+
+import ast
+import os
+import re
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest
+from google.genai.types import Content, FunctionResponse, Part
+
+from . import telemetry
+
+# Set HISTORY_COMPACTION=0 to send the full history.
+ENABLED = os.getenv("HISTORY_COMPACTION", "1") != "0"
+
+# Tools whose response starts a new result set, superseding the previous ones.
+SEARCH_TOOLS = frozenset(
+    {"search_pubmed", "search_pubmed_multi", "search_pubmed_updates"}
+)
+# Tools whose response adds to the current result set.
+RESULT_TOOLS = SEARCH_TOOLS | {
+    "search_more_pubmed",
+    "expand_pubmed_citations",
+    "get_abstracts",
+}
+
+# The tool calls and responses of other agents, as passed on by ADK.
+_FOREIGN_CALL = re.compile(
+    r"\[(?P<author>[^\]]+)\] called tool `(?P<name>\w+)` with parameters: (?P<value>.*)",
+    re.DOTALL,
+)
+_FOREIGN_RESPONSE = re.compile(
+    r"\[(?P<author>[^\]]+)\] `(?P<name>\w+)` tool returned result: (?P<value>.*)",
+    re.DOTALL,
+)
+
+
+def _pmids(response: object) -> list[str]:
+    if isinstance(response, dict):
+        if "pmid" in response:
+            return [str(response["pmid"])]
+        if "pmids" in response:
+            return [str(pmid) for pmid in response["pmids"]]
+        return [pmid for value in response.values() for pmid in _pmids(value)]
+    if isinstance(response, list):
+        return [pmid for item in response for pmid in _pmids(item)]
+    return []
+
+
+def _stub(name: str, args: dict, response: dict) -> dict:
+    pmids = list(dict.fromkeys(_pmids(response)))
+    stub: dict = {"superseded": True, "tool": name}
+    for key in ("search_string", "search_strings", "pmids"):
+        if key in args:
+            stub[key if key != "pmids" else "requested_pmids"] = args[key]
+    stub["count"] = len(pmids)
+    stub["pmids"] = pmids
+    return stub
+
+
+def _parse(text: str) -> object:
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _tool_part(part: Part) -> tuple[str, str, object, str] | None:
+    """
+    Returns the kind ("call" or "response"), tool name, arguments or response
+    and author of a tool part, or None for other parts.
+
+    Agents see the tool calls and responses of other agents as text parts of
+    a "For context:" message, with the arguments and response as Python
+    literals, so these are parsed back.
+    """
+    if part.function_call:
+        return "call", part.function_call.name or "", part.function_call.args, ""
+    if part.function_response:
+        response = part.function_response
+        return "response", response.name or "", response.response, ""
+    if part.text and (match := _FOREIGN_CALL.match(part.text)):
+        return "call", match["name"], _parse(match["value"]), match["author"]
+    if part.text and (match := _FOREIGN_RESPONSE.match(part.text)):
+        return "response", match["name"], _parse(match["value"]), match["author"]
+    return None
+
+
+def _stubbed_part(part: Part, name: str, author: str, stub: dict) -> Part:
+    if part.function_response:
+        response = FunctionResponse(
+            id=part.function_response.id, name=name, response=stub
+        )
+        return Part(function_response=response)
+    return Part(text=f"[{author}] `{name}` tool returned result: {stub}")
+
+
+def _size(part: Part) -> int:
+    if part.function_response:
+        return len(part.function_response.model_dump_json(exclude_none=True))
+    return len((part.text or "").encode())
+
+
+def compact(contents: list[Content]) -> tuple[list[Content], int]:
+    """
+    Replaces the responses of superseded result sets with stubs.
+
+    A result set starts with the response of a search tool and includes the
+    responses of result tools up to the next search. All result sets but the
+    latest are replaced, both in the agent's own function responses and in
+    the tool results of other agents passed on as context.
+
+    Args:
+        contents: The contents of a model request
+
+    Returns:
+        The compacted contents and the number of bytes saved.
+    """
+    calls: dict[str, list[object]] = {}
+    responses: list[tuple[int, int, str, object, str]] = []
+    for i, content in enumerate(contents):
+        for j, part in enumerate(content.parts or []):
+            tool = _tool_part(part)
+            if tool is None or tool[1] not in RESULT_TOOLS:
+                continue
+            kind, name, value, author = tool
+            if kind == "call":
+                # Calls are matched to their responses by name and order.
+                calls.setdefault(name, []).append(value)
+            else:
+                responses.append((i, j, name, value, author))
+    searches = [(i, j) for i, j, name, _, _ in responses if name in SEARCH_TOOLS]
+    if not searches:
+        return contents, 0
+    latest = searches[-1]
+
+    seen: dict[str, int] = {}
+    compacted = list(contents)
+    saved = 0
+    for i, j, name, response, author in responses:
+        index = seen.get(name, 0)
+        seen[name] = index + 1
+        if (i, j) >= latest or not isinstance(response, dict):
+            continue
+        args = calls.get(name, [])
+        call_args = args[index] if index < len(args) else None
+        stub = _stub(name, call_args if isinstance(call_args, dict) else {}, response)
+        parts = list(compacted[i].parts or [])
+        stubbed = _stubbed_part(parts[j], name, author, stub)
+        size, stub_size = _size(parts[j]), _size(stubbed)
+        if stub_size >= size:
+            continue
+        parts[j] = stubbed
+        compacted[i] = compacted[i].model_copy(update={"parts": parts})
+        saved += size - stub_size
+    return compacted, saved
+
+
+def compact_history(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    """
+    Compacts the history of a model request and records the bytes saved.
+
+    The savings are counted in hcls_compaction_saved_bytes_total and added to
+    the turn in the ledger.
+    """
+    if not ENABLED:
+        return
+    llm_request.contents, saved = compact(llm_request.contents)
+    if not saved:
+        return
+    agent = callback_context.agent_name
+    telemetry.metrics.inc("hcls_compaction_saved_bytes_total", saved, agent=agent)
+    telemetry.ledger.record(
+        callback_context.invocation_id,
+        {
+            "kind": "compaction",
+            "name": agent,
+            "seconds": 0.0,
+            "saved_bytes": saved,
+            "saved_tokens": saved // telemetry.BYTES_PER_TOKEN,
+        },
+    )
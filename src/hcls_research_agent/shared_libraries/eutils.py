@@ -0,0 +1,164 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rate-limited, connection-pooled HTTP access to the NCBI E-utilities."""
+
+import asyncio
+import contextlib
+import functools
+import os
+import ssl
+import time
+from collections.abc import AsyncIterator
+
+import certifi
+import httpx
+
+from . import telemetry
+from .rate_limiter import ncbi_rate_limiter
+
+EUTILS_URL = os.getenv(
+    "NCBI_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+)
+TOOL = "hcls-research-agent"
+# Contact email sent with requests that are not made on behalf of a user.
+EMAIL = os.getenv("NCBI_EMAIL")
+MAX_TRIES = 3
+TIMEOUT = 30.0
+MAX_CONNECTIONS = int(os.getenv("NCBI_MAX_CONNECTIONS", "10"))
+
+# httpx connections belong to the event loop that opened them, so every loop
+# (one per uvicorn worker, one per asyncio.run call) gets its own pool. A
+# client references its loop, so the pools of closed loops are dropped when
+# the next one is created, and close_eutils_client closes a pool for good.
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+@functools.cache
+def ssl_context() -> ssl.SSLContext:
+    """Returns the SSL context using the certifi CA bundle, created once."""
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def eutils_client() -> httpx.AsyncClient:
+    """Returns the keep-alive HTTP client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        for closed in [other for other in _clients if other.is_closed()]:
+            del _clients[closed]
+        client = httpx.AsyncClient(
+            verify=ssl_context(),
+            timeout=TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_eutils_client() -> None:
+    """Closes the HTTP client of the running event loop, if it has one."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _send(utility: str, params: dict, stream: bool, call: dict) -> httpx.Response:
+    params.setdefault("tool", TOOL)
+    # An email of None, e.g. before the user gave theirs, is NCBI_EMAIL.
+    params["email"] = params.get("email") or EMAIL
+    client = eutils_client()
+    attempt = 1
+    while True:
+        start = time.perf_counter()
+        params["api_key"] = await ncbi_rate_limiter.acquire_async()
+        call["wait_seconds"] += time.perf_counter() - start
+        call["attempts"] = attempt
+        request = client.build_request(
+            "POST",
+            f"{EUTILS_URL}{utility}.fcgi",
+            data={
+                # Lists are sent as repeated parameters, e.g. one id per link set.
+                k: [str(item) for item in v] if isinstance(v, list) else str(v)
+                for k, v in params.items()
+                if v is not None
+            },
+        )
+        try:
+            response = await client.send(request, stream=stream)
+        except httpx.TransportError as e:
+            if attempt == MAX_TRIES:
+                raise ConnectionError(f"Could not reach {EUTILS_URL}: {e}") from e
+            await asyncio.sleep(attempt)
+        else:
+            if response.status_code != 429 and response.status_code < 500:
+                if response.is_error:
+                    await response.aclose()
+                return response.raise_for_status()
+            await response.aclose()
+            if attempt == MAX_TRIES:
+                raise ConnectionError(
+                    f"{utility} failed with HTTP {response.status_code}"
+                )
+        attempt += 1
+
+
+async def eutils_request(utility: str, **params: object) -> httpx.Response:
+    """
+    Sends a request to an E-utility through the process-wide rate limiter.
+
+    Requests are sent as POST, which NCBI accepts for every E-utility and
+    which keeps long ID lists out of the URL. Requests throttled by NCBI with
+    HTTP 429 or failing with a server error are retried with a fresh slot from
+    the rate limiter.
+
+    Args:
+        utility: The name of the E-utility (e.g., "esearch", "efetch")
+        **params: The parameters of the E-utility (e.g., db="pubmed"). A list
+            value is sent as a repeated parameter.
+
+    Returns:
+        The HTTP response of the E-utility.
+
+    Raises:
+        ConnectionError: If the E-utilities cannot be reached.
+        httpx.HTTPStatusError: If the request is rejected by NCBI.
+    """
+    with telemetry.eutils_span(utility) as call:
+        response = await _send(utility, params, stream=False, call=call)
+        call["response_bytes"] = len(response.content)
+        return response
+
+
+@contextlib.asynccontextmanager
+async def eutils_stream(
+    utility: str, **params: object
+) -> AsyncIterator[httpx.Response]:
+    """
+    Like eutils_request, but yields the response before its body is read.
+
+    The body can then be consumed incrementally, e.g. with
+    `response.aiter_lines()`, and the connection is returned to the pool
+    when the context exits.
+    """
+    with telemetry.eutils_span(utility) as call:
+        response = await _send(utility, params, stream=True, call=call)
+        try:
+            yield response
+        finally:
+            call["response_bytes"] = response.num_bytes_downloaded
+            await response.aclose()
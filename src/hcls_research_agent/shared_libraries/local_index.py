@@ -0,0 +1,392 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Offline PubMed index built from the NCBI baseline and update files.
+
+The baseline and daily update files from
+https://ftp.ncbi.nlm.nih.gov/pubmed/ are ingested with
+
+    python -m hcls_research_agent.shared_libraries.local_index pubmed25n*.xml.gz
+
+and searched instead of the E-utilities when PUBMED_BACKEND is "local".
+"""
+
+import argparse
+import functools
+import gzip
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import time
+import zlib
+from collections.abc import Iterator
+from xml.etree import ElementTree
+
+from .query_cache import Node, parse_query
+from .sqlite_store import SqliteStore
+
+DEFAULT_PATH = str(
+    pathlib.Path.home() / ".cache" / "hcls-research-agent" / "pubmed-index.db"
+)
+# Number of articles written to the index in one transaction while ingesting.
+BATCH_SIZE = 1000
+
+# Search fields of PubMed mapped to the indexed columns.
+_COLUMNS = {
+    "ti": "title",
+    "title": "title",
+    "ab": "abstract",
+    "abstract": "abstract",
+    "tiab": "title abstract",
+    "title/abstract": "title abstract",
+    "mh": "mesh",
+    "mesh": "mesh",
+    "mesh terms": "mesh",
+    "majr": "mesh",
+    "mesh major topic": "mesh",
+}
+# A word or quoted phrase, optionally followed by a field tag.
+_WORD = re.compile(r'("[^"]*"|[^\s"\[]+)(?:\[([^\]]*)\])?')
+
+
+def _text(element: ElementTree.Element | None) -> str:
+    # Titles and abstracts may contain markup such as <i> or <sup>.
+    return " ".join("".join(element.itertext()).split()) if element is not None else ""
+
+
+def _publication_date(article: ElementTree.Element) -> str:
+    date = article.find("Journal/JournalIssue/PubDate")
+    if date is None:
+        return ""
+    medline_date = date.findtext("MedlineDate")
+    if medline_date:
+        return medline_date
+    parts = (date.findtext(part) for part in ("Year", "Month", "Day"))
+    return " ".join(part for part in parts if part)
+
+
+def medline_from_xml(citation: ElementTree.Element) -> dict:
+    """
+    Converts a MedlineCitation element into a record like Bio.Medline's.
+
+    Only the fields used by the agents are converted: PMID, TI, AB, DP, JT,
+    AU, MH, PT and OT.
+    """
+    record: dict = {"PMID": citation.findtext("PMID", "")}
+    article = citation.find("Article")
+    if article is not None:
+        record["TI"] = _text(article.find("ArticleTitle"))
+        paragraphs = []
+        for paragraph in article.findall("Abstract/AbstractText"):
+            label = paragraph.get("Label")
+            text = _text(paragraph)
+            paragraphs.append(f"{label}: {text}" if label else text)
+        record["AB"] = " ".join(paragraphs)
+        record["DP"] = _publication_date(article)
+        record["JT"] = article.findtext("Journal/Title", "")
+        record["AU"] = [
+            author.findtext("CollectiveName")
+            or f"{author.findtext('LastName', '')} {author.findtext('Initials', '')}".strip()
+            for author in article.findall("AuthorList/Author")
+        ]
+        record["PT"] = [
+            _text(publication_type)
+            for publication_type in article.findall(
+                "PublicationTypeList/PublicationType"
+            )
+        ]
+    headings = []
+    for heading in citation.findall("MeshHeadingList/MeshHeading"):
+        descriptor = heading.find("DescriptorName")
+        if descriptor is None:
+            continue
+        major = "*" if descriptor.get("MajorTopicYN") == "Y" else ""
+        qualifiers = [
+            _text(qualifier) for qualifier in heading.findall("QualifierName")
+        ]
+        headings.append("/".join([major + _text(descriptor), *qualifiers]))
+    record["MH"] = headings
+    record["OT"] = [
+        _text(keyword) for keyword in citation.findall("KeywordList/Keyword")
+    ]
+    return {tag: value for tag, value in record.items() if value}
+
+
+def iter_pubmed_xml(path: str) -> Iterator[tuple[str, dict | None]]:
+    """
+    Streams the citations of a gzipped PubMed XML file.
+
+    Elements are discarded as soon as they are converted, so memory does not
+    grow with the size of the file.
+
+    Yields:
+        Tuples of a PMID and its Medline record, or None if the citation is
+        deleted by an update file.
+    """
+    with gzip.open(path) if path.endswith(".gz") else open(path, "rb") as file:
+        events = ElementTree.iterparse(file, events=("start", "end"))
+        _, root = next(events)
+        for event, element in events:
+            if event != "end":
+                continue
+            if element.tag == "PubmedArticle":
+                citation = element.find("MedlineCitation")
+                if citation is not None:
+                    record = medline_from_xml(citation)
+                    yield record["PMID"], record
+                root.clear()
+            elif element.tag == "DeleteCitation":
+                for pmid in element.findall("PMID"):
+                    yield pmid.text or "", None
+                root.clear()
+
+
+def _fts_term(text: str) -> str:
+    """Converts a PubMed search term into an FTS5 query."""
+    parts = []
+    for word, tag in _WORD.findall(text):
+        prefix = word.endswith("*")
+        word = word.strip('"').rstrip("*")
+        if not word:
+            continue
+        phrase = '"' + word.replace('"', '""') + '"' + ("*" if prefix else "")
+        columns = _COLUMNS.get(tag.lower())
+        parts.append(f"{{{columns}}} : {phrase}" if columns else phrase)
+    if not parts:
+        raise ValueError(f"empty search term: {text!r}")
+    return " AND ".join(parts)
+
+
+def _fts_query(node: Node) -> str:
+    op, children = node
+    if op == "TERM":
+        return _fts_term(str(children[0]))
+    return f" {op} ".join(f"({_fts_query(child)})" for child in children)
+
+
+def fts_query(search_string: str) -> str:
+    """
+    Translates a PubMed search string into an FTS5 query.
+
+    Boolean operators, parentheses, quoted phrases, truncation with "*" and
+    the title, abstract and MeSH field tags are kept. Other field tags search
+    all indexed fields. Search strings that are not valid boolean expressions
+    match articles containing all of their words.
+    """
+    try:
+        return _fts_query(parse_query(search_string))
+    except ValueError:
+        words = re.sub(r"\b(AND|OR|NOT)\b|[()]", " ", search_string)
+        return _fts_term(words)
+
+
+class LocalIndex(SqliteStore):
+    """
+    SQLite full-text index over the title, abstract and MeSH terms of PubMed
+    citations, and store of their Medline records.
+
+    Files that were ingested are remembered, so that ingesting the baseline
+    and all update files again only ingests the new update files.
+    """
+
+    SCHEMA = (
+        (
+            "CREATE TABLE IF NOT EXISTS records ("
+            " pmid INTEGER PRIMARY KEY,"
+            " payload BLOB NOT NULL)"
+        ),
+        (
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articles USING fts5("
+            " title, abstract, mesh,"
+            " tokenize='porter unicode61 remove_diacritics 2')"
+        ),
+        (
+            "CREATE TABLE IF NOT EXISTS files ("
+            " name TEXT PRIMARY KEY,"
+            " ingested_at REAL NOT NULL)"
+        ),
+    )
+
+    def _write(self, db: sqlite3.Connection, batch: dict[str, dict | None]) -> None:
+        # The batch holds the last version of each citation, None if deleted.
+        pmids = [(int(pmid),) for pmid in batch]
+        with db:
+            db.executemany("DELETE FROM articles WHERE rowid = ?", pmids)
+            db.executemany("DELETE FROM records WHERE pmid = ?", pmids)
+            rows = [(int(pmid), record) for pmid, record in batch.items() if record]
+            db.executemany(
+                "INSERT INTO records VALUES (?, ?)",
+                [
+                    (pmid, zlib.compress(json.dumps(record).encode()))
+                    for pmid, record in rows
+                ],
+            )
+            db.executemany(
+                "INSERT INTO articles (rowid, title, abstract, mesh) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        pmid,
+                        record.get("TI", ""),
+                        record.get("AB", ""),
+                        " ; ".join(
+                            heading.split("/")[0].lstrip("*")
+                            for heading in record.get("MH", [])
+                        ),
+                    )
+                    for pmid, record in rows
+                ],
+            )
+
+    def ingest(self, path: str, force: bool = False) -> dict:
+        """
+        Adds the citations of a PubMed baseline or update file to the index.
+
+        Citations that are already indexed are replaced, and citations deleted
+        by an update file are removed. Files are processed in batches of
+        BATCH_SIZE citations, so memory use is bounded. Update files must be
+        ingested in the order of their numbers.
+
+        Args:
+            path: The path of the (gzipped) XML file
+            force: Whether to ingest a file that was already ingested
+
+        Returns:
+            A dictionary with the number of "updated" and "deleted" citations,
+            and whether the file was "skipped" because it was already ingested.
+        """
+        name = os.path.basename(path)
+        updated = deleted = 0
+        with self._lock:
+            db = self._connect()
+            known = db.execute("SELECT 1 FROM files WHERE name = ?", [name]).fetchone()
+            if known and not force:
+                return {"updated": 0, "deleted": 0, "skipped": True}
+            # A citation may occur several times in a file, e.g. as a new
+            # version or followed by its deletion, and the last one wins.
+            batch: dict[str, dict | None] = {}
+            for pmid, record in iter_pubmed_xml(path):
+                batch[pmid] = record
+                if record is None:
+                    deleted += 1
+                else:
+                    updated += 1
+                if len(batch) >= BATCH_SIZE:
+                    self._write(db, batch)
+                    batch = {}
+            self._write(db, batch)
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?)", [name, time.time()]
+                )
+        return {"updated": updated, "deleted": deleted, "skipped": False}
+
+    def search(self, search_string: str, retmax: int, retstart: int = 0) -> list[str]:
+        """Returns the PMIDs of the best matching citations, best match first."""
+        try:
+            query = fts_query(search_string)
+        except ValueError:
+            return []
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT rowid FROM articles WHERE articles MATCH ?"
+                    " ORDER BY rank, rowid DESC LIMIT ? OFFSET ?",
+                    [query, retmax, retstart],
+                )
+                .fetchall()
+            )
+        return [str(pmid) for (pmid,) in rows]
+
+    def count(self, search_string: str) -> int:
+        """Returns the number of citations matching a search string."""
+        try:
+            query = fts_query(search_string)
+        except ValueError:
+            return 0
+        with self._lock:
+            (count,) = (
+                self._connect()
+                .execute(
+                    "SELECT COUNT(*) FROM articles WHERE articles MATCH ?",
+                    [query],
+                )
+                .fetchone()
+            )
+        return int(count)
+
+    def get_many(self, pmids: list[str]) -> dict[str, dict]:
+        """Returns the Medline records of the given PMIDs that are indexed."""
+        if not pmids:
+            return {}
+        placeholders = ",".join("?" * len(pmids))
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    f"SELECT pmid, payload FROM records WHERE pmid IN ({placeholders})",
+                    [int(pmid) for pmid in pmids],
+                )
+                .fetchall()
+            )
+        return {
+            str(pmid): json.loads(zlib.decompress(payload)) for pmid, payload in rows
+        }
+
+
+@functools.cache
+def get_local_index() -> LocalIndex | None:
+    """
+    Returns the local index if PUBMED_BACKEND is "local", or None to search
+    the E-utilities. The index is read from PUBMED_INDEX_PATH.
+    """
+    if os.getenv("PUBMED_BACKEND", "eutils") != "local":
+        return None
+    return LocalIndex(os.getenv("PUBMED_INDEX_PATH", DEFAULT_PATH))
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Ingests PubMed baseline and update files into the local index."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("files", nargs="+", help="(gzipped) PubMed XML files")
+    parser.add_argument(
+        "--index",
+        default=os.getenv("PUBMED_INDEX_PATH", DEFAULT_PATH),
+        help="path of the index (default: PUBMED_INDEX_PATH or %(default)s)",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="ingest files that were already ingested"
+    )
+    args = parser.parse_args(argv)
+
+    index = LocalIndex(args.index)
+    # Update files are numbered after the baseline files, so sorting by name
+    # applies them in order.
+    for path in sorted(args.files, key=os.path.basename):
+        start = time.perf_counter()
+        result = index.ingest(path, force=args.force)
+        if result["skipped"]:
+            print(f"Skipped {path}: already ingested")
+        else:
+            print(
+                f"Ingested {path}: {result['updated']} citations updated,"
+                f" {result['deleted']} deleted in {time.perf_counter() - start:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Short-lived cache of ESearch results keyed by normalized search strings."""
+
+import functools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1024
+
+# Quoted phrases or words, each optionally followed by a field tag such as
+# [tiab] or [MeSH Terms], parentheses, and anything else as a single char.
+_TOKEN = re.compile(r'(?:"[^"]*"|[^\s()"\[]+)(?:\[[^\]]*\])?|[()]|\S')
+_OPERATORS = ("AND", "OR", "NOT")
+
+Node = tuple[str, list]
+
+
+def _term(text: str) -> Node:
+    return ("TERM", [" ".join(text.lower().split())])
+
+
+def _combine(op: str, left: Node, right: Node) -> Node:
+    if op == "NOT":
+        return (op, [left, right])
+    # AND and OR are associative, so nested groups of the same operator are
+    # flattened into one: (a OR b) OR (c OR d) -> a OR b OR c OR d.
+    children: list[Node] = []
+    for node in (left, right):
+        children.extend(node[1] if node[0] == op else [node])
+    return (op, children)
+
+
+def _parse(tokens: list[str]) -> Node:
+    """Parses tokens the way PubMed evaluates them: left to right."""
+
+    def operand(pos: int) -> tuple[Node, int]:
+        if pos >= len(tokens) or tokens[pos] in _OPERATORS or tokens[pos] == ")":
+            raise ValueError("expected a search term")
+        if tokens[pos] == "(":
+            node, pos = expression(pos + 1)
+            if pos >= len(tokens) or tokens[pos] != ")":
+                raise ValueError("unbalanced parentheses")
+            return node, pos + 1
+        # Adjacent words form one term, like "breast cancer" for PubMed.
+        words = []
+        while pos < len(tokens) and tokens[pos] not in (*_OPERATORS, "(", ")"):
+            words.append(tokens[pos])
+            pos += 1
+        return _term(" ".join(words)), pos
+
+    def expression(pos: int) -> tuple[Node, int]:
+        node, pos = operand(pos)
+        while pos < len(tokens) and tokens[pos] in _OPERATORS:
+            right, next_pos = operand(pos + 1)
+            node = _combine(tokens[pos], node, right)
+            pos = next_pos
+        return node, pos
+
+    node, pos = expression(0)
+    if pos != len(tokens):
+        raise ValueError("unbalanced parentheses")
+    return node
+
+
+def _format(node: Node) -> str:
+    op, children = node
+    if op == "TERM":
+        return str(children[0])
+    parts = [
+        _format(child) if child[0] == "TERM" else f"({_format(child)})"
+        for child in children
+    ]
+    if op == "OR":
+        # OR is commutative, so its terms are sorted and deduplicated.
+        parts = sorted(set(parts))
+        if len(parts) == 1:
+            return _format(children[0])
+    return f" {op} ".join(parts)
+
+
+def parse_query(search_string: str) -> Node:
+    """
+    Parses a PubMed search string into a tree of ("AND" | "OR" | "NOT", children)
+    nodes with ("TERM", [text]) leaves, evaluated left to right like PubMed.
+
+    Raises:
+        ValueError: If the search string is not a valid boolean expression.
+    """
+    return _parse(_TOKEN.findall(search_string))
+
+
+def normalize_query(search_string: str) -> str:
+    """
+    Normalizes a PubMed search string for use as a cache key.
+
+    Collapses whitespace and case, removes redundant parentheses and sorts
+    the terms of OR groups, so that equivalent search strings like
+    '("T-DXd" OR  "Trastuzumab Deruxtecan")' and
+    '"trastuzumab deruxtecan" OR "t-dxd"' share a key. Boolean operators are
+    only recognized in upper case, as in PubMed. Search strings that cannot
+    be parsed are only normalized for whitespace and case.
+    """
+    try:
+        return _format(parse_query(search_string))
+    except ValueError:
+        return " ".join(search_string.lower().split())
+
+
+class QueryCache:
+    """
+    In-memory LRU cache from normalized search string to PMIDs.
+
+    Each search string keeps the PMIDs of its largest retmax, and searches
+    with a smaller retmax are answered with their first PMIDs, since ESearch
+    returns the same order for any retmax. Entries expire after `ttl`
+    seconds, so new publications show up after a short while. A `ttl` of 0
+    disables the cache.
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, int, list[str]]]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, search_string: str, retmax: int) -> list[str] | None:
+        """Returns the cached PMIDs of a search, or None on a miss."""
+        key = normalize_query(search_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None or entry[1] < retmax:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2][:retmax]
+
+    def put(self, search_string: str, retmax: int, id_list: list[str]) -> None:
+        """Stores the PMIDs returned by ESearch for a search."""
+        if self.ttl <= 0:
+            return
+        key = normalize_query(search_string)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            # A fresh entry of a larger retmax already answers the search.
+            if entry is not None and entry[0] >= now and entry[1] > retmax:
+                return
+            self._entries[key] = (now + self.ttl, retmax, list(id_list))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and the number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+@functools.cache
+def get_query_cache() -> QueryCache:
+    """Returns the ESearch cache of this process (TTL from PUBMED_QUERY_CACHE_TTL)."""
+    return QueryCache(ttl=float(os.getenv("PUBMED_QUERY_CACHE_TTL", DEFAULT_TTL)))
@@ -0,0 +1,148 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide rate limiter for the NCBI E-utilities."""
+
+import asyncio
+import os
+import threading
+import time
+
+# NCBI allows 3 requests per second without an API key and 10 with one.
+# See https://www.ncbi.nlm.nih.gov/books/NBK25497/
+DEFAULT_RATE = 3.0
+API_KEY_RATE = 10.0
+
+
+class TokenBucket:
+    """
+    A token bucket that hands out reservations instead of blocking.
+
+    Tokens may go negative: every reservation takes a token immediately and
+    returns how long the caller has to wait before using it. Callers that
+    reserve while the bucket is empty are therefore queued in arrival order,
+    each waiting exactly 1 / rate seconds longer than the previous one.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay(self, now: float) -> float:
+        """Returns the delay a reservation made at `now` would have to wait."""
+        self._refill(now)
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def reserve(self, now: float) -> float:
+        """Takes a token and returns the delay until it may be used."""
+        delay = self.delay(now)
+        self._tokens -= 1
+        return delay
+
+
+class NcbiRateLimiter:
+    """
+    Shares the NCBI request quota between all threads and sessions of a process.
+
+    Each API key gets its own token bucket (10 requests per second, or 3 per
+    second without a key). Requests are assigned to the key that can serve them
+    first, so a pool of keys adds up their quotas.
+    """
+
+    def __init__(
+        self, api_keys: list[str] | None = None, rate: float | None = None
+    ) -> None:
+        self._buckets: dict[str | None, TokenBucket] = {}
+        keys: list[str | None] = list(api_keys or []) or [None]
+        for api_key in keys:
+            key_rate = rate or (API_KEY_RATE if api_key else DEFAULT_RATE)
+            self._buckets[api_key] = TokenBucket(key_rate)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def rate(self) -> float:
+        """The combined number of requests per second of all keys."""
+        return sum(bucket.rate for bucket in self._buckets.values())
+
+    def reserve(self) -> tuple[str | None, float]:
+        """
+        Reserves a request slot without waiting for it.
+
+        Returns:
+            The API key to send with the request (None without a key) and the
+            number of seconds to wait before sending it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            api_key = min(self._buckets, key=lambda k: self._buckets[k].delay(now))
+            delay = self._buckets[api_key].reserve(now)
+            self._requests += 1
+            if delay > 0:
+                self._waited += 1
+                self._total_wait += delay
+                self._max_wait = max(self._max_wait, delay)
+        return api_key, delay
+
+    def acquire(self) -> str | None:
+        """Blocks until a request may be sent and returns the API key to use."""
+        api_key, delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return api_key
+
+    async def acquire_async(self) -> str | None:
+        """Waits without blocking the event loop and returns the API key to use."""
+        api_key, delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return api_key
+
+    def stats(self) -> dict:
+        """Returns the queue-wait metrics of the limiter."""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "api_keys": sum(1 for key in self._buckets if key),
+                "requests": self._requests,
+                "waited": self._waited,
+                "total_wait_seconds": self._total_wait,
+                "max_wait_seconds": self._max_wait,
+                "mean_wait_seconds": (
+                    self._total_wait / self._requests if self._requests else 0.0
+                ),
+            }
+
+
+def api_keys_from_env() -> list[str]:
+    """Reads the NCBI API key pool from NCBI_API_KEYS or NCBI_API_KEY."""
+    keys = os.getenv("NCBI_API_KEYS") or os.getenv("NCBI_API_KEY") or ""
+    return [key.strip() for key in keys.split(",") if key.strip()]
+
+
+# The limiter every E-utilities request of this process goes through.
+ncbi_rate_limiter = NcbiRateLimiter(
+    api_keys_from_env(), rate=float(os.getenv("NCBI_RATE_LIMIT", "0")) or None
+)
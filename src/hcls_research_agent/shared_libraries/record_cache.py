@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent cache of PubMed Medline records keyed by PMID."""
+
+import functools
+import json
+import os
+import pathlib
+import time
+import zlib
+
+from .sqlite_store import SqliteCache
+
+DEFAULT_PATH = str(pathlib.Path.home() / ".cache" / "hcls-research-agent" / "pubmed.db")
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class RecordCache(SqliteCache):
+    """
+    SQLite cache of zlib-compressed Medline records.
+
+    Entries older than `ttl` seconds count as misses. When the compressed
+    payloads exceed `max_bytes`, the least recently used entries are evicted.
+    """
+
+    SCHEMA = (
+        (
+            "CREATE TABLE IF NOT EXISTS records ("
+            " pmid TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        ),
+        "CREATE INDEX IF NOT EXISTS records_accessed_at ON records (accessed_at)",
+    )
+    TABLE = "records"
+    KEY = "pmid"
+    CREATED = "fetched_at"
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        super().__init__(path, ttl, max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, pmids: list[str]) -> dict[str, dict]:
+        """Returns the fresh cached records for the given PMIDs."""
+        if not pmids:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(pmids))
+        with self._lock:
+            db = self._connect()
+            with db:
+                rows = db.execute(
+                    f"SELECT pmid, payload FROM records WHERE pmid IN ({placeholders})"
+                    " AND fetched_at > ?",
+                    [*pmids, now - self.ttl],
+                ).fetchall()
+                db.executemany(
+                    "UPDATE records SET accessed_at = ? WHERE pmid = ?",
+                    [(now, pmid) for pmid, _ in rows],
+                )
+            self.hits += len(rows)
+            self.misses += len(set(pmids)) - len(rows)
+        return {pmid: json.loads(zlib.decompress(payload)) for pmid, payload in rows}
+
+    def put_many(self, records: dict[str, dict]) -> None:
+        """Stores records and evicts the least recently used ones if needed."""
+        if not records:
+            return
+        now = time.time()
+        rows = []
+        for pmid, record in records.items():
+            payload = zlib.compress(json.dumps(record).encode())
+            rows.append((pmid, payload, len(payload), now, now))
+        with self._lock:
+            db = self._connect()
+            with db:
+                self._put(db, rows)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and the size of the cache."""
+        with self._lock:
+            entries, size = (
+                self._connect()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM records")
+                .fetchone()
+            )
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+@functools.cache
+def get_record_cache() -> RecordCache | None:
+    """
+    Returns the record cache of this process, or None if caching is disabled.
+
+    The cache is configured with PUBMED_CACHE_PATH (set it to an empty string
+    to disable caching), PUBMED_CACHE_TTL in seconds and PUBMED_CACHE_MAX_BYTES.
+    """
+    path = os.getenv("PUBMED_CACHE_PATH", DEFAULT_PATH)
+    if not path:
+        return None
+    return RecordCache(
+        path,
+        ttl=float(os.getenv("PUBMED_CACHE_TTL", DEFAULT_TTL)),
+        max_bytes=int(os.getenv("PUBMED_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    )
@@ -0,0 +1,248 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in cache of model responses keyed by the content of the request.
+
+Identical requests, e.g. of demo sessions, regression tests or repeated
+research questions, are answered from the cache instead of the model. The key
+is a hash of the model name, the system instruction with the state variables
+it references already filled in, the generation settings, the tools and the
+contents, so a change to any of them is a miss.
+
+Caching replays the first answer to a request, so it is off unless
+LLM_CACHE is set to "memory" or "sqlite", and only requests with an explicit
+temperature of zero and a single candidate are cached. With LLM_CACHE set,
+the agents whose responses are cached sample at temperature zero, see
+generation_config().
+"""
+
+import contextvars
+import functools
+import hashlib
+import os
+import pathlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Protocol
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai.types import GenerateContentConfig
+
+from . import telemetry
+from .sqlite_store import SqliteCache
+
+DEFAULT_PATH = str(pathlib.Path.home() / ".cache" / "hcls-research-agent" / "llm.db")
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# The key of the pending model call of the running task.
+_pending_key: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "pending_key", default=None
+)
+
+
+class Backend(Protocol):
+    """Storage of serialized responses by key."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def put(self, key: str, value: str) -> None: ...
+
+
+class MemoryBackend:
+    """In-memory LRU storage with entries that expire after `ttl` seconds."""
+
+    def __init__(
+        self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SqliteBackend(SqliteCache):
+    """
+    SQLite storage of zlib-compressed responses.
+
+    Entries older than `ttl` seconds count as misses. When the compressed
+    responses exceed `max_bytes`, the least recently used ones are evicted.
+    """
+
+    SCHEMA = (
+        (
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        ),
+        "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)",
+    )
+    TABLE = "responses"
+    KEY = "key"
+    CREATED = "created_at"
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        super().__init__(path, ttl, max_bytes)
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            with db:
+                row = db.execute(
+                    "SELECT payload FROM responses WHERE key = ? AND created_at > ?",
+                    [key, now - self.ttl],
+                ).fetchone()
+                if row is None:
+                    return None
+                db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", [now, key]
+                )
+        return zlib.decompress(row[0]).decode()
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        payload = zlib.compress(value.encode())
+        with self._lock:
+            db = self._connect()
+            with db:
+                self._put(db, [(key, payload, len(payload), now, now)])
+
+
+def request_key(llm_request: LlmRequest) -> str | None:
+    """
+    Returns the cache key of a model request, or None if it must not be cached.
+    """
+    config = llm_request.config
+    # Without a temperature the model samples at its default temperature.
+    if config.temperature != 0 or (config.candidate_count or 1) > 1:
+        return None
+    digest = hashlib.sha256()
+    digest.update((llm_request.model or "").encode())
+    # The instruction is resolved before the callbacks run, so it contains the
+    # values of the state variables it references.
+    digest.update(
+        config.model_copy(update={"labels": None, "http_options": None})
+        .model_dump_json(exclude_none=True)
+        .encode()
+    )
+    for content in llm_request.contents:
+        digest.update(content.model_dump_json(exclude_none=True).encode())
+    return digest.hexdigest()
+
+
+def generation_config() -> GenerateContentConfig | None:
+    """
+    Returns the generation settings of the agents whose responses are cached.
+
+    With LLM_CACHE set, they sample at temperature zero, so the cache replays
+    the answer the model would give again. Otherwise the model defaults apply.
+    """
+    if os.getenv("LLM_CACHE", "") not in ("memory", "sqlite"):
+        return None
+    return GenerateContentConfig(temperature=0)
+
+
+@functools.cache
+def get_response_cache() -> Backend | None:
+    """
+    Returns the response cache of this process, or None if it is disabled.
+
+    The cache is configured with LLM_CACHE ("memory", "sqlite" or unset to
+    disable it), LLM_CACHE_TTL in seconds, LLM_CACHE_MAX_ENTRIES for the
+    memory backend and LLM_CACHE_PATH and LLM_CACHE_MAX_BYTES for the SQLite
+    backend.
+    """
+    backend = os.getenv("LLM_CACHE", "")
+    ttl = float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL))
+    if backend == "memory":
+        return MemoryBackend(
+            ttl=ttl,
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+    if backend == "sqlite":
+        return SqliteBackend(
+            os.getenv("LLM_CACHE_PATH", DEFAULT_PATH),
+            ttl=ttl,
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+    return None
+
+
+def before_model_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> LlmResponse | None:
+    """Answers a model call from the cache, if the request was seen before."""
+    del callback_context
+    _pending_key.set(None)
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    key = request_key(llm_request)
+    if key is None:
+        return None
+    if (cached := cache.get(key)) is not None:
+        telemetry.count_cache_lookups("llm", 1, 0)
+        return LlmResponse.model_validate_json(cached)
+    telemetry.count_cache_lookups("llm", 0, 1)
+    _pending_key.set(key)
+    return None
+
+
+def after_model_callback(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """Stores the complete response to a model call that was not cached."""
+    del callback_context
+    key = _pending_key.get()
+    if key is None:
+        return
+    _pending_key.set(None)
+    if llm_response.partial or llm_response.error_code or not llm_response.content:
+        return
+    cache = get_response_cache()
+    if cache is not None:
+        cache.put(
+            key,
+            llm_response.model_dump_json(exclude_none=True, exclude={"usage_metadata"}),
+        )
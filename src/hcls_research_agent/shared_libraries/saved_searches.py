@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Saved searches of users remembering the PMIDs they found and when they last ran."""
+
+import functools
+import json
+import os
+import pathlib
+import time
+import zlib
+
+from .query_cache import normalize_query
+from .sqlite_store import SqliteStore
+
+DEFAULT_PATH = str(
+    pathlib.Path.home() / ".cache" / "hcls-research-agent" / "saved-searches.db"
+)
+
+
+class SavedSearches(SqliteStore):
+    """
+    SQLite store of searches that are re-run to monitor the literature.
+
+    Searches are saved per user and keyed by their normalized search string,
+    so equivalent spellings share one saved search.
+    """
+
+    SCHEMA = (
+        (
+            "CREATE TABLE IF NOT EXISTS user_searches ("
+            " user_id TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " search_string TEXT NOT NULL,"
+            " last_run REAL NOT NULL,"
+            " pmids BLOB NOT NULL,"
+            " pending BLOB NOT NULL,"
+            " PRIMARY KEY (user_id, key))"
+        ),
+    )
+
+    def get(self, user_id: str, search_string: str) -> dict | None:
+        """
+        Returns a saved search of a user, or None if it was never saved.
+
+        Returns:
+            A dictionary with the "search_string" as saved, the "last_run"
+            as a Unix timestamp, the "pmids" returned so far as a set and
+            the "pending" PMIDs found but not returned yet as a list.
+        """
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT search_string, last_run, pmids, pending"
+                    " FROM user_searches WHERE user_id = ? AND key = ?",
+                    [user_id, normalize_query(search_string)],
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return {
+            "search_string": row[0],
+            "last_run": row[1],
+            "pmids": set(json.loads(zlib.decompress(row[2]))),
+            "pending": json.loads(zlib.decompress(row[3])),
+        }
+
+    def save(
+        self,
+        user_id: str,
+        search_string: str,
+        pmids: set[str],
+        pending: list[str] | None = None,
+        last_run: float | None = None,
+    ) -> None:
+        """
+        Stores the PMIDs returned by a search of a user and the time it ran.
+
+        PMIDs found by the search but not returned yet are kept as pending,
+        in the order they are to be returned by the next run.
+        """
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO user_searches VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        user_id,
+                        normalize_query(search_string),
+                        search_string,
+                        time.time() if last_run is None else last_run,
+                        zlib.compress(json.dumps(sorted(pmids)).encode()),
+                        zlib.compress(json.dumps(pending or []).encode()),
+                    ],
+                )
+
+
+@functools.cache
+def get_saved_searches() -> SavedSearches:
+    """Returns the saved searches of this process (file from PUBMED_SAVED_SEARCHES_PATH)."""
+    return SavedSearches(os.getenv("PUBMED_SAVED_SEARCHES_PATH", DEFAULT_PATH))
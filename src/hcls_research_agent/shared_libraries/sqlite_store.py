@@ -0,0 +1,113 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""SQLite database files of the caches, the local index and the saved searches."""
+
+import pathlib
+import sqlite3
+import threading
+import time
+
+# Number of entries read at a time while looking for entries to evict.
+EVICT_BATCH = 256
+
+
+class SqliteStore:
+    """
+    Base of the stores kept in an SQLite database file.
+
+    The database is opened on first use, with the statements of SCHEMA. It is
+    in WAL mode, so the file can be shared by several processes. Within a
+    process, threads share one connection and take turns with `_lock`.
+    """
+
+    # The statements creating the tables and indexes of the store.
+    SCHEMA: tuple[str, ...] = ()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                self._db.execute(statement)
+        return self._db
+
+
+class SqliteCache(SqliteStore):
+    """
+    Base of the caches whose entries expire after `ttl` seconds and whose
+    payloads are kept within `max_bytes`.
+
+    The rows of TABLE are the KEY, the payload, its "size", the time the
+    entry was stored (the CREATED column) and the time it was last read
+    ("accessed_at"). The size of the cache is summed up once and then kept up
+    to date by the writes of this process, so writes do not scan the table.
+    Entries written by other processes are counted when those processes evict.
+    """
+
+    TABLE = ""
+    KEY = ""
+    CREATED = ""
+
+    def __init__(self, path: str, ttl: float, max_bytes: int) -> None:
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._bytes: int | None = None
+
+    def _put(self, db: sqlite3.Connection, rows: list[tuple]) -> None:
+        """Stores rows, within a transaction, and evicts entries if needed."""
+        if self._bytes is None:
+            (self._bytes,) = db.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}"
+            ).fetchone()
+        placeholders = ",".join("?" * len(rows))
+        (replaced,) = db.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}"
+            f" WHERE {self.KEY} IN ({placeholders})",
+            [row[0] for row in rows],
+        ).fetchone()
+        db.executemany(
+            f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?, ?, ?)", rows
+        )
+        total = self._bytes + sum(row[2] for row in rows) - replaced
+        self._bytes = self._evict(db, total) if total > self.max_bytes else total
+
+    def _evict(self, db: sqlite3.Connection, total: int) -> int:
+        # Expired entries go first. Then only as many of the least recently
+        # used entries are read, in batches, as it takes to fit max_bytes.
+        expired = db.execute(
+            f"DELETE FROM {self.TABLE} WHERE {self.CREATED} <= ? RETURNING size",
+            [time.time() - self.ttl],
+        ).fetchall()
+        total -= sum(size for (size,) in expired)
+        evicted = []
+        cursor = db.execute(
+            f"SELECT {self.KEY}, size FROM {self.TABLE} ORDER BY accessed_at"
+        )
+        while total > self.max_bytes and (rows := cursor.fetchmany(EVICT_BATCH)):
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+        cursor.close()
+        db.executemany(f"DELETE FROM {self.TABLE} WHERE {self.KEY} = ?", evicted)
+        return total
@@ -0,0 +1,457 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Latency, size and token accounting of model calls, tool calls and E-utilities
+requests.
+
+Every measurement is recorded three ways:
+
+- as an OpenTelemetry span, exported by whatever tracer provider the process
+  configures (e.g. `adk web --trace_to_cloud`), nested under the ADK spans,
+- in the per-turn ledger, keyed by the ADK invocation ID,
+- in process-wide metrics, rendered in the Prometheus text format by
+  render_metrics() and served on METRICS_PORT if it is set.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+from opentelemetry import context, trace
+from opentelemetry.trace import Status, StatusCode
+
+# Roughly four bytes make up one model token.
+BYTES_PER_TOKEN = 4
+# Number of turns kept in the ledger.
+LEDGER_TURNS = 256
+
+tracer = trace.get_tracer("hcls_research_agent")
+
+_HELP = {
+    "hcls_model_call_seconds": ("summary", "Duration of model calls."),
+    "hcls_model_bytes_total": ("counter", "Bytes sent to and received from models."),
+    "hcls_model_tokens_total": ("counter", "Prompt and response tokens of models."),
+    "hcls_tool_call_seconds": ("summary", "Duration of tool calls."),
+    "hcls_tool_bytes_total": ("counter", "Bytes of tool arguments and responses."),
+    "hcls_tool_errors_total": ("counter", "Tool calls that raised an error."),
+    "hcls_eutils_request_seconds": ("summary", "Duration of E-utilities requests."),
+    "hcls_eutils_wait_seconds_total": (
+        "counter",
+        "Seconds E-utilities requests waited for the rate limiter.",
+    ),
+    "hcls_eutils_retries_total": ("counter", "Retried E-utilities requests."),
+    "hcls_eutils_response_bytes_total": (
+        "counter",
+        "Bytes received from the E-utilities.",
+    ),
+    "hcls_cache_lookups_total": ("counter", "Cache lookups by cache and result."),
+    "hcls_compaction_saved_bytes_total": (
+        "counter",
+        "Bytes of superseded search results left out of model requests.",
+    ),
+    "hcls_router_decisions_total": (
+        "counter",
+        "User messages routed without (hit) or with (miss) the model.",
+    ),
+    "hcls_prefetch_total": (
+        "counter",
+        "Prefetches of proposed search strings by result.",
+    ),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metrics:
+    """Thread-safe counters and summaries rendered in the Prometheus format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: defaultdict[tuple[str, Labels], float] = defaultdict(float)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Increments a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] += value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Adds an observation to a summary."""
+        self.inc(f"{name}_count", 1, **labels)
+        self.inc(f"{name}_sum", value, **labels)
+
+    def get(self, name: str, **labels: str) -> float:
+        """Returns the value of a counter or summary series."""
+        with self._lock:
+            return self._values.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def reset(self) -> None:
+        """Removes all series."""
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        """Returns all series in the Prometheus text exposition format."""
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        described = set()
+        for (name, labels), value in values:
+            family = name.removesuffix("_count").removesuffix("_sum")
+            if family not in _HELP:
+                family = name
+            if family not in described:
+                kind, description = _HELP.get(family, ("untyped", family))
+                lines.append(f"# HELP {family} {description}")
+                lines.append(f"# TYPE {family} {kind}")
+                described.add(family)
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            series = f"{name}{{{label_text}}}" if labels else name
+            lines.append(f"{series} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class TurnLedger:
+    """The measurements of the most recent turns, by invocation ID."""
+
+    def __init__(self, max_turns: int = LEDGER_TURNS) -> None:
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self._turns: OrderedDict[str, list[dict]] = OrderedDict()
+
+    def record(self, invocation_id: str, entry: dict) -> None:
+        """Adds a measurement to a turn."""
+        with self._lock:
+            self._turns.setdefault(invocation_id, []).append(entry)
+            self._turns.move_to_end(invocation_id)
+            while len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+
+    def get(self, invocation_id: str) -> list[dict]:
+        """Returns the measurements of a turn in the order they finished."""
+        with self._lock:
+            return list(self._turns.get(invocation_id, []))
+
+    def summary(self, invocation_id: str) -> dict:
+        """Returns the number, seconds and tokens of a turn by kind of call."""
+        summary: dict = {}
+        for entry in self.get(invocation_id):
+            totals = summary.setdefault(
+                entry["kind"], {"calls": 0, "seconds": 0.0, "tokens": 0}
+            )
+            totals["calls"] += 1
+            totals["seconds"] += entry["seconds"]
+            totals["tokens"] += entry.get("request_tokens", 0)
+            totals["tokens"] += entry.get("response_tokens", 0)
+        return summary
+
+
+metrics = Metrics()
+ledger = TurnLedger()
+
+# The turn and the pending model or tool call of the running task.
+_invocation_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "invocation_id", default=None
+)
+_pending_model: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "pending_model", default=None
+)
+_pending_tool: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "pending_tool", default=None
+)
+
+
+def _size(payload: object) -> int:
+    if hasattr(payload, "model_dump_json"):
+        return len(payload.model_dump_json(exclude_none=True).encode())
+    return len(json.dumps(payload, ensure_ascii=False, default=str).encode())
+
+
+def _start(name: str, attributes: dict, current: bool = False) -> dict:
+    span = tracer.start_span(name, attributes=attributes)
+    # Spans are only made current where no ADK span starts or ends before
+    # they finish, i.e. for tool calls, so E-utilities requests nest in them.
+    token = context.attach(trace.set_span_in_context(span)) if current else None
+    return {"span": span, "token": token, "start": time.perf_counter()}
+
+
+def _finish(pending: dict, attributes: dict) -> float:
+    seconds: float = time.perf_counter() - pending["start"]
+    pending["span"].set_attributes(attributes)
+    pending["span"].end()
+    pending["finished"] = True
+    if pending["token"] is not None:
+        context.detach(pending["token"])
+    return seconds
+
+
+def start_model_call(agent: str, llm_request: LlmRequest) -> dict:
+    """
+    Starts measuring a model call of an agent.
+
+    Returns the pending call to pass to finish_model_call().
+    """
+    request_bytes = sum(_size(content) for content in llm_request.contents) + len(
+        str(llm_request.config.system_instruction or "").encode()
+    )
+    pending = _start(
+        f"call_llm {agent}",
+        {"hcls.agent": agent, "hcls.request_bytes": request_bytes},
+    )
+    pending["agent"] = agent
+    pending["request_bytes"] = request_bytes
+    return pending
+
+
+def finish_model_call(pending: dict, llm_response: LlmResponse) -> None:
+    """Records a model call started by start_model_call() in the current turn."""
+    agent = pending["agent"]
+    response_bytes = _size(llm_response.content) if llm_response.content else 0
+    usage = llm_response.usage_metadata
+    request_tokens = (usage and usage.prompt_token_count) or (
+        pending["request_bytes"] // BYTES_PER_TOKEN
+    )
+    response_tokens = (usage and usage.candidates_token_count) or (
+        response_bytes // BYTES_PER_TOKEN
+    )
+    seconds = _finish(
+        pending,
+        {
+            "hcls.response_bytes": response_bytes,
+            "hcls.request_tokens": request_tokens,
+            "hcls.response_tokens": response_tokens,
+        },
+    )
+    metrics.observe("hcls_model_call_seconds", seconds, agent=agent)
+    metrics.inc(
+        "hcls_model_bytes_total",
+        pending["request_bytes"],
+        agent=agent,
+        direction="request",
+    )
+    metrics.inc(
+        "hcls_model_bytes_total", response_bytes, agent=agent, direction="response"
+    )
+    metrics.inc(
+        "hcls_model_tokens_total", request_tokens, agent=agent, direction="prompt"
+    )
+    metrics.inc(
+        "hcls_model_tokens_total", response_tokens, agent=agent, direction="response"
+    )
+    if invocation_id := _invocation_id.get():
+        ledger.record(
+            invocation_id,
+            {
+                "kind": "model",
+                "name": agent,
+                "seconds": seconds,
+                "request_bytes": pending["request_bytes"],
+                "response_bytes": response_bytes,
+                "request_tokens": request_tokens,
+                "response_tokens": response_tokens,
+            },
+        )
+
+
+def before_model_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> None:
+    """Starts measuring a model call."""
+    _invocation_id.set(callback_context.invocation_id)
+    # A model call that was answered by another callback never finishes.
+    if pending := _pending_model.get():
+        _finish(pending, {"hcls.skipped": True})
+    _pending_model.set(start_model_call(callback_context.agent_name, llm_request))
+
+
+def after_model_callback(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """Records a model call."""
+    pending = _pending_model.get()
+    if pending is None:
+        return
+    _pending_model.set(None)
+    _invocation_id.set(callback_context.invocation_id)
+    finish_model_call(pending, llm_response)
+
+
+def before_tool_callback(tool: BaseTool, args: dict, tool_context: ToolContext) -> None:
+    """Starts measuring a tool call."""
+    _invocation_id.set(tool_context.invocation_id)
+    request_bytes = _size(args)
+    pending = _start(
+        f"tool {tool.name}",
+        {"hcls.tool": tool.name, "hcls.request_bytes": request_bytes},
+        current=True,
+    )
+    pending["request_bytes"] = request_bytes
+    _pending_tool.set(pending)
+    # ADK only reports tools that raise to plugins, which adk web does not
+    # load. Every tool call runs in a task of its own, so a call that never
+    # reached after_tool_callback is finished when its task is done.
+    with contextlib.suppress(RuntimeError):
+        if task := asyncio.current_task():
+            task.add_done_callback(
+                lambda task: _tool_task_done(tool.name, pending, task)
+            )
+
+
+def _tool_task_done(tool: str, pending: dict, task: asyncio.Task) -> None:
+    if pending.get("finished"):
+        return
+    error = asyncio.CancelledError() if task.cancelled() else task.exception()
+    if error is None:
+        return
+    pending["span"].record_exception(error)
+    pending["span"].set_status(Status(StatusCode.ERROR, type(error).__name__))
+    # The context the span was attached to ended with the task.
+    pending["token"] = None
+    seconds = _finish(pending, {"hcls.error": type(error).__name__})
+    metrics.observe("hcls_tool_call_seconds", seconds, tool=tool)
+    metrics.inc("hcls_tool_errors_total", tool=tool)
+
+
+def after_tool_callback(
+    tool: BaseTool, args: dict, tool_context: ToolContext, tool_response: object
+) -> None:
+    """Records a tool call."""
+    del args
+    pending = _pending_tool.get()
+    if pending is None:
+        return
+    _pending_tool.set(None)
+    response_bytes = _size(tool_response)
+    seconds = _finish(pending, {"hcls.response_bytes": response_bytes})
+    metrics.observe("hcls_tool_call_seconds", seconds, tool=tool.name)
+    metrics.inc(
+        "hcls_tool_bytes_total",
+        pending["request_bytes"],
+        tool=tool.name,
+        direction="request",
+    )
+    metrics.inc(
+        "hcls_tool_bytes_total", response_bytes, tool=tool.name, direction="response"
+    )
+    ledger.record(
+        tool_context.invocation_id,
+        {
+            "kind": "tool",
+            "name": tool.name,
+            "seconds": seconds,
+            "request_bytes": pending["request_bytes"],
+            "response_bytes": response_bytes,
+            "request_tokens": pending["request_bytes"] // BYTES_PER_TOKEN,
+            "response_tokens": response_bytes // BYTES_PER_TOKEN,
+        },
+    )
+
+
+@contextlib.contextmanager
+def eutils_span(utility: str) -> Iterator[dict]:
+    """
+    Measures an E-utilities request, including retries and rate limiter waits.
+
+    Yields a dictionary in which the request records its "attempts",
+    "wait_seconds" and "response_bytes".
+    """
+    call = {"attempts": 0, "wait_seconds": 0.0, "response_bytes": 0}
+    start = time.perf_counter()
+    with tracer.start_as_current_span(f"eutils {utility}") as span:
+        try:
+            yield call
+        finally:
+            seconds = time.perf_counter() - start
+            span.set_attributes({f"hcls.{key}": value for key, value in call.items()})
+            metrics.observe("hcls_eutils_request_seconds", seconds, utility=utility)
+            metrics.inc(
+                "hcls_eutils_wait_seconds_total", call["wait_seconds"], utility=utility
+            )
+            metrics.inc(
+                "hcls_eutils_retries_total",
+                max(0, call["attempts"] - 1),
+                utility=utility,
+            )
+            metrics.inc(
+                "hcls_eutils_response_bytes_total",
+                call["response_bytes"],
+                utility=utility,
+            )
+            if invocation_id := _invocation_id.get():
+                ledger.record(
+                    invocation_id,
+                    {"kind": "eutils", "name": utility, "seconds": seconds, **call},
+                )
+
+
+def count_cache_lookups(cache: str, hits: int, misses: int) -> None:
+    """Records the hits and misses of a cache lookup."""
+    if hits:
+        metrics.inc("hcls_cache_lookups_total", hits, cache=cache, result="hit")
+    if misses:
+        metrics.inc("hcls_cache_lookups_total", misses, cache=cache, result="miss")
+    if invocation_id := _invocation_id.get():
+        ledger.record(
+            invocation_id,
+            {
+                "kind": "cache",
+                "name": cache,
+                "seconds": 0.0,
+                "hits": hits,
+                "misses": misses,
+            },
+        )
+
+
+def render_metrics() -> str:
+    """Returns the metrics of this process in the Prometheus text format."""
+    return metrics.render()
+
+
+_metrics_server: ThreadingHTTPServer | None = None
+
+
+def serve_metrics(port: int) -> None:
+    """Serves render_metrics() at http://0.0.0.0:<port>/metrics in a thread."""
+    global _metrics_server
+    if _metrics_server is not None:
+        return
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            payload = render_metrics().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: object) -> None:
+            del format, args  # scrapes are not worth logging
+
+    _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
@@ -16,10 +16,21 @@
 
 from google.adk import Agent
 
+from ...shared_libraries import compaction, response_cache, telemetry
 from . import prompt
 
 hypothesis_agent = Agent(
     model="gemini-2.5-flash",
     name="hypothesis_agent",
+    generate_content_config=response_cache.generation_config(),
     instruction=prompt.HYPOTHESIS_PROMPT,
+    before_model_callback=[
+        compaction.compact_history,
+        response_cache.before_model_callback,
+        telemetry.before_model_callback,
+    ],
+    after_model_callback=[
+        telemetry.after_model_callback,
+        response_cache.after_model_callback,
+    ],
 )
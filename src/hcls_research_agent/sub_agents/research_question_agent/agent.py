@@ -16,11 +16,22 @@
 
 from google.adk import Agent
 
+from ...shared_libraries import compaction, response_cache, telemetry
 from . import prompt
 
 research_question_agent = Agent(
     model="gemini-2.5-flash",
     name="research_question_agent",
+    generate_content_config=response_cache.generation_config(),
     instruction=prompt.RQ_PROMPT,
     output_key="research_question",
+    before_model_callback=[
+        compaction.compact_history,
+        response_cache.before_model_callback,
+        telemetry.before_model_callback,
+    ],
+    after_model_callback=[
+        telemetry.after_model_callback,
+        response_cache.after_model_callback,
+    ],
 )
@@ -14,21 +14,288 @@
 
 """Search agent for retrieving and summarizing articles from pubmed."""
 
+import asyncio
+import os
 import time
-from io import StringIO
+from collections.abc import AsyncIterator, Callable
 
-import ssl
-import certifi
-from Bio import Entrez, Medline
 from google.adk import Agent
+from google.adk.tools import ToolContext
 
-from . import prompt
+from ...shared_libraries import compaction, telemetry
+from ...shared_libraries.eutils import (
+    EMAIL,
+    close_eutils_client,
+    eutils_request,
+    eutils_stream,
+)
+from ...shared_libraries.local_index import get_local_index
+from ...shared_libraries.query_cache import get_query_cache
+from ...shared_libraries.record_cache import get_record_cache
+from ...shared_libraries.saved_searches import get_saved_searches
+from . import prefetch, prompt
+from .articles import compact_record, project_articles, project_handles
+from .citations import expand_neighbors
+from .fusion import fuse_rankings
+from .rerank import RERANK_FACTOR, rerank
+from .summarize import MAP_REDUCE_THRESHOLD, summarize_records
+
+# Number of PMIDs sent in a single EFetch call.
+EFETCH_BATCH_SIZE = int(os.getenv("PUBMED_EFETCH_BATCH_SIZE", "200"))
+# Number of titles returned with the hit count of a search string.
+COUNT_TITLES = 5
+# Session state key of the position in the results of the last search.
+CURSOR_KEY = "pubmed_cursor"
+# Maximum number of PMIDs searched by a re-run of a saved search, the most
+# ESearch returns at once.
+UPDATES_RETMAX = 10000
+
+
+async def esearch(search_string: str, email: str | None, retmax: int) -> list[str]:
+    """
+    Returns the PMIDs found by ESearch for a search string.
+
+    Results are served from the query cache when an equivalent search string
+    was searched recently, or from the local index if it is the backend.
+
+    Args:
+        search_string: The string for the search
+        email: The email to be given to the Entrez API, None for NCBI_EMAIL
+        retmax: The maximum number of PMIDs to return
+    """
+    index = get_local_index()
+    if index is not None:
+        # Broad terms rank many rows of a full index, so the index is searched
+        # in a thread instead of holding up the other sessions.
+        return await asyncio.to_thread(index.search, search_string, retmax)
+    query_cache = get_query_cache()
+    id_list = query_cache.get(search_string, retmax)
+    telemetry.count_cache_lookups(
+        "query", int(id_list is not None), int(id_list is None)
+    )
+    if id_list is None:
+        response = await eutils_request(
+            "esearch",
+            db="pubmed",
+            term=search_string,
+            retmax=retmax,
+            retmode="json",
+            email=email,
+        )
+        id_list = response.json()["esearchresult"]["idlist"]
+        query_cache.put(search_string, retmax, id_list)
+    return id_list
+
+
+async def esearch_history(search_string: str, email: str) -> dict:
+    """
+    Stores the results of a search on the NCBI History Server.
+
+    Args:
+        search_string: The string for the search
+        email: The email to be given to the Entrez API
+
+    Returns:
+        A dictionary with the number of matching articles as "count" and the
+        "webenv" and "query_key" of the stored results.
+    """
+    response = await eutils_request(
+        "esearch",
+        db="pubmed",
+        term=search_string,
+        usehistory="y",
+        retmax=0,
+        retmode="json",
+        email=email,
+    )
+    result = response.json()["esearchresult"]
+    return {
+        "count": int(result["count"]),
+        "webenv": result["webenv"],
+        "query_key": result["querykey"],
+    }
+
+
+async def parse_medline(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """Parses Medline records from a stream of lines as soon as each is complete."""
+    # Biopython is imported on first use to keep it out of the cold start.
+    from Bio import Medline
+
+    buffer: list[str] = []
+    async for line in lines:
+        # Records are separated by empty lines. Continuation lines start with
+        # six spaces, even if they are otherwise blank.
+        if line:
+            buffer.append(f"{line}\n")
+        elif buffer:
+            yield Medline.read(buffer)
+            buffer = []
+    if buffer:
+        yield Medline.read(buffer)
+
+
+async def iter_articles(
+    id_list: list[str], email: str | None, batch_size: int = EFETCH_BATCH_SIZE
+) -> AsyncIterator[dict]:
+    """
+    Yields the Medline records for a list of PMIDs as they become available.
+
+    With the local index as backend, records are read from the index.
+    Otherwise records found in the record cache are yielded first. The others
+    are fetched in batches and parsed straight from the EFetch response, so only
+    one record at a time is held in memory on top of the batch that is
+    written to the record cache.
+
+    Args:
+        id_list: The PMIDs to fetch
+        email: The email to be given to the Entrez API, None for NCBI_EMAIL
+        batch_size: The maximum number of PMIDs sent in a single EFetch call
+
+    Yields:
+        Dictionaries with the PMID as "pmid" and a list with its Medline record
+        as "article", in no particular order. PMIDs without a record are
+        skipped.
+    """
+    index = get_local_index()
+    if index is not None:
+        records = await asyncio.to_thread(index.get_many, id_list)
+        for id, record in records.items():
+            yield {"pmid": id, "article": [record]}
+        return
+
+    # The cache is read and written in a thread, so that a large cache does
+    # not hold up the other sessions on the event loop.
+    cache = get_record_cache()
+    cached = await asyncio.to_thread(cache.get_many, id_list) if cache else {}
+    if cache:
+        telemetry.count_cache_lookups(
+            "record", len(cached), len(set(id_list)) - len(cached)
+        )
+    for id, record in cached.items():
+        yield {"pmid": id, "article": [record]}
+
+    missing = [id for id in dict.fromkeys(id_list) if id not in cached]
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start : start + batch_size]
+        fetched: dict[str, dict] = {}
+        async with eutils_stream(
+            "efetch",
+            db="pubmed",
+            id=",".join(batch),
+            rettype="medline",
+            retmode="text",
+            email=email,
+        ) as response:
+            async for record in parse_medline(response.aiter_lines()):
+                pmid = record.get("PMID")
+                if pmid in batch and pmid not in fetched:
+                    fetched[pmid] = record
+                    yield {"pmid": pmid, "article": [record]}
+        if cache:
+            await asyncio.to_thread(cache.put_many, fetched)
+
+
+async def iter_history(
+    webenv: str,
+    query_key: str,
+    retstart: int,
+    retmax: int,
+    email: str,
+    batch_size: int = EFETCH_BATCH_SIZE,
+) -> AsyncIterator[dict]:
+    """
+    Yields the Medline records of a page of results stored on the History Server.
+
+    The page is fetched in EFetch calls of at most batch_size records, so large
+    pages never need their PMIDs up front. Fetched records are added to the
+    record cache.
+
+    Args:
+        webenv: The WebEnv returned by esearch_history
+        query_key: The query_key returned by esearch_history
+        retstart: The position of the first record of the page
+        retmax: The maximum number of records of the page
+        email: The email to be given to the Entrez API
+        batch_size: The maximum number of records fetched by a single EFetch call
+
+    Yields:
+        Dictionaries with the PMID as "pmid" and a list with its Medline record
+        as "article", in the order of the search results.
+    """
+    cache = get_record_cache()
+    for start in range(retstart, retstart + retmax, batch_size):
+        size = min(batch_size, retstart + retmax - start)
+        fetched: dict[str, dict] = {}
+        async with eutils_stream(
+            "efetch",
+            db="pubmed",
+            WebEnv=webenv,
+            query_key=query_key,
+            retstart=start,
+            retmax=size,
+            rettype="medline",
+            retmode="text",
+            email=email,
+        ) as response:
+            async for record in parse_medline(response.aiter_lines()):
+                pmid = record.get("PMID")
+                if pmid and pmid not in fetched:
+                    fetched[pmid] = record
+                    yield {"pmid": pmid, "article": [record]}
+        if cache:
+            await asyncio.to_thread(cache.put_many, fetched)
+        # A short batch means the end of the results.
+        if len(fetched) < size:
+            break
+
+
+async def fetch_articles(
+    id_list: list[str],
+    email: str | None,
+    batch_size: int = EFETCH_BATCH_SIZE,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> list:
+    """
+    Fetches the Medline records for a list of PMIDs in batches.
+
+    Records found in the record cache are not fetched again, and fetched
+    records are added to the cache. Each record is reduced to the tags in
+    KEPT_TAGS as it arrives, so the result holds no more of the records than
+    the tools project and rerank, however large the limit.
+
+    Args:
+        id_list: The PMIDs to fetch, in the order returned by ESearch
+        email: The email to be given to the Entrez API, None for NCBI_EMAIL
+        batch_size: The maximum number of PMIDs sent in a single EFetch call
+        on_progress: Called with the number of received and requested PMIDs
+            whenever a record arrives
+
+    Returns:
+        A list of dictionaries with the PMID as "pmid" and a list of its reduced
+        Medline records as "article", in the same order as id_list.
+    """
+    articles: dict[str, list] = {id: [] for id in id_list}
+    received = 0
+    async for item in iter_articles(id_list, email, batch_size=batch_size):
+        articles[item["pmid"]] = [compact_record(r) for r in item["article"]]
+        received += 1
+        if on_progress:
+            on_progress(received, len(articles))
+
+    return [{"pmid": id, "article": articles[id]} for id in id_list]
+
+
+def print_progress(received: int, total: int) -> None:
+    """Prints the fetch progress of a search every 10 records."""
+    if received % 10 == 0 or received == total:
+        print(f"--- Received {received} of {total} articles from Pubmed ---")
 
 
-def search_pubmed(
+async def search_pubmed(
     search_string: str,
     email: str,
     limit: int,
+    tool_context: ToolContext | None = None,
 ) -> list:
     """
     Fetches articles with abstracts for a search_string from pubmed.
@@ -37,69 +304,533 @@ def search_pubmed(
         search_string: The string for the search (e.g., "Treatment for KRAS G13D Breast Cancer")
         email: The email to be given to the Entrez API (e.g., "admin@website.com")
         limit: The maximum number of articles to fetch
+        tool_context: The context of the tool call, whose session state keeps
+            the position in the results for search_more_pubmed. If it holds a
+            research_question, PUBMED_RERANK_FACTOR times `limit` articles are
+            fetched and the `limit` best matching the question are returned.
 
     Returns:
-        On success: A list of dictionaries with the PMID id as key and a dictionary of
-        the Medline content as value.
+        On success: A list of dictionaries with the PMID as "pmid" and the title,
+        date, journal and a snippet of the abstract as "article".
+        For many articles: A list of dictionaries with the PMIDs of a batch of
+        articles as "pmids" and their summary as "summary".
         On error: A list containing the error of the search, either "Error connecting to Pubmed"
         or "Could not find any articles"
     """
     print(
         f"--- Tool called: Fetching {limit} articles for {search_string} via Pubmed API ---"
     )
-    try:
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        ssl._create_default_https_context = lambda: ssl_context
-        print(f"SSL context configured to use CA bundle: {certifi.where()}")
-    except Exception as e:
-        print(f"Error configuring SSL context: {e}")
 
-    # Always provide an email to identify yourself to the API.
-    # This is a requirement from NCBI.
-    Entrez.email = email  # type: ignore
+    # With a research question, more articles than needed are fetched and
+    # only the ones best matching the question are passed on.
+    research_question = ""
+    if tool_context is not None:
+        research_question = str(tool_context.state.get("research_question") or "")
+    retmax = limit * RERANK_FACTOR if research_question else limit
+    await prefetch.join(tool_context, search_string)
 
-    # Use Entrez.esearch to perform the search
+    # Use ESearch to perform the search. Always provide an email to identify
+    # yourself to the API. This is a requirement from NCBI.
     try:
-        handle = Entrez.esearch(db="pubmed", term=search_string, retmax=limit)
-        id_list = Entrez.read(handle)["IdList"]
-        handle.close()
+        id_list = await esearch(search_string, email, retmax)
     except ConnectionError as e:
         return [f"Error connecting to Pubmed: {e}"]
 
-    records = []
-
     # If id_list is empty
     if not id_list:
         return ["Could not find any articles"]
 
-    # Use Entrez.efetch to retrieve the full details of the articles
-    # Convert from
-    for id in id_list:
-        try:
-            handle = Entrez.efetch(
-                db="pubmed", id=id, rettype="medline", retmode="text"
+    # Use EFetch to retrieve the full details of the articles
+    try:
+        records = await fetch_articles(
+            id_list, email, batch_size=EFETCH_BATCH_SIZE, on_progress=print_progress
+        )
+    except ConnectionError as e:
+        return [f"Error connecting to Pubmed: {e}"]
+    ranked_out: list[str] = []
+    if len(records) > limit:
+        kept = rerank(records, research_question, limit)
+        kept_ids = {record["pmid"] for record in kept}
+        ranked_out = [r["pmid"] for r in records if r["pmid"] not in kept_ids]
+        records = kept
+
+    if tool_context is not None:
+        # The articles that were fetched but ranked out are returned first
+        # by search_more_pubmed.
+        tool_context.state[CURSOR_KEY] = {
+            "search_string": search_string,
+            "retstart": len(id_list),
+            "pending": ranked_out,
+        }
+    return await _present(records, tool_context)
+
+
+async def search_pubmed_multi(
+    search_strings: list[str],
+    email: str,
+    limit: int,
+    tool_context: ToolContext | None = None,
+) -> list:
+    """
+    Fetches articles found by several complementary search strings from pubmed.
+
+    Use it to cover synonyms, MeSH terms and drug code names of a research
+    question with one search per variant. Each article is fetched once, even
+    if several search strings find it.
+
+    Args:
+        search_strings: The strings for the searches (e.g., ["trastuzumab deruxtecan HER2 low", "T-DXd HER2 low"])
+        email: The email to be given to the Entrez API (e.g., "admin@website.com")
+        limit: The maximum number of articles to fetch for all search strings together
+        tool_context: The context of the tool call
+
+    Returns:
+        On success: A list of dictionaries with the PMID as "pmid", the title,
+        date, journal and a snippet of the abstract as "article"
+        and the search strings that found it as "queries", best matches first.
+        For many articles: A list of dictionaries with the PMIDs of a batch of
+        articles as "pmids" and their summary as "summary".
+        On error: A list containing the error of the search, either "Error connecting to Pubmed"
+        or "Could not find any articles"
+    """
+    search_strings = list(dict.fromkeys(search_strings))
+    print(
+        f"--- Tool called: Fetching {limit} articles for {len(search_strings)}"
+        " search strings via Pubmed API ---"
+    )
+
+    await prefetch.join(tool_context, *search_strings)
+    # The searches run concurrently and share the rate limit of the process.
+    try:
+        id_lists = await asyncio.gather(
+            *(esearch(search_string, email, limit) for search_string in search_strings)
+        )
+    except ConnectionError as e:
+        return [f"Error connecting to Pubmed: {e}"]
+    hits = fuse_rankings(dict(zip(search_strings, id_lists, strict=True)))[:limit]
+    if not hits:
+        return ["Could not find any articles"]
+
+    try:
+        records = await fetch_articles(
+            [hit.pmid for hit in hits],
+            email,
+            batch_size=EFETCH_BATCH_SIZE,
+            on_progress=print_progress,
+        )
+    except ConnectionError as e:
+        return [f"Error connecting to Pubmed: {e}"]
+
+    if tool_context is not None:
+        # search_more_pubmed continues single searches only.
+        tool_context.state[CURSOR_KEY] = None
+    results = await _present(records, tool_context)
+    queries = {hit.pmid: list(hit.queries) for hit in hits}
+    for result in results:
+        if isinstance(result, dict) and "article" in result:
+            result["queries"] = queries[result["pmid"]]
+    return results
+
+
+async def _present(records: list, tool_context: ToolContext | None) -> list:
+    # Large result sets are summarized in batches, which the agent reduces
+    # into its summary, so that not every abstract has to fit its context.
+    if not MAP_REDUCE_THRESHOLD or len(records) <= MAP_REDUCE_THRESHOLD:
+        return project_handles(records)
+    research_question = ""
+    if tool_context is not None:
+        research_question = str(tool_context.state.get("research_question", ""))
+    return await summarize_records(records, research_question)
+
+
+async def _fetch_page(cursor: dict, email: str, limit: int) -> list:
+    return [
+        {"pmid": item["pmid"], "article": [compact_record(r) for r in item["article"]]}
+        async for item in iter_history(
+            cursor["webenv"], cursor["query_key"], cursor["retstart"], limit, email
+        )
+    ]
+
+
+async def search_more_pubmed(email: str, limit: int, tool_context: ToolContext) -> list:
+    """
+    Fetches the next articles of the last search_string searched on pubmed.
+
+    Only articles that were not returned by the previous searches for the
+    search_string are fetched. Articles the search fetched but ranked below
+    its limit come first, best matching the research question first.
+
+    Args:
+        email: The email to be given to the Entrez API (e.g., "admin@website.com")
+        limit: The maximum number of additional articles to fetch
+        tool_context: The context of the tool call, whose session state keeps
+            the position in the results
+
+    Returns:
+        On success: A list of dictionaries with the PMID as "pmid" and the title,
+        date, journal and a snippet of the abstract as "article".
+        For many articles: A list of dictionaries with the PMIDs of a batch of
+        articles as "pmids" and their summary as "summary".
+        On error: A list containing the error of the search, either "Error connecting to Pubmed",
+        "No previous search to continue" or "Could not find any more articles"
+    """
+    cursor = tool_context.state.get(CURSOR_KEY)
+    if not cursor:
+        return ["No previous search to continue"]
+    print(
+        f"--- Tool called: Fetching {limit} more articles for"
+        f" {cursor['search_string']} via Pubmed API ---"
+    )
+
+    cursor = dict(cursor)
+    try:
+        records = await _pending_records(cursor, email, limit, tool_context)
+        remaining = limit - len(records)
+        if remaining > 0:
+            index = get_local_index()
+            if index is not None:
+                id_list = await asyncio.to_thread(
+                    index.search, cursor["search_string"], remaining, cursor["retstart"]
+                )
+                more = await fetch_articles(id_list, email)
+            else:
+                more = await _search_more_eutils(cursor, email, remaining)
+            cursor["retstart"] += len(more)
+            records += more
+    except ConnectionError as e:
+        return [f"Error connecting to Pubmed: {e}"]
+
+    if not records:
+        return ["Could not find any more articles"]
+    tool_context.state[CURSOR_KEY] = cursor
+    return await _present(records, tool_context)
+
+
+async def _pending_records(
+    cursor: dict, email: str, limit: int, tool_context: ToolContext
+) -> list:
+    # The articles ranked out by the search, reranked so that the best of
+    # them come first. The rest stay pending in the cursor.
+    pending = cursor.get("pending") or []
+    if not pending:
+        return []
+    records = [r for r in await fetch_articles(pending, email) if r["article"]]
+    research_question = str(tool_context.state.get("research_question") or "")
+    records = rerank(records, research_question, len(records))
+    cursor["pending"] = [record["pmid"] for record in records[limit:]]
+    return records[:limit]
+
+
+async def _search_more_eutils(cursor: dict, email: str, limit: int) -> list:
+    # The results are stored on the History Server on the first call, and
+    # paged through with the same WebEnv afterwards. The cursor is updated
+    # with the WebEnv.
+    stored = "webenv" in cursor
+    if not stored:
+        cursor.update(await esearch_history(cursor["search_string"], email))
+    if cursor["retstart"] >= cursor["count"]:
+        return []
+    records = await _fetch_page(cursor, email, limit)
+    if not records and stored:
+        # The History Server forgets results after a few hours of disuse.
+        cursor.update(await esearch_history(cursor["search_string"], email))
+        records = await _fetch_page(cursor, email, limit)
+    return records
+
+
+async def search_pubmed_updates(
+    search_string: str,
+    email: str,
+    limit: int,
+    tool_context: ToolContext | None = None,
+) -> dict:
+    """
+    Fetches the articles added to pubmed for a search_string since its last run.
+
+    Use it when the user monitors the literature on a research question and
+    asks what is new. The first run of a search_string finds all articles, up
+    to UPDATES_RETMAX, and saves the search. If more than `limit` articles
+    are new, the others are returned by the next runs.
+
+    Args:
+        search_string: The string for the search (e.g., "Treatment for KRAS G13D Breast Cancer")
+        email: The email to be given to the Entrez API (e.g., "admin@website.com")
+        limit: The maximum number of new articles to fetch
+        tool_context: The context of the tool call, whose user the search is
+            saved for
+
+    Returns:
+        On success: A dictionary with the date of the last run as "last_run"
+        (None on the first run), the number of articles seen by the previous
+        runs as "previously_seen", the number of new articles as "new_count",
+        the number of them left for the next run as "remaining" and the new
+        articles as "new_articles", a list of dictionaries with the PMID as
+        "pmid" and the title, date, journal and a snippet of the abstract as
+        "article".
+        On error: A dictionary with the error as "error".
+    """
+    print(
+        f"--- Tool called: Fetching new articles for {search_string} via Pubmed API ---"
+    )
+
+    # Saved searches belong to the user, so that users of a shared server
+    # do not mark articles as seen for each other. The tool context only
+    # exposes the user through its invocation context.
+    user_id = tool_context._invocation_context.user_id if tool_context else ""
+    saved_searches = get_saved_searches()
+    saved = saved_searches.get(user_id, search_string)
+    started = time.time()
+    try:
+        if saved is None:
+            id_list = await esearch(search_string, email, UPDATES_RETMAX)
+        else:
+            id_list = await _esearch_since(
+                search_string, email, UPDATES_RETMAX, saved["last_run"]
             )
-            data = handle.read()
-            handle.close()
-            record = list(Medline.parse(StringIO(data)))
-            records.append(
-                {
-                    "pmid": id,
-                    "article": record,
-                }
+        seen = saved["pmids"] if saved else set()
+        # New articles left over by the previous run come first.
+        pending = saved["pending"] if saved else []
+        new_ids = list(
+            dict.fromkeys([*pending, *(id for id in id_list if id not in seen)])
+        )
+        records = await fetch_articles(new_ids[:limit], email) if new_ids else []
+    except ConnectionError as e:
+        return {"error": f"Error connecting to Pubmed: {e}"}
+
+    saved_searches.save(
+        user_id,
+        search_string,
+        seen | set(new_ids[:limit]),
+        pending=new_ids[limit:],
+        last_run=started,
+    )
+    return {
+        "last_run": _edat(saved["last_run"]) if saved else None,
+        "previously_seen": len(seen),
+        "new_count": len(new_ids),
+        "remaining": len(new_ids[limit:]),
+        "new_articles": project_handles(records),
+    }
+
+
+def _edat(timestamp: float) -> str:
+    return time.strftime("%Y/%m/%d", time.gmtime(timestamp))
+
+
+async def _esearch_since(
+    search_string: str, email: str, retmax: int, since: float
+) -> list[str]:
+    index = get_local_index()
+    if index is not None:
+        # The local index has no entry dates, so the caller drops seen PMIDs.
+        return await asyncio.to_thread(index.search, search_string, retmax)
+    # Entrez dates have a granularity of a day, so the day of the last run is
+    # searched again and the articles seen on it are dropped by the caller.
+    response = await eutils_request(
+        "esearch",
+        db="pubmed",
+        term=search_string,
+        datetype="edat",
+        mindate=_edat(since),
+        maxdate=_edat(time.time()),
+        retmax=retmax,
+        retmode="json",
+        email=email,
+    )
+    id_list: list[str] = response.json()["esearchresult"]["idlist"]
+    return id_list
+
+
+async def expand_pubmed_citations(
+    pmids: list[str], email: str, limit: int, hops: int = 1
+) -> list:
+    """
+    Fetches articles related to or citing given articles from pubmed.
+
+    Use it to find relevant articles a search string missed, starting from
+    the most relevant articles of a search.
+
+    Args:
+        pmids: The PMIDs of the articles to start from
+        email: The email to be given to the Entrez API (e.g., "admin@website.com")
+        limit: The maximum number of new articles to fetch
+        hops: How many links away from the given articles to look, 1 or 2
+
+    Returns:
+        On success: A list of dictionaries with the PMID as "pmid", the title,
+        date, journal and a snippet of the abstract as "article"
+        and the PMIDs of the given articles it is related to or cites as
+        "linked_from", best matches first.
+        On error: A list containing the error of the expansion, either "Error connecting to Pubmed"
+        or "Could not find any related articles"
+    """
+    print(f"--- Tool called: Fetching articles linked to {len(pmids)} articles ---")
+
+    hops = min(max(hops, 1), 2)
+    try:
+        neighbors = await expand_neighbors(
+            pmids, email, hops=hops, per_hop=max(1, limit // hops)
+        )
+        neighbors = neighbors[:limit]
+        if not neighbors:
+            return ["Could not find any related articles"]
+        records = await fetch_articles([n.pmid for n in neighbors], email)
+    except ConnectionError as e:
+        return [f"Error connecting to Pubmed: {e}"]
+
+    results = project_handles(records)
+    linked_from = {n.pmid: n.linked_from for n in neighbors}
+    for result in results:
+        result["linked_from"] = linked_from[result["pmid"]]
+    return results
+
+
+async def get_abstracts(pmids: list[str], email: str) -> list:
+    """
+    Loads the full abstracts and details of articles returned by a search tool.
+
+    The search tools only return the title and a snippet of the abstract of
+    each article. Use this tool for the articles whose full abstract you need.
+
+    Args:
+        pmids: The PMIDs of the articles
+        email: The email to be given to the Entrez API (e.g., "admin@website.com")
+
+    Returns:
+        On success: A list of dictionaries with the PMID as "pmid" and the title,
+        abstract, date, journal, MeSH terms and publication types as "article".
+        On error: A list containing the error, either "Error connecting to Pubmed"
+        or "Could not find the articles"
+    """
+    print(f"--- Tool called: Loading {len(pmids)} abstracts ---")
+
+    # The records of searched articles are read back from the record cache
+    # or the local index, and only fetched again if they were evicted.
+    try:
+        records = await fetch_articles(list(dict.fromkeys(pmids)), email)
+    except ConnectionError as e:
+        return [f"Error connecting to Pubmed: {e}"]
+    records = [record for record in records if record["article"]]
+    if not records:
+        return ["Could not find the articles"]
+    return project_articles(records)
+
+
+async def count_pubmed(
+    search_string: str, tool_context: ToolContext | None = None
+) -> dict:
+    """
+    Counts the articles matching a search_string on pubmed without fetching them.
+
+    Use it to check how broad a search string is before searching with it.
+
+    Args:
+        search_string: The string for the search (e.g., "Treatment for KRAS G13D Breast Cancer")
+        tool_context: The context of the tool call. With PUBMED_PREFETCH=1,
+            the articles of the search_string are fetched in the background
+            while the user is asked to approve it.
+
+    Returns:
+        On success: A dictionary with the number of matching articles as "count"
+        and the PMIDs and titles of the first few of them as "titles".
+        On error: A dictionary with the error as "error".
+    """
+    print(f"--- Tool called: Counting articles for {search_string} via Pubmed API ---")
+
+    index = get_local_index()
+    if index is not None:
+        id_list = await asyncio.to_thread(index.search, search_string, COUNT_TITLES)
+        records = await asyncio.to_thread(index.get_many, id_list)
+        return {
+            "count": await asyncio.to_thread(index.count, search_string),
+            "titles": [
+                {"pmid": pmid, "title": records.get(pmid, {}).get("TI", "")}
+                for pmid in id_list
+            ],
+        }
+
+    # ESearch returns the total count along with the first PMIDs, and ESummary
+    # their titles, so no Medline record is fetched.
+    try:
+        response = await eutils_request(
+            "esearch",
+            db="pubmed",
+            term=search_string,
+            retmax=COUNT_TITLES,
+            retmode="json",
+        )
+        result = response.json()["esearchresult"]
+        titles = []
+        if result["idlist"]:
+            response = await eutils_request(
+                "esummary", db="pubmed", id=",".join(result["idlist"]), retmode="json"
             )
-        except ConnectionError as e:
-            return [f"Error connecting to Pubmed: {e}"]
+            summaries = response.json()["result"]
+            titles = [
+                {"pmid": pmid, "title": summaries.get(pmid, {}).get("title", "")}
+                for pmid in result["idlist"]
+            ]
+    except ConnectionError as e:
+        return {"error": f"Error connecting to Pubmed: {e}"}
 
-        time.sleep(1)
+    if prefetch.ENABLED and tool_context is not None and titles:
+        research_question = tool_context.state.get("research_question")
+        limit = prefetch.PREFETCH_LIMIT
+        retmax = limit * RERANK_FACTOR if research_question else limit
+        prefetch.start(
+            tool_context, search_string, lambda: _prefetch(search_string, retmax)
+        )
+    return {"count": int(result["count"]), "titles": titles}
 
-    return records
+
+async def _prefetch(search_string: str, retmax: int) -> None:
+    # The user has not given their email yet, so NCBI_EMAIL is sent.
+    id_list = await esearch(search_string, EMAIL, retmax)
+    await fetch_articles(id_list, EMAIL)
+
+
+def search_pubmed_sync(
+    search_string: str,
+    email: str,
+    limit: int,
+) -> list:
+    """
+    Blocking variant of search_pubmed for scripts and notebooks.
+
+    Must not be called from a running event loop. The agent uses
+    search_pubmed, so that concurrent sessions overlap their waits
+    for the E-utilities.
+    """
+
+    async def search() -> list:
+        # The connections of the client cannot outlive the event loop.
+        try:
+            return await search_pubmed(search_string, email, limit)
+        finally:
+            await close_eutils_client()
+
+    return asyncio.run(search())
 
 
 search_agent = Agent(
     model="gemini-2.5-flash",
     name="search_agent",
     instruction=prompt.SEARCH_PROMPT,
-    tools=[search_pubmed],
+    tools=[
+        count_pubmed,
+        search_pubmed,
+        search_pubmed_multi,
+        search_more_pubmed,
+        search_pubmed_updates,
+        expand_pubmed_citations,
+        get_abstracts,
+    ],
     output_key="pubmed_results",
+    before_model_callback=[
+        compaction.compact_history,
+        telemetry.before_model_callback,
+    ],
+    after_model_callback=telemetry.after_model_callback,
+    before_tool_callback=telemetry.before_tool_callback,
+    after_tool_callback=telemetry.after_tool_callback,
 )
@@ -0,0 +1,213 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact article records sent to the model instead of full Medline records."""
+
+import json
+import os
+from dataclasses import dataclass, field
+
+# Medline tags that can be projected into an article, and their names.
+FIELDS = {
+    "TI": "title",
+    "AB": "abstract",
+    "DP": "date",
+    "JT": "journal",
+    "AU": "authors",
+    "MH": "mesh_terms",
+    "PT": "publication_types",
+    "OT": "keywords",
+}
+DEFAULT_FIELDS = ("TI", "AB", "DP", "JT", "MH", "PT")
+PUBMED_FIELDS = tuple(
+    tag.strip()
+    for tag in os.getenv("PUBMED_FIELDS", ",".join(DEFAULT_FIELDS)).split(",")
+    if tag.strip() in FIELDS
+)
+# Medline tags kept of fetched records: the projected fields and those the
+# reranking and the handles need.
+KEPT_TAGS = frozenset(("PMID", "TI", "AB", "DP", "JT", "MH", *PUBMED_FIELDS))
+
+# Maximum size in bytes of the articles returned by one tool call. Roughly
+# four bytes make up one model token.
+PAYLOAD_BUDGET = int(os.getenv("PUBMED_PAYLOAD_BUDGET", "80000"))
+BYTES_PER_TOKEN = 4
+# Abstracts are not shortened below this length to fit more articles.
+MIN_ABSTRACT = 200
+# Length of the abstract snippets returned by the search tools, 0 for the
+# full articles.
+SNIPPET_LENGTH = int(os.getenv("PUBMED_SNIPPET_LENGTH", "300"))
+
+
+def estimate_tokens(payload: object) -> int:
+    """Estimates the number of model tokens of a JSON-serializable payload."""
+    return payload_size(payload) // BYTES_PER_TOKEN
+
+
+def payload_size(payload: object) -> int:
+    """Returns the size in bytes of a payload serialized as JSON."""
+    return len(json.dumps(payload, ensure_ascii=False).encode())
+
+
+def compact_record(record: dict) -> dict:
+    """Returns a Medline record with only the tags in KEPT_TAGS."""
+    return {tag: value for tag, value in record.items() if tag in KEPT_TAGS}
+
+
+def _mesh_heading(heading: str) -> str:
+    # "Breast Neoplasms/*drug therapy/pathology" -> "Breast Neoplasms"
+    return heading.split("/")[0].lstrip("*")
+
+
+@dataclass(slots=True)
+class Article:
+    """The projected fields of a Medline record."""
+
+    pmid: str
+    title: str = ""
+    abstract: str = ""
+    date: str = ""
+    journal: str = ""
+    authors: list[str] = field(default_factory=list)
+    mesh_terms: list[str] = field(default_factory=list)
+    publication_types: list[str] = field(default_factory=list)
+    keywords: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_medline(
+        cls, pmid: str, record: dict, fields: tuple[str, ...] = PUBMED_FIELDS
+    ) -> "Article":
+        """
+        Projects a Medline record onto an article.
+
+        MeSH terms are reduced to their descriptors, without qualifiers and
+        major topic markers.
+        """
+        article = cls(pmid=pmid)
+        for tag in fields:
+            if tag not in record:
+                continue
+            value = record[tag]
+            if tag == "MH":
+                value = list(dict.fromkeys(_mesh_heading(h) for h in value))
+            setattr(article, FIELDS[tag], value)
+        return article
+
+    def to_dict(self) -> dict:
+        """Returns the non-empty fields of the article, without the PMID."""
+        result: dict = {}
+        for name in FIELDS.values():
+            value = getattr(self, name)
+            if value:
+                result[name] = value
+        return result
+
+
+def project_articles(
+    records: list,
+    fields: tuple[str, ...] = PUBMED_FIELDS,
+    budget: int = PAYLOAD_BUDGET,
+) -> list[dict]:
+    """
+    Projects fetched records onto compact articles within a byte budget.
+
+    If the articles exceed the budget, the longest abstracts are shortened
+    first, down to an equal share of the budget for every abstract, but not
+    below MIN_ABSTRACT characters. Articles that still do not fit are dropped
+    from the end of the list.
+
+    Args:
+        records: The records returned by fetch_articles
+        fields: The Medline tags to keep
+        budget: The maximum payload size in bytes, or 0 for no limit
+
+    Returns:
+        A list of dictionaries with the PMID as "pmid" and the compact article
+        as "article", in the order of records.
+    """
+    articles = [
+        Article.from_medline(
+            record["pmid"], record["article"][0] if record["article"] else {}, fields
+        )
+        for record in records
+    ]
+    results = [{"pmid": a.pmid, "article": a.to_dict()} for a in articles]
+    if not budget or payload_size(results) <= budget:
+        return results
+
+    # Shorten the longest abstracts until the payload fits or every abstract
+    # is down to an equal share of what the other fields leave of the budget.
+    size = payload_size(results)
+    excess = size - budget
+    abstracts = sum(len(article.abstract) for article in articles)
+    share = max(
+        MIN_ABSTRACT, (budget - (size - abstracts)) // len(articles) - len("...")
+    )
+    for article in sorted(articles, key=lambda a: len(a.abstract), reverse=True):
+        if excess <= 0 or len(article.abstract) <= share:
+            break
+        # Each cut saves its length minus the appended ellipsis.
+        cut = min(excess + len("..."), len(article.abstract) - share)
+        article.abstract = article.abstract[: len(article.abstract) - cut] + "..."
+        excess -= cut - len("...")
+    results = [{"pmid": a.pmid, "article": a.to_dict()} for a in articles]
+
+    while len(results) > 1 and payload_size(results) > budget:
+        results.pop()
+    return results
+
+
+def snippet(abstract: str, length: int = SNIPPET_LENGTH) -> str:
+    """
+    Returns the most telling part of an abstract, at most `length` characters.
+
+    For structured abstracts this is the start of the conclusions, otherwise
+    the start of the abstract. Longer snippets end at a word with "...".
+    """
+    for label in ("CONCLUSIONS: ", "CONCLUSION: ", "INTERPRETATION: "):
+        if label in abstract:
+            abstract = abstract.split(label, 1)[1]
+            break
+    if len(abstract) <= length:
+        return abstract
+    return abstract[:length].rsplit(" ", 1)[0] + "..."
+
+
+def project_handles(records: list, length: int = SNIPPET_LENGTH) -> list[dict]:
+    """
+    Projects fetched records onto handles of their articles.
+
+    A handle has the title, date and journal of an article and a snippet of
+    its abstract. The full articles are loaded by PMID with get_abstracts
+    when needed, so they do not stay in the conversation history.
+
+    Args:
+        records: The records returned by fetch_articles
+        length: The maximum length of the snippets, or 0 for the full articles
+
+    Returns:
+        A list of dictionaries with the PMID as "pmid" and the handle as
+        "article", in the order of records.
+    """
+    if not length:
+        return project_articles(records)
+    handles = []
+    for record in records:
+        medline = record["article"][0] if record["article"] else {}
+        article = Article.from_medline(record["pmid"], medline, ("TI", "DP", "JT"))
+        handle = article.to_dict()
+        if medline.get("AB"):
+            handle["snippet"] = snippet(medline["AB"], length)
+        handles.append({"pmid": record["pmid"], "article": handle})
+    return handles
@@ -0,0 +1,156 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Expansion of search results to related and citing articles with ELink."""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+
+from ...shared_libraries.eutils import eutils_request
+
+# Related articles, scored by similarity, and articles citing an article.
+RELATED = "pubmed_pubmed"
+CITED_IN = "pubmed_pubmed_citedin"
+LINK_NAMES = (RELATED, CITED_IN)
+# Number of PMIDs sent in a single ELink call.
+ELINK_BATCH_SIZE = int(os.getenv("PUBMED_ELINK_BATCH_SIZE", "100"))
+# Neighbors must score at least this much to be kept.
+MIN_SCORE = 0.5
+
+
+@dataclass(slots=True)
+class Neighbor:
+    """An article linked to the articles of a search."""
+
+    pmid: str
+    score: float = 0.0
+    hop: int = 1
+    # The PMIDs of the articles the neighbor is related to or cites.
+    linked_from: list[str] = field(default_factory=list)
+
+
+async def elink(
+    pmids: list[str], link_name: str, email: str, batch_size: int = ELINK_BATCH_SIZE
+) -> dict[str, list[tuple[str, int]]]:
+    """
+    Returns the linked PMIDs of articles with batched ELink calls.
+
+    Every PMID of a batch is sent as its own id parameter, so NCBI answers
+    with one link set per PMID instead of their merged links.
+
+    Args:
+        pmids: The PMIDs to link from
+        link_name: The link to follow, e.g. "pubmed_pubmed"
+        email: The email to be given to the Entrez API
+        batch_size: The maximum number of PMIDs sent in a single ELink call
+
+    Returns:
+        The linked PMIDs and their scores by PMID, best score first. Links
+        without a score, like citations, score 0.
+    """
+
+    async def batch_links(batch: list[str]) -> dict[str, list[tuple[str, int]]]:
+        response = await eutils_request(
+            "elink",
+            dbfrom="pubmed",
+            db="pubmed",
+            linkname=link_name,
+            cmd="neighbor_score" if link_name == RELATED else "neighbor",
+            id=batch,
+            retmode="json",
+            email=email,
+        )
+        links: dict[str, list[tuple[str, int]]] = {}
+        for linkset in response.json().get("linksets", []):
+            for pmid in linkset.get("ids", []):
+                for linksetdb in linkset.get("linksetdbs", []):
+                    for link in linksetdb.get("links", []):
+                        if isinstance(link, dict):
+                            links.setdefault(str(pmid), []).append(
+                                (str(link["id"]), int(link.get("score", 0)))
+                            )
+                        else:
+                            links.setdefault(str(pmid), []).append((str(link), 0))
+        return links
+
+    results: dict[str, list[tuple[str, int]]] = {}
+    for links in await asyncio.gather(
+        *(
+            batch_links(pmids[start : start + batch_size])
+            for start in range(0, len(pmids), batch_size)
+        )
+    ):
+        results.update(links)
+    return results
+
+
+async def expand_neighbors(
+    seeds: list[str],
+    email: str,
+    hops: int = 1,
+    per_hop: int = 20,
+    link_names: tuple[str, ...] = LINK_NAMES,
+    min_score: float = MIN_SCORE,
+) -> list[Neighbor]:
+    """
+    Finds related and citing articles in a bounded breadth-first expansion.
+
+    Each hop links from the articles found by the previous hop (the seeds
+    first) with one batched ELink call per link name. A neighbor scores the
+    sum of its links: a related article its similarity relative to the best
+    related article of the same source, a citing article 1. Only the best
+    `per_hop` neighbors scoring at least `min_score` are kept and linked
+    from in the next hop.
+
+    Args:
+        seeds: The PMIDs to expand, e.g. those of a search
+        email: The email to be given to the Entrez API
+        hops: The maximum number of hops
+        per_hop: The maximum number of new articles per hop
+        link_names: The links to follow
+        min_score: The minimum score of a neighbor
+
+    Returns:
+        The neighbors by hop and descending score, without the seeds.
+    """
+    seen = set(seeds)
+    frontier = list(dict.fromkeys(seeds))
+    found: list[Neighbor] = []
+    for hop in range(1, hops + 1):
+        if not frontier:
+            break
+        linked = await asyncio.gather(
+            *(elink(frontier, link_name, email) for link_name in link_names)
+        )
+        candidates: dict[str, Neighbor] = {}
+        for link_name, links in zip(link_names, linked, strict=True):
+            for source, neighbors in links.items():
+                # Related articles include the source itself with the best score.
+                best = max((score for _, score in neighbors), default=0) or 1
+                for pmid, score in neighbors:
+                    if pmid in seen:
+                        continue
+                    neighbor = candidates.setdefault(pmid, Neighbor(pmid, hop=hop))
+                    neighbor.score += score / best if link_name == RELATED else 1.0
+                    if source not in neighbor.linked_from:
+                        neighbor.linked_from.append(source)
+        ranked = sorted(
+            (n for n in candidates.values() if n.score >= min_score),
+            key=lambda n: -n.score,
+        )[:per_hop]
+        found.extend(ranked)
+        frontier = [neighbor.pmid for neighbor in ranked]
+        seen.update(frontier)
+    return found
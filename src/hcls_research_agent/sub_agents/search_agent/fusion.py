@@ -0,0 +1,56 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Merging of the ranked PMIDs of several search strings."""
+
+from dataclasses import dataclass, field
+
+# Damping constant of reciprocal rank fusion. Larger values give lower ranks
+# more weight compared to the top ranks.
+RRF_K = 60
+
+
+@dataclass(slots=True)
+class FusedHit:
+    """A PMID found by one or more search strings."""
+
+    pmid: str
+    score: float = 0.0
+    # The search strings that found the PMID, with its 1-based rank in each.
+    queries: dict[str, int] = field(default_factory=dict)
+
+
+def fuse_rankings(rankings: dict[str, list[str]], k: int = RRF_K) -> list[FusedHit]:
+    """
+    Merges the PMIDs of several searches by reciprocal rank fusion.
+
+    Every PMID scores the sum of 1 / (k + rank) over the searches that found
+    it, so PMIDs found by several search strings, or ranked high by one of
+    them, come first.
+
+    Args:
+        rankings: The PMIDs returned by ESearch, by search string
+        k: The damping constant
+
+    Returns:
+        The unique PMIDs by descending score. Ties keep the order in which the
+        PMIDs were first found.
+    """
+    hits: dict[str, FusedHit] = {}
+    for query, id_list in rankings.items():
+        for rank, pmid in enumerate(dict.fromkeys(id_list), start=1):
+            hit = hits.setdefault(pmid, FusedHit(pmid))
+            hit.score += 1 / (k + rank)
+            hit.queries[query] = rank
+    return sorted(hits.values(), key=lambda hit: -hit.score)
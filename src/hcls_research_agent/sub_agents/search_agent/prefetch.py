@@ -0,0 +1,118 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Speculative prefetch of the search string proposed to the user.
+
+The search agent proposes a search string after counting its articles and
+only searches once the user approved it and gave their email. With
+PUBMED_PREFETCH=1, the ESearch and EFetch of the proposed search string run
+in the background meanwhile and fill the query and record caches, so the
+search after the approval is answered from the caches. Proposing another
+search string cancels the prefetch of the previous one.
+"""
+
+import asyncio
+import os
+import uuid
+from collections.abc import Callable, Coroutine
+
+from google.adk.tools import ToolContext
+
+from ...shared_libraries import telemetry
+from ...shared_libraries.query_cache import normalize_query
+
+# Set PUBMED_PREFETCH=1 to prefetch proposed search strings.
+ENABLED = os.getenv("PUBMED_PREFETCH", "0") == "1"
+# The limit the prefetch expects the search to use. Searches with a smaller
+# limit are answered from the prefetched results as well.
+PREFETCH_LIMIT = int(os.getenv("PUBMED_PREFETCH_LIMIT", "20"))
+# Session state key of the ID of the prefetch of a session.
+PREFETCH_KEY = "pubmed_prefetch"
+
+# The running prefetches by ID, with their normalized search string.
+_running: dict[str, tuple[str, asyncio.Task]] = {}
+
+
+def start(
+    tool_context: ToolContext,
+    search_string: str,
+    fetch: Callable[[], Coroutine[object, object, object]],
+) -> None:
+    """
+    Starts the prefetch of a proposed search string in the background.
+
+    A running prefetch of the session for another search string is cancelled.
+
+    Args:
+        tool_context: The context of the tool that proposed the search string
+        search_string: The proposed search string
+        fetch: Returns the coroutine searching and fetching the articles
+    """
+    key = normalize_query(search_string)
+    prefetch_id = tool_context.state.get(PREFETCH_KEY)
+    running = _running.get(prefetch_id) if prefetch_id else None
+    if running is not None:
+        if running[0] == key:
+            return
+        cancel(tool_context)
+    prefetch_id = uuid.uuid4().hex
+    tool_context.state[PREFETCH_KEY] = prefetch_id
+    task = asyncio.create_task(fetch())
+    _running[prefetch_id] = (key, task)
+    task.add_done_callback(lambda task: _finished(prefetch_id, task))
+    telemetry.metrics.inc("hcls_prefetch_total", result="started")
+
+
+def _finished(prefetch_id: str, task: asyncio.Task) -> None:
+    _running.pop(prefetch_id, None)
+    # A failed prefetch is searched again by the search tool, which reports
+    # the error to the user.
+    if not task.cancelled() and task.exception() is not None:
+        telemetry.metrics.inc("hcls_prefetch_total", result="failed")
+
+
+def cancel(tool_context: ToolContext) -> None:
+    """Cancels the running prefetch of a session, if any."""
+    prefetch_id = tool_context.state.get(PREFETCH_KEY)
+    running = _running.pop(prefetch_id, None) if prefetch_id else None
+    if running is not None:
+        running[1].cancel()
+        telemetry.metrics.inc("hcls_prefetch_total", result="cancelled")
+
+
+async def join(tool_context: ToolContext | None, *search_strings: str) -> None:
+    """
+    Waits for the running prefetch of a search before it is searched.
+
+    The search then finds the prefetched results in the caches instead of
+    sending the same requests again. A prefetch of another search string is
+    cancelled.
+
+    Args:
+        tool_context: The context of the search tool
+        *search_strings: The search strings of the search
+    """
+    if tool_context is None:
+        return
+    prefetch_id = tool_context.state.get(PREFETCH_KEY)
+    running = _running.get(prefetch_id) if prefetch_id else None
+    if running is None:
+        return
+    if running[0] not in {normalize_query(s) for s in search_strings}:
+        cancel(tool_context)
+        return
+    # Cancelling the search must not cancel the prefetch it waits for.
+    await asyncio.wait([running[1]])
+    telemetry.metrics.inc("hcls_prefetch_total", result="joined")
@@ -0,0 +1,143 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""BM25 reranking of fetched records against the research question."""
+
+import os
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Searches fetch this many times `limit` articles and keep the best `limit`,
+# 1 keeps the order of PubMed.
+RERANK_FACTOR = int(os.getenv("PUBMED_RERANK_FACTOR", "5"))
+K1 = 1.5
+B = 0.75
+
+_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "about",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "can",
+        "do",
+        "does",
+        "for",
+        "from",
+        "how",
+        "in",
+        "into",
+        "is",
+        "it",
+        "its",
+        "of",
+        "on",
+        "or",
+        "over",
+        "such",
+        "than",
+        "that",
+        "the",
+        "their",
+        "these",
+        "this",
+        "to",
+        "was",
+        "were",
+        "what",
+        "when",
+        "which",
+        "while",
+        "who",
+        "why",
+        "with",
+        "within",
+        "without",
+    }
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Returns the lowercase words of a text without stopwords."""
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def _document(record: dict) -> str:
+    medline = record["article"][0] if record["article"] else {}
+    mesh = " ".join(
+        heading.split("/")[0].lstrip("*") for heading in medline.get("MH", [])
+    )
+    return " ".join((medline.get("TI", ""), medline.get("AB", ""), mesh))
+
+
+def bm25_scores(
+    query: str, documents: list[str], k1: float = K1, b: float = B
+) -> "np.ndarray":
+    """
+    Scores documents against a query with Okapi BM25.
+
+    Only the query terms are counted, so the term matrix has one column per
+    distinct query term and the scoring is a handful of array operations.
+
+    Returns:
+        The scores of the documents, in their order.
+    """
+    # numpy is imported on first use to keep it out of the cold start.
+    import numpy as np
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or not documents:
+        return np.zeros(len(documents))
+    column = {term: i for i, term in enumerate(terms)}
+    tf = np.zeros((len(documents), len(terms)))
+    lengths = np.zeros(len(documents))
+    for row, document in enumerate(documents):
+        words = tokenize(document)
+        lengths[row] = len(words)
+        for word in words:
+            if (i := column.get(word)) is not None:
+                tf[row, i] += 1
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    scores: np.ndarray = (idf * tf * (k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+    return scores
+
+
+def rerank(records: list, query: str, top_k: int) -> list:
+    """
+    Returns the top_k records best matching a query by BM25.
+
+    The title, abstract and MeSH descriptors of the records are scored.
+    Records with equal scores keep their order.
+
+    Args:
+        records: The records returned by fetch_articles
+        query: The text to match, e.g. the research question
+        top_k: The number of records to keep
+    """
+    import numpy as np
+
+    scores = bm25_scores(query, [_document(record) for record in records])
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [records[i] for i in order]
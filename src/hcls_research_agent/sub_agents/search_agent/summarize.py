@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Map step of the map-reduce summarization of large result sets.
+
+Instead of every abstract, the search tools return one PMID-cited summary
+per batch of articles, written by concurrent model calls. The search agent
+then reduces the batch summaries into its final summary.
+"""
+
+import asyncio
+import json
+import os
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai.errors import APIError
+from google.genai.types import Content, GenerateContentConfig, Part
+
+from ...shared_libraries import telemetry
+from . import prompt
+from .articles import project_articles
+
+SUMMARY_MODEL = os.getenv("PUBMED_SUMMARY_MODEL", "gemini-2.5-flash")
+# Results with more articles than this are summarized in batches, 0 never.
+MAP_REDUCE_THRESHOLD = int(os.getenv("PUBMED_MAP_REDUCE_THRESHOLD", "20"))
+# Number of articles summarized by one model call.
+SUMMARY_BATCH_SIZE = int(os.getenv("PUBMED_SUMMARY_BATCH_SIZE", "10"))
+# Maximum number of batches summarized at the same time.
+SUMMARY_CONCURRENCY = int(os.getenv("PUBMED_SUMMARY_CONCURRENCY", "4"))
+
+
+async def summarize_batch(
+    model: Gemini, articles: list[dict], research_question: str = ""
+) -> str:
+    """
+    Summarizes a batch of projected articles with one model call.
+
+    Args:
+        model: The model writing the summary
+        articles: Articles as returned by project_articles
+        research_question: The research question the summary should focus on
+
+    Returns:
+        The summary, citing the PMIDs of the articles in brackets.
+    """
+    llm_request = LlmRequest(
+        model=model.model,
+        contents=[
+            Content(
+                role="user",
+                parts=[
+                    Part(
+                        text=prompt.SUMMARY_BATCH_PROMPT.format(
+                            research_question=research_question or "(not given)",
+                            articles=json.dumps(articles, ensure_ascii=False),
+                        )
+                    )
+                ],
+            )
+        ],
+        config=GenerateContentConfig(),
+    )
+    pending = telemetry.start_model_call("search_agent.summarize", llm_request)
+    text = ""
+    final = LlmResponse()
+    try:
+        async for llm_response in model.generate_content_async(llm_request):
+            final = llm_response
+            if llm_response.content and llm_response.content.parts:
+                text = "".join(part.text or "" for part in llm_response.content.parts)
+    finally:
+        telemetry.finish_model_call(pending, final)
+    return text.strip()
+
+
+async def summarize_records(
+    records: list,
+    research_question: str = "",
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    concurrency: int = SUMMARY_CONCURRENCY,
+    model: Gemini | None = None,
+) -> list[dict]:
+    """
+    Summarizes fetched records in batches with concurrent model calls.
+
+    A batch whose summary fails is returned as its articles instead, so no
+    result is lost.
+
+    Args:
+        records: The records returned by fetch_articles
+        research_question: The research question the summaries should focus on
+        batch_size: The number of articles summarized by one model call
+        concurrency: The maximum number of model calls at the same time
+        model: The model writing the summaries, SUMMARY_MODEL by default
+
+    Returns:
+        A list of dictionaries with the PMIDs of a batch as "pmids" and either
+        their summary as "summary" or their articles as "articles", in the
+        order of records.
+    """
+    model = model or Gemini(model=SUMMARY_MODEL)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def summarize(batch: list) -> dict:
+        articles = project_articles(batch)
+        pmids = [article["pmid"] for article in articles]
+        async with semaphore:
+            try:
+                summary = await summarize_batch(model, articles, research_question)
+            except (APIError, ConnectionError) as e:
+                print(f"--- Could not summarize articles {pmids}: {e} ---")
+                return {"pmids": pmids, "articles": articles}
+        return {"pmids": pmids, "summary": summary}
+
+    batches = [
+        records[start : start + batch_size]
+        for start in range(0, len(records), max(1, batch_size))
+    ]
+    return list(await asyncio.gather(*(summarize(batch) for batch in batches)))
@@ -0,0 +1,81 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Warmup of the agents after a cold start.
+
+Modules only needed once a search runs are imported lazily, so that the
+agents load fast. With WARMUP=1, loading the agents also imports those
+modules, creates the SSL context of the E-utilities and, if an event loop
+is running, opens a keep-alive connection to them in the background, so
+the first search does not pay for any of it.
+"""
+
+import asyncio
+import importlib
+import os
+
+import httpx
+
+from .shared_libraries import eutils
+
+# Set WARMUP=1 to warm up when the agents are loaded, e.g. on Cloud Run.
+ENABLED = os.getenv("WARMUP", "0") == "1"
+# Modules the search tools import on first use.
+LAZY_MODULES = ("Bio.Medline", "numpy")
+
+# Keeps the connection tasks from being garbage collected while they run.
+_tasks: set[asyncio.Task] = set()
+
+
+def preload() -> None:
+    """Imports the lazily imported modules and creates the SSL context."""
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    eutils.ssl_context()
+
+
+async def connect() -> bool:
+    """
+    Opens a keep-alive connection to the E-utilities for the running event loop.
+
+    Sends a small EInfo request through the rate limiter, so that DNS, TCP
+    and TLS are set up before the first search.
+
+    Returns:
+        Whether the E-utilities could be reached.
+    """
+    try:
+        await eutils.eutils_request("einfo", retmode="json")
+    except (ConnectionError, httpx.HTTPError):
+        return False
+    return True
+
+
+def warmup() -> None:
+    """
+    Preloads modules and the SSL context, and connects in the background.
+
+    The connection is only opened if an event loop is running, like when a
+    server loads the agents on its first request, because connections belong
+    to the loop that opened them.
+    """
+    preload()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(connect())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,25 @@
+import json
+import os
+import pathlib
+from collections.abc import Callable
+
+import pytest
+
+REPORT_DIR = pathlib.Path(
+    os.getenv(
+        "BENCHMARK_REPORT_DIR", pathlib.Path(__file__).parents[2] / "bench_output"
+    )
+)
+
+
+@pytest.fixture
+def benchmark_report(request: pytest.FixtureRequest) -> Callable[[dict], None]:
+    """Writes a machine-readable benchmark report named after the test."""
+
+    def write(report: dict) -> None:
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        path = REPORT_DIR / f"{request.node.name}.json"
+        path.write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"\n{request.node.name}: {json.dumps(report, sort_keys=True)}")
+
+    return write
@@ -0,0 +1,188 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers for driving and measuring the agents in benchmarks."""
+
+import asyncio
+import contextlib
+import re
+import resource
+import statistics
+import sys
+import time
+from collections.abc import AsyncIterator
+from typing import Self
+from unittest.mock import patch
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai.types import Content, FunctionCall, Part
+
+_AGENT_NAME = re.compile(r'Your internal name is "([^"]+)"')
+TOPIC = "Research topic: "
+
+
+def percentile(values: list[float], q: int) -> float:
+    """Returns the q-th percentile of the values."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def summarize(values: list[float]) -> dict:
+    """Returns the p50, p95, p99 and maximum of latencies in seconds."""
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of the process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task sleeping `interval`
+    seconds, which is how long it is blocked by synchronous work.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - start - self.interval)
+
+    async def __aenter__(self) -> Self:
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+def _call(name: str, **args: object) -> LlmResponse:
+    return LlmResponse(
+        content=Content(
+            role="model", parts=[Part(function_call=FunctionCall(name=name, args=args))]
+        )
+    )
+
+
+def _text(text: str) -> LlmResponse:
+    return LlmResponse(content=Content(role="model", parts=[Part(text=text)]))
+
+
+class ScriptedLlm:
+    """
+    Stands in for Gemini with the answers of a scripted research session.
+
+    The answer depends on the agent, found in the system instruction, and on
+    the last user message: the root agent hands over to the
+    research_question_agent, which hands over to the search_agent when asked
+    to "search PubMed". The search_agent counts the hits of the topic, searches
+    PubMed once the user gives an email and hands over to the
+    hypothesis_agent when asked for hypotheses. Tool results are answered
+    with a short summary. Every answer takes `latency` seconds.
+
+    The topic is the text after "Research topic: " in the first message and
+    is used as the search string.
+    """
+
+    def __init__(self, latency: float = 0.0, limit: int = 20) -> None:
+        self.latency = latency
+        self.limit = limit
+        self.calls = 0
+
+    def patch(self) -> contextlib.AbstractContextManager:
+        """Returns a patch of google.adk.models.Gemini answering from the script."""
+        scripted = self
+
+        async def generate_content_async(
+            gemini: object, llm_request: LlmRequest, stream: bool = False
+        ) -> AsyncIterator[LlmResponse]:
+            del gemini, stream
+            scripted.calls += 1
+            await asyncio.sleep(scripted.latency)
+            yield scripted.answer(llm_request)
+
+        return patch(
+            "google.adk.models.Gemini.generate_content_async",
+            new=generate_content_async,
+        )
+
+    def answer(self, llm_request: LlmRequest) -> LlmResponse:
+        """Returns the scripted answer to a request."""
+        instruction = str(llm_request.config.system_instruction or "")
+        match = _AGENT_NAME.search(instruction)
+        agent = match.group(1) if match else ""
+        contents = llm_request.contents
+        last = (contents[-1].parts or []) if contents else []
+        if any(part.function_response for part in last):
+            name = next(p.function_response.name for p in last if p.function_response)
+            return _text(f"I have successfully completed my search. ({name})")
+
+        # Events of other agents are passed on as user messages "For context:".
+        texts = [
+            part.text
+            for content in contents
+            if content.role == "user"
+            for part in content.parts or []
+            if part.text and not part.text.startswith("For context:")
+        ]
+        message = texts[-1].lower() if texts else ""
+        topic = next(
+            (text.split(TOPIC, 1)[1].strip() for text in texts if TOPIC in text), ""
+        )
+        if agent == "hcls_research_agent":
+            return _call("transfer_to_agent", agent_name="research_question_agent")
+        if agent == "research_question_agent":
+            if "search pubmed" in message:
+                return _call("transfer_to_agent", agent_name="search_agent")
+            return _text(
+                f"Research question: What is known about {topic}?"
+                " This is an excellent research question!"
+            )
+        if agent == "search_agent":
+            if "hypothes" in message:
+                return _call("transfer_to_agent", agent_name="hypothesis_agent")
+            if "@" in message:
+                email = next(word for word in message.split() if "@" in word)
+                return _call(
+                    "search_pubmed",
+                    search_string=topic,
+                    email=email,
+                    limit=self.limit,
+                )
+            return _call("count_pubmed", search_string=topic)
+        return _text(f"Hypothesis 1: {topic} matters.")
+
+
+# The user messages of one scripted research session, after the first one
+# giving the topic.
+FOLLOW_UPS = (
+    "Looks good, please search PubMed for it.",
+    "I agree with the search string, my email is bench@example.com",
+    "Please create hypotheses.",
+)
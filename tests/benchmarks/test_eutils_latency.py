@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the end-to-end latency of the PubMed search tool."""
+
+import asyncio
+import time
+
+import pytest
+from fake_eutils import FakeEutilsServer
+
+from agents.hcls_research_agent.shared_libraries import eutils
+from agents.hcls_research_agent.shared_libraries.query_cache import get_query_cache
+from agents.hcls_research_agent.shared_libraries.rate_limiter import NcbiRateLimiter
+from agents.hcls_research_agent.shared_libraries.record_cache import get_record_cache
+from agents.hcls_research_agent.sub_agents.search_agent.agent import (
+    search_pubmed,
+)
+
+from .harness import percentile
+
+# NCBI-like conditions: 100-200 ms per request, 2% throttled requests and
+# the quota of an API key.
+LATENCY = 0.15
+JITTER = 0.05
+ERROR_RATE = 0.02
+RATE_LIMIT = 10
+SEARCHES = 12
+CONCURRENCY = 4
+LIMIT = 20
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_search_pubmed_latency(benchmark_report, monkeypatch):
+    """
+    Measures the latency and throughput of search_pubmed with cold
+    caches against the fake E-utilities, sequentially and concurrently.
+    """
+    monkeypatch.setenv("PUBMED_CACHE_PATH", "")
+    monkeypatch.setenv("PUBMED_QUERY_CACHE_TTL", "0")
+    get_record_cache.cache_clear()
+    get_query_cache.cache_clear()
+
+    server = FakeEutilsServer.from_fixtures(
+        latency=LATENCY, jitter=JITTER, error_rate=ERROR_RATE, rate_limit=RATE_LIMIT
+    )
+    terms = [term for term, ids in server.searches.items() if ids]
+    with server:
+        monkeypatch.setattr(eutils, "EUTILS_URL", server.url)
+        monkeypatch.setattr(
+            eutils, "ncbi_rate_limiter", NcbiRateLimiter(rate=RATE_LIMIT)
+        )
+
+        async def search(i: int) -> float:
+            start = time.perf_counter()
+            articles = await search_pubmed(
+                terms[i % len(terms)], "bench@example.com", LIMIT
+            )
+            assert "pmid" in articles[0]
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        sequential = [await search(i) for i in range(SEARCHES)]
+        sequential_seconds = time.perf_counter() - start
+
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def bounded(i: int) -> float:
+            async with semaphore:
+                return await search(i)
+
+        start = time.perf_counter()
+        concurrent = await asyncio.gather(*(bounded(i) for i in range(SEARCHES)))
+        concurrent_seconds = time.perf_counter() - start
+
+    benchmark_report(
+        {
+            "searches": SEARCHES,
+            "limit": LIMIT,
+            "latency": LATENCY,
+            "jitter": JITTER,
+            "error_rate": ERROR_RATE,
+            "rate_limit": RATE_LIMIT,
+            "sequential_p50": percentile(sequential, 50),
+            "sequential_p95": percentile(sequential, 95),
+            "sequential_searches_per_second": SEARCHES / sequential_seconds,
+            "concurrency": CONCURRENCY,
+            "concurrent_p50": percentile(concurrent, 50),
+            "concurrent_p95": percentile(concurrent, 95),
+            "concurrent_searches_per_second": SEARCHES / concurrent_seconds,
+            "requests": len(server.requests),
+            "throttled": server.throttled,
+        }
+    )
@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the time it takes to import the agents on a cold start."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+PACKAGE = "agents.hcls_research_agent"
+# The frameworks every agent needs are imported first, so that only the
+# import time of the agents themselves is measured against the budget.
+FRAMEWORKS = ("google.adk.agents", "google.adk.runners", "google.genai.types")
+BUDGET_MS = float(os.getenv("BENCHMARK_IMPORT_BUDGET_MS", "100"))
+# Modules the agents import on first use, see warmup.LAZY_MODULES.
+LAZY_MODULES = ("Bio", "numpy")
+RUNS = 3
+
+
+def import_times() -> dict[str, float]:
+    """Returns the cumulative import time in ms by module of a fresh interpreter."""
+    imports = "; ".join(f"import {module}" for module in (*FRAMEWORKS, PACKAGE))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", imports],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.benchmark
+def test_import_time(benchmark_report):
+    """
+    Tests that importing the agents stays within BENCHMARK_IMPORT_BUDGET_MS
+    on top of the frameworks and leaves the lazily imported modules out.
+    """
+    runs = [import_times() for _ in range(RUNS)]
+    package_ms = min(run[PACKAGE] for run in runs)
+    slowest = sorted(
+        (
+            (module, ms)
+            for module, ms in runs[-1].items()
+            if module.startswith(f"{PACKAGE}.")
+        ),
+        key=lambda item: -item[1],
+    )[:5]
+
+    benchmark_report(
+        {
+            "package_ms": package_ms,
+            "budget_ms": BUDGET_MS,
+            "slowest_modules_ms": dict(slowest),
+        }
+    )
+    eager = [module for module in runs[-1] if module.split(".")[0] in LAZY_MODULES]
+    assert not eager, f"imported at startup: {eager}"
+    assert package_ms <= BUDGET_MS
@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Load test of the agent tree with concurrent research sessions."""
+
+import asyncio
+import os
+import time
+
+import pytest
+from fake_eutils import FakeEutilsServer
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+from agents.hcls_research_agent.agent import root_agent
+from agents.hcls_research_agent.shared_libraries import eutils
+from agents.hcls_research_agent.shared_libraries.rate_limiter import NcbiRateLimiter
+
+from .harness import (
+    FOLLOW_UPS,
+    TOPIC,
+    EventLoopLagMonitor,
+    ScriptedLlm,
+    peak_rss_mb,
+    summarize,
+)
+
+# Number of concurrent sessions, and seconds every model call takes.
+SESSIONS = int(os.getenv("BENCHMARK_SESSIONS", "20"))
+MODEL_LATENCY = float(os.getenv("BENCHMARK_MODEL_LATENCY", "0.2"))
+# Conditions of the fake PubMed: an API key quota and 100-200 ms per request.
+RATE_LIMIT = 10
+EUTILS_LATENCY = 0.15
+EUTILS_JITTER = 0.05
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_concurrent_sessions(benchmark_report, monkeypatch):
+    """
+    Runs SESSIONS concurrent research sessions (research question, search,
+    hypotheses) through the root agent with a scripted model and a fake
+    PubMed, and reports turn latencies, throughput, event loop lag and peak
+    memory.
+    """
+    server = FakeEutilsServer.from_fixtures(
+        latency=EUTILS_LATENCY, jitter=EUTILS_JITTER, rate_limit=RATE_LIMIT
+    )
+    topics = [term for term, ids in server.searches.items() if ids]
+    session_service = InMemorySessionService()
+    runner = Runner(
+        agent=root_agent, app_name="load_test", session_service=session_service
+    )
+    model = ScriptedLlm(latency=MODEL_LATENCY)
+    turns: list[float] = []
+    errors: list[str] = []
+
+    async def research_session(i: int) -> None:
+        session = await session_service.create_session(
+            app_name="load_test", user_id=f"user_{i}"
+        )
+        messages = (f"{TOPIC}{topics[i % len(topics)]}", *FOLLOW_UPS)
+        for message in messages:
+            start = time.perf_counter()
+            async for event in runner.run_async(
+                user_id=session.user_id,
+                session_id=session.id,
+                new_message=Content(role="user", parts=[Part(text=message)]),
+            ):
+                if event.error_message:
+                    errors.append(event.error_message)
+            turns.append(time.perf_counter() - start)
+
+    with server, model.patch():
+        monkeypatch.setattr(eutils, "EUTILS_URL", server.url)
+        monkeypatch.setattr(
+            eutils, "ncbi_rate_limiter", NcbiRateLimiter(rate=RATE_LIMIT)
+        )
+        async with EventLoopLagMonitor() as monitor:
+            start = time.perf_counter()
+            await asyncio.gather(*(research_session(i) for i in range(SESSIONS)))
+            seconds = time.perf_counter() - start
+
+    benchmark_report(
+        {
+            "sessions": SESSIONS,
+            "model_latency": MODEL_LATENCY,
+            "turns": len(turns),
+            "turn_latency": summarize(turns),
+            "turns_per_second": len(turns) / seconds,
+            "sessions_per_second": SESSIONS / seconds,
+            "event_loop_lag": summarize(monitor.lags),
+            "peak_rss_mb": peak_rss_mb(),
+            "model_calls": model.calls,
+            "eutils_requests": len(server.requests),
+            "eutils_throttled": server.throttled,
+            "errors": len(errors),
+        }
+    )
+
+    assert not errors
+    assert server.count("efetch") > 0
@@ -0,0 +1,80 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the search_pubmed payload that is sent to the model."""
+
+import io
+import json
+import os
+import time
+
+import pytest
+from Bio import Medline
+from fake_eutils import medline_record
+
+from agents.hcls_research_agent.sub_agents.search_agent.articles import (
+    estimate_tokens,
+    payload_size,
+    project_articles,
+)
+
+ARTICLES = 20
+
+
+async def model_latency(payload: list) -> float:
+    """Returns the seconds Gemini takes to summarize a payload."""
+    from google import genai
+
+    client = genai.Client()
+    start = time.perf_counter()
+    await client.aio.models.generate_content(
+        model="gemini-2.5-flash",
+        contents="Summarize the key findings of these articles:\n"
+        + json.dumps(payload),
+    )
+    return time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_compact_articles_payload(benchmark_report):
+    """
+    Compares the full Medline payload with the compact article payload.
+
+    Set BENCHMARK_LIVE_MODEL=1 with Gemini credentials to also measure the
+    model latency per article.
+    """
+    full = [
+        {
+            "pmid": str(pmid),
+            "article": [Medline.read(io.StringIO(medline_record(str(pmid))))],
+        }
+        for pmid in range(40000000, 40000000 + ARTICLES)
+    ]
+    compact = project_articles(full, budget=0)
+
+    report = {
+        "articles": ARTICLES,
+        "full_bytes": payload_size(full),
+        "compact_bytes": payload_size(compact),
+        "full_tokens": estimate_tokens(full),
+        "compact_tokens": estimate_tokens(compact),
+    }
+    report["reduction"] = 1 - report["compact_bytes"] / report["full_bytes"]
+    if os.getenv("BENCHMARK_LIVE_MODEL"):
+        report["full_latency_per_article"] = await model_latency(full) / ARTICLES
+        report["compact_latency_per_article"] = await model_latency(compact) / ARTICLES
+    benchmark_report(report)
+
+    assert report["compact_bytes"] < report["full_bytes"]
@@ -1,7 +1,21 @@
 import pathlib
+from collections.abc import Iterator
 
 import dotenv
 import pytest
+from fake_eutils import FakeEutilsServer
+
+from agents.hcls_research_agent.shared_libraries import eutils
+from agents.hcls_research_agent.shared_libraries.local_index import get_local_index
+from agents.hcls_research_agent.shared_libraries.query_cache import get_query_cache
+from agents.hcls_research_agent.shared_libraries.record_cache import get_record_cache
+from agents.hcls_research_agent.shared_libraries.rate_limiter import NcbiRateLimiter
+from agents.hcls_research_agent.shared_libraries.saved_searches import (
+    get_saved_searches,
+)
+from agents.hcls_research_agent.shared_libraries.response_cache import (
+    get_response_cache,
+)
 
 
 def pytest_configure(config: pytest.Config) -> None:
@@ -10,3 +24,44 @@ def pytest_configure(config: pytest.Config) -> None:
     # Load environment variables for tests
     dotEnvFilename = pathlib.Path(__file__).parent.parent / ".env"
     _ = dotenv.load_dotenv(dotEnvFilename)
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> Iterator[None]:
+    """
+    Gives every test its own, empty PubMed record and query caches and saved
+    searches, searches the E-utilities rather than a local index and does not
+    cache model responses.
+    """
+    monkeypatch.setenv("PUBMED_CACHE_PATH", str(tmp_path / "pubmed.db"))
+    monkeypatch.setenv(
+        "PUBMED_SAVED_SEARCHES_PATH", str(tmp_path / "saved-searches.db")
+    )
+    monkeypatch.delenv("PUBMED_BACKEND", raising=False)
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    getters = (
+        get_record_cache,
+        get_query_cache,
+        get_local_index,
+        get_response_cache,
+        get_saved_searches,
+    )
+    for getter in getters:
+        getter.cache_clear()
+    yield
+    for getter in getters:
+        getter.cache_clear()
+
+
+@pytest.fixture
+def fake_eutils(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeEutilsServer]:
+    """Points the E-utilities requests at a local fake server without rate limit."""
+    searches = {
+        "KRAS G13D": ["39120576", "38000001", "40470107", "38000002", "39921935"]
+    }
+    with FakeEutilsServer(searches) as server:
+        monkeypatch.setattr(eutils, "EUTILS_URL", server.url)
+        monkeypatch.setattr(eutils, "ncbi_rate_limiter", NcbiRateLimiter(rate=1000))
+        yield server
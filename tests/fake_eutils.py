@@ -0,0 +1,433 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local stand-in for the NCBI E-utilities used by the tests and benchmarks.
+
+It can also be run on its own, so that the agent can be run and measured
+offline by pointing NCBI_EUTILS_URL at it:
+
+    python tests/fake_eutils.py serve --port 8765 --latency 0.2 --jitter 0.1
+    NCBI_EUTILS_URL=http://127.0.0.1:8765/ make web
+
+Fixtures are read from a directory with a searches.json file mapping search
+terms to PMIDs, a links.json file mapping link names to the scored
+neighbors of PMIDs, and Medline records in medline/<PMID>.txt. PMIDs
+without a recorded record are served a synthetic one. Fixtures can be
+recorded from the real E-utilities with
+
+    python tests/fake_eutils.py record --fixtures DIR "search term" ...
+"""
+
+import argparse
+import collections
+import json
+import pathlib
+import random
+import textwrap
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures" / "eutils"
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+LINK_NAMES = ("pubmed_pubmed", "pubmed_pubmed_citedin")
+# EInfo answer listing the databases, as used to open connections.
+EINFO = '{"header": {"type": "einfo"}, "einforesult": {"dblist": ["pubmed"]}}'
+
+WORDS = [
+    "patients",
+    "tumor",
+    "expression",
+    "therapy",
+    "response",
+    "survival",
+    "cohort",
+    "trial",
+    "HER2",
+    "antibody",
+    "conjugate",
+    "deruxtecan",
+    "carcinoma",
+    "metastatic",
+    "receptor",
+    "signaling",
+    "inhibitor",
+    "progression",
+    "toxicity",
+    "biomarker",
+    "clinical",
+    "outcome",
+    "analysis",
+]
+
+
+def _field(tag: str, value: str) -> str:
+    lines = textwrap.wrap(value, 82) or [""]
+    return f"{tag:<4}- " + "\n      ".join(lines) + "\n"
+
+
+def medline_record(pmid: str) -> str:
+    """
+    Returns a synthetic Medline record for a PMID.
+
+    The record has the size and the fields of a typical PubMed record:
+    a 250 word abstract, eight authors with affiliations, grants and MeSH
+    headings with qualifiers. The title is always "Article <PMID> Title".
+    """
+    rng = random.Random(pmid)
+    abstract = " ".join(rng.choice(WORDS) for _ in range(250))
+    record = _field("PMID", pmid) + _field("TI", f"Article {pmid} Title")
+    record += _field("AB", f"Article {pmid} Abstract. {abstract}.")
+    record += _field("DP", "2024 Jan") + _field("JT", "Journal of Clinical Oncology")
+    record += _field("TA", "J Clin Oncol")
+    for i in range(8):
+        record += _field("FAU", f"Author{i}, Name {pmid}")
+        record += _field("AU", f"Author{i} N")
+        record += _field(
+            "AD",
+            f"Department of Oncology {i}, University Hospital, City, Country."
+            f" author{i}@example.org.",
+        )
+    for grant in ("R01 CA000001/CA/NCI NIH HHS/United States", "P30 CA000002/CA/NCI"):
+        record += _field("GR", grant)
+    for heading in ("Humans", "*Breast Neoplasms/drug therapy/pathology"):
+        record += _field("MH", heading)
+    record += _field("MH", "Receptor, ErbB-2/*metabolism")
+    record += _field("PT", "Journal Article") + _field("PT", "Clinical Trial")
+    return record
+
+
+class FakeEutilsServer:
+    """
+    Serves esearch.fcgi, efetch.fcgi, esummary.fcgi, elink.fcgi and
+    einfo.fcgi from in-memory search results.
+
+    Every request is recorded in `requests` as a tuple of the E-utility name
+    and its query parameters, so tests can count HTTP round-trips, and the
+    client port of every request in `ports`, so tests can count connections.
+
+    Every response is delayed by `latency` plus a uniformly distributed
+    `jitter` in seconds. A share `error_rate` of the requests is answered with
+    HTTP 429, as are requests over `rate_limit` per second and API key, like
+    NCBI does.
+    """
+
+    def __init__(
+        self,
+        searches: dict[str, list[str]],
+        records: dict[str, str] | None = None,
+        links: dict[str, dict[str, list[list]]] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        seed: int = 0,
+        port: int = 0,
+    ) -> None:
+        self.searches = searches
+        self.records = records or {}
+        self.links = links or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self.ports: list[int] = []
+        # Number of requests answered with HTTP 429.
+        self.throttled = 0
+        # Search terms stored on the History Server, by query_key - 1.
+        self.history: list[str] = []
+        self._fail_next = 0
+        self._recent: dict[str, collections.deque[float]] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @classmethod
+    def from_fixtures(
+        cls, path: pathlib.Path = FIXTURES, **options: object
+    ) -> "FakeEutilsServer":
+        """Creates a server for the fixtures recorded in a directory."""
+        searches = json.loads((path / "searches.json").read_text())
+        links_path = path / "links.json"
+        links = json.loads(links_path.read_text()) if links_path.exists() else {}
+        records = {file.stem: file.read_text() for file in path.glob("medline/*.txt")}
+        return cls(searches, records, links, **options)  # type: ignore[arg-type]
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def count(self, utility: str) -> int:
+        """Returns the number of requests made to an E-utility."""
+        return sum(1 for name, _ in self.requests if name == utility)
+
+    def fail_next(self, requests: int) -> None:
+        """Answers the next requests with HTTP 429."""
+        with self._lock:
+            self._fail_next += requests
+
+    def _throttle(self, api_key: str) -> bool:
+        with self._lock:
+            if self._fail_next:
+                self._fail_next -= 1
+                return True
+            if self.error_rate and self._random.random() < self.error_rate:
+                return True
+            if self.rate_limit is None:
+                return False
+            now = time.monotonic()
+            recent = self._recent.setdefault(api_key, collections.deque())
+            while recent and recent[0] <= now - 1.0:
+                recent.popleft()
+            if len(recent) >= self.rate_limit:
+                return True
+            recent.append(now)
+            return False
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-1, 1) * self.jitter)
+
+    def _medline(self, pmid: str) -> str:
+        return self.records.get(pmid) or medline_record(pmid)
+
+    def _esearch(self, params: dict[str, str]) -> tuple[str, str]:
+        hits = self.searches.get(params.get("term", ""), [])
+        id_list = hits[: int(params.get("retmax", 20))]
+        if params.get("retmode") == "json":
+            result: dict = {"count": str(len(hits)), "idlist": id_list}
+            if params.get("usehistory") == "y":
+                self.history.append(params.get("term", ""))
+                result["webenv"] = "MCID_FAKE"
+                result["querykey"] = str(len(self.history))
+            return "application/json", json.dumps({"esearchresult": result})
+        ids = "".join(f"<Id>{id}</Id>" for id in id_list)
+        body = (
+            '<?xml version="1.0" encoding="UTF-8" ?>\n'
+            "<!DOCTYPE eSearchResult PUBLIC"
+            ' "-//NLM//DTD esearch 20060628//EN"'
+            ' "https://eutils.ncbi.nlm.nih.gov/eutils/dtd/20060628/esearch.dtd">\n'
+            f"<eSearchResult><Count>{len(hits)}</Count>"
+            f"<RetMax>{len(id_list)}</RetMax><RetStart>0</RetStart>"
+            f"<IdList>{ids}</IdList></eSearchResult>"
+        )
+        return "text/xml", body
+
+    def _efetch(self, params: dict[str, str]) -> tuple[str, str]:
+        if "query_key" in params:
+            # Pages of stored results are returned in search order.
+            term = self.history[int(params["query_key"]) - 1]
+            start = int(params.get("retstart", 0))
+            end = start + int(params.get("retmax", 20))
+            id_list = self.searches.get(term, [])[start:end]
+        else:
+            # Like NCBI, answer in PMID order rather than in request order.
+            id_list = sorted(params.get("id", "").split(","), key=int)
+        return "text/plain", "\n".join(self._medline(id) for id in id_list)
+
+    def _esummary(self, params: dict[str, str]) -> tuple[str, str]:
+        id_list = params.get("id", "").split(",")
+        result: dict = {"uids": id_list}
+        for id in id_list:
+            title = f"Article {id} Title"
+            for line in self._medline(id).splitlines():
+                if line.startswith("TI  - "):
+                    title = line[6:]
+            result[id] = {"uid": id, "title": title}
+        return "application/json", json.dumps({"result": result})
+
+    def _elink(self, params: dict[str, str], id_params: list[str]) -> tuple[str, str]:
+        # Every id parameter gets its own link set, with the neighbors of all
+        # of its comma-separated PMIDs, best score first.
+        link_name = params.get("linkname", "pubmed_pubmed")
+        neighbors = self.links.get(link_name, {})
+        scored = params.get("cmd") == "neighbor_score"
+        linksets = []
+        for value in id_params:
+            ids = value.split(",")
+            links: dict[str, int] = {}
+            for id in ids:
+                for link, score in neighbors.get(id, []):
+                    links[link] = max(score, links.get(link, 0))
+            ranked = sorted(links.items(), key=lambda item: -item[1])
+            linkset: dict = {"dbfrom": "pubmed", "ids": ids}
+            if ranked:
+                linkset["linksetdbs"] = [
+                    {
+                        "dbto": "pubmed",
+                        "linkname": link_name,
+                        "links": [
+                            {"id": link, "score": str(score)} if scored else link
+                            for link, score in ranked
+                        ],
+                    }
+                ]
+            linksets.append(linkset)
+        return "application/json", json.dumps({"linksets": linksets})
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                self._respond(urlparse(self.path).query)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                self._respond(self.rfile.read(length).decode())
+
+            def _respond(self, query: str) -> None:
+                utility = urlparse(self.path).path.strip("/").removesuffix(".fcgi")
+                values = parse_qs(query)
+                params = {key: value[-1] for key, value in values.items()}
+                server.requests.append((utility, params))
+                server.ports.append(self.client_address[1])
+                time.sleep(server._delay())
+                if server._throttle(params.get("api_key", "")):
+                    server.throttled += 1
+                    self._send(
+                        429, "application/json", '{"error":"API rate limit exceeded"}'
+                    )
+                    return
+                if utility == "esearch":
+                    content_type, body = server._esearch(params)
+                elif utility == "efetch":
+                    content_type, body = server._efetch(params)
+                elif utility == "esummary":
+                    content_type, body = server._esummary(params)
+                elif utility == "elink":
+                    content_type, body = server._elink(params, values.get("id", []))
+                elif utility == "einfo":
+                    content_type, body = "application/json", EINFO
+                else:
+                    self.send_error(404)
+                    return
+                self._send(200, content_type, body)
+
+            def _send(self, status: int, content_type: str, body: str) -> None:
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: object) -> None:
+                del format, args  # keep test output quiet
+
+        return Handler
+
+
+def record_fixtures(
+    path: pathlib.Path, terms: list[str], retmax: int, email: str | None
+) -> None:
+    """Records the results, records and neighbors of searches from NCBI."""
+    import httpx
+
+    def post(utility: str, **params: object) -> httpx.Response:
+        # Stay below the 3 requests per second allowed without an API key.
+        time.sleep(0.4)
+        response = httpx.post(
+            f"{EUTILS_URL}{utility}.fcgi",
+            data={"db": "pubmed", "email": email, **params},
+            timeout=60,
+        )
+        return response.raise_for_status()
+
+    searches_path = path / "searches.json"
+    links_path = path / "links.json"
+    searches = json.loads(searches_path.read_text()) if searches_path.exists() else {}
+    links = json.loads(links_path.read_text()) if links_path.exists() else {}
+    (path / "medline").mkdir(parents=True, exist_ok=True)
+    for term in terms:
+        result = post("esearch", term=term, retmax=retmax, retmode="json").json()
+        id_list = result["esearchresult"]["idlist"]
+        searches[term] = id_list
+        medline = post("efetch", id=",".join(id_list), rettype="medline").text
+        for record in medline.strip().split("\n\n"):
+            pmid = record.split("\n", 1)[0].removeprefix("PMID-").strip()
+            (path / "medline" / f"{pmid}.txt").write_text(record + "\n")
+        for link_name in LINK_NAMES:
+            # One id parameter per PMID gives one link set per PMID.
+            response = post(
+                "elink",
+                dbfrom="pubmed",
+                linkname=link_name,
+                cmd="neighbor_score",
+                retmode="json",
+                id=id_list,
+            ).json()
+            for linkset in response.get("linksets", []):
+                for linksetdb in linkset.get("linksetdbs", []):
+                    links.setdefault(link_name, {})[linkset["ids"][0]] = [
+                        [link["id"], int(link["score"])] for link in linksetdb["links"]
+                    ]
+    searches_path.write_text(json.dumps(searches, indent=2) + "\n")
+    links_path.write_text(json.dumps(links, indent=2) + "\n")
+
+
+def main() -> None:
+    """Serves the fixtures or records new ones."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--fixtures", type=pathlib.Path, default=FIXTURES)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="serve the fixtures")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds")
+    serve.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="share of 429s")
+    serve.add_argument("--rate-limit", type=float, help="requests/s per API key")
+    record = commands.add_parser("record", help="record fixtures from NCBI")
+    record.add_argument("terms", nargs="+")
+    record.add_argument("--retmax", type=int, default=20)
+    record.add_argument("--email")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_fixtures(args.fixtures, args.terms, args.retmax, args.email)
+        return
+    server = FakeEutilsServer.from_fixtures(
+        args.fixtures,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        port=args.port,
+    )
+    with server:
+        print(f"Serving {args.fixtures} at {server.url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the compact article records."""
+
+import io
+
+from Bio import Medline
+from fake_eutils import medline_record
+
+from agents.hcls_research_agent.sub_agents.search_agent.articles import (
+    Article,
+    payload_size,
+    project_articles,
+    project_handles,
+    snippet,
+)
+
+
+def fetched(*pmids: str) -> list:
+    """Returns records as returned by fetch_articles."""
+    return [
+        {"pmid": pmid, "article": [Medline.read(io.StringIO(medline_record(pmid)))]}
+        for pmid in pmids
+    ]
+
+
+def test_article_keeps_projected_fields():
+    """Tests that only the projected Medline fields are kept."""
+    record = fetched("1")[0]["article"][0]
+
+    article = Article.from_medline("1", record, ("TI", "DP", "MH"))
+
+    assert article.to_dict() == {
+        "title": "Article 1 Title",
+        "date": "2024 Jan",
+        "mesh_terms": ["Humans", "Breast Neoplasms", "Receptor, ErbB-2"],
+    }
+
+
+def test_project_articles_shrinks_payload():
+    """Tests that compact articles are smaller than Medline records."""
+    records = fetched("1", "2", "3")
+
+    articles = project_articles(records, budget=0)
+
+    assert [article["pmid"] for article in articles] == ["1", "2", "3"]
+    assert payload_size(articles) < payload_size(records) * 0.75
+
+
+def test_project_articles_shortens_abstracts_to_fit_budget():
+    """Tests that the longest abstracts are shortened to fit the budget."""
+    records = fetched("1", "2", "3")
+    full_size = payload_size(project_articles(records, budget=0))
+
+    articles = project_articles(records, budget=full_size - 500)
+
+    assert len(articles) == 3
+    assert payload_size(articles) <= full_size - 500
+    assert any(a["article"]["abstract"].endswith("...") for a in articles)
+
+
+def test_project_articles_drops_articles_that_do_not_fit():
+    """Tests that articles are dropped from the end if abstracts are not enough."""
+    articles = project_articles(fetched("1", "2", "3"), budget=600)
+
+    assert [article["pmid"] for article in articles] == ["1"]
+
+
+def test_snippet_prefers_conclusions():
+    """Tests that snippets start at the conclusions and end at a word."""
+    abstract = (
+        "BACKGROUND: Some background. RESULTS: Many results."
+        " CONCLUSIONS: KRAS G13D tumors respond to cetuximab in most patients."
+    )
+
+    assert snippet(abstract, 100) == (
+        "KRAS G13D tumors respond to cetuximab in most patients."
+    )
+    assert snippet(abstract, 30) == "KRAS G13D tumors respond to..."
+    assert snippet("Unstructured abstract.", 100) == "Unstructured abstract."
+
+
+def test_project_handles_leave_out_full_abstracts():
+    """Tests that handles only have the title, date, journal and a snippet."""
+    record = {
+        "pmid": "1",
+        "article": [
+            {
+                "TI": "A title",
+                "AB": "word " * 200,
+                "DP": "2024 Jan",
+                "JT": "A journal",
+                "MH": ["Humans"],
+            }
+        ],
+    }
+
+    [handle] = project_handles([record], length=20)
+
+    assert handle == {
+        "pmid": "1",
+        "article": {
+            "title": "A title",
+            "date": "2024 Jan",
+            "journal": "A journal",
+            "snippet": "word word word word...",
+        },
+    }
+    assert project_handles([record], length=0) == project_articles([record])
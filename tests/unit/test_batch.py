@@ -0,0 +1,150 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the headless batch mode."""
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+from benchmarks.harness import TOPIC, ScriptedLlm
+
+from agents.hcls_research_agent import batch
+
+EMAIL = "batch@example.com"
+
+
+def _write(path: pathlib.Path, lines: list[str]) -> None:
+    path.write_text("".join(line + "\n" for line in lines))
+
+
+def test_follow_up_moves_to_the_next_step():
+    """Tests that the answers move a session through the research steps."""
+    assert batch.follow_up({}, EMAIL) == batch.FOLLOW_UPS["research_question"]
+    searching = batch.follow_up({"research_question": "What?"}, EMAIL)
+    assert "search PubMed" in searching
+    assert EMAIL in searching
+    assert (
+        batch.follow_up({"research_question": "What?", "pubmed_results": "Done"}, EMAIL)
+        == batch.FOLLOW_UPS["hypotheses"]
+    )
+
+
+def test_read_questions_numbers_items_without_id(tmp_path):
+    """Tests that questions without an ID are numbered by their line."""
+    questions = tmp_path / "questions.jsonl"
+    _write(questions, ['{"id": "a", "question": "One?"}', "", '{"question": "Two?"}'])
+
+    assert batch.read_questions(str(questions)) == [
+        {"id": "a", "question": "One?"},
+        {"id": "3", "question": "Two?"},
+    ]
+
+
+def test_completed_ids_skips_failures_and_partial_lines(tmp_path):
+    """Tests that only successful, complete result lines count as done."""
+    results = tmp_path / "results.jsonl"
+    _write(
+        results,
+        [
+            '{"id": "a", "status": "ok"}',
+            '{"id": "b", "status": "error"}',
+            '{"id": "c", "status": "incomplete"}',
+        ],
+    )
+    with results.open("a") as file:
+        file.write('{"id": "d", "stat')
+
+    assert batch.completed_ids(str(results)) == {"a"}
+    assert batch.completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_main_researches_questions_and_resumes(fake_eutils, tmp_path):
+    """Tests that a rerun researches only the questions not done yet."""
+    questions = tmp_path / "questions.jsonl"
+    results = tmp_path / "results.jsonl"
+    _write(
+        questions,
+        [
+            json.dumps({"id": "done", "question": f"{TOPIC}KRAS G12C"}),
+            json.dumps({"id": "g13d", "question": f"{TOPIC}KRAS G13D"}),
+        ],
+    )
+    # A result of an earlier, interrupted run.
+    results.write_text('{"id": "done", "status": "ok"}\n{"id": "g13d", "sta')
+
+    with ScriptedLlm().patch():
+        batch.main([str(questions), str(results), "--email", EMAIL])
+
+    lines = results.read_text().splitlines()
+    assert len(lines) == 3
+    result = json.loads(lines[-1])
+    assert result["id"] == "g13d"
+    assert result["status"] == "ok"
+    assert (
+        result["research_question"]
+        == "Research question: What is known about KRAS G13D?"
+        " This is an excellent research question!"
+    )
+    assert result["hypotheses"] == "Hypothesis 1: KRAS G13D matters."
+    assert result["turns"] == 3
+    assert set(result["seconds_by_agent"]) >= {
+        "research_question_agent",
+        "search_agent",
+        "hypothesis_agent",
+    }
+    assert fake_eutils.count("esearch") == 1
+
+
+def test_batch_gives_up_after_max_turns(fake_eutils, tmp_path):
+    """Tests that a question is given up after --max-turns answers."""
+    del fake_eutils  # unused
+    questions = tmp_path / "questions.jsonl"
+    results = tmp_path / "results.jsonl"
+    _write(questions, [json.dumps({"question": f"{TOPIC}KRAS G13D"})])
+
+    with ScriptedLlm().patch():
+        batch.main([str(questions), str(results), "--email", EMAIL, "--max-turns", "1"])
+
+    result = json.loads(results.read_text())
+    assert result["status"] == "incomplete"
+    assert result["hypotheses"] is None
+    assert result["turns"] == 1
+
+
+def test_settings_are_read_from_dotenv(tmp_path):
+    """Tests that the .env file configures the agents before they are imported."""
+    (tmp_path / ".env").write_text(f"NCBI_API_KEY=abc123\nNCBI_EMAIL={EMAIL}\n")
+    env = {k: v for k, v in os.environ.items() if not k.startswith("NCBI_")}
+    script = (
+        "from agents.hcls_research_agent import batch\n"
+        "from agents.hcls_research_agent.shared_libraries import eutils\n"
+        "from agents.hcls_research_agent.shared_libraries.rate_limiter import (\n"
+        "    ncbi_rate_limiter,\n"
+        ")\n"
+        "print(ncbi_rate_limiter.stats()['api_keys'], eutils.EMAIL)\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=tmp_path,
+        env={**env, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+    assert result.stdout.split() == ["1", EMAIL]
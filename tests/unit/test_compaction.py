@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the compaction of superseded search results."""
+
+from types import SimpleNamespace
+
+from google.adk.events import Event
+from google.adk.flows.llm_flows.contents import _get_contents
+from google.adk.models import LlmRequest
+from google.genai.types import Content, FunctionCall, FunctionResponse, Part
+
+from agents.hcls_research_agent.shared_libraries import compaction, telemetry
+
+
+def _call(name: str, **args: object) -> Content:
+    return Content(
+        role="model", parts=[Part(function_call=FunctionCall(name=name, args=args))]
+    )
+
+
+def _response(name: str, result: list) -> Content:
+    return Content(
+        role="user",
+        parts=[
+            Part(
+                function_response=FunctionResponse(
+                    name=name, response={"result": result}
+                )
+            )
+        ],
+    )
+
+
+def _articles(*pmids: str) -> list:
+    return [
+        {"pmid": pmid, "article": {"title": "A title", "snippet": "word " * 60}}
+        for pmid in pmids
+    ]
+
+
+HISTORY = [
+    Content(role="user", parts=[Part(text="Please search for KRAS.")]),
+    _call("search_pubmed", search_string="KRAS", email="a@b.c", limit=2),
+    _response("search_pubmed", _articles("1", "2")),
+    _call("search_more_pubmed", email="a@b.c", limit=1),
+    _response("search_more_pubmed", _articles("3")),
+    Content(role="user", parts=[Part(text="Only G13D, please.")]),
+    _call("search_pubmed", search_string="KRAS G13D", email="a@b.c", limit=2),
+    _response("search_pubmed", _articles("4", "5")),
+    _call("get_abstracts", pmids=["4"], email="a@b.c"),
+    _response("get_abstracts", _articles("4")),
+]
+
+
+def test_compact_replaces_superseded_results():
+    """Tests that only the results of the latest search are sent in full."""
+    compacted, saved = compaction.compact(HISTORY)
+
+    responses = [
+        part.function_response.response
+        for content in compacted
+        for part in content.parts
+        if part.function_response
+    ]
+    assert responses[0] == {
+        "superseded": True,
+        "tool": "search_pubmed",
+        "search_string": "KRAS",
+        "count": 2,
+        "pmids": ["1", "2"],
+    }
+    assert responses[1] == {
+        "superseded": True,
+        "tool": "search_more_pubmed",
+        "count": 1,
+        "pmids": ["3"],
+    }
+    assert compacted[7:] == HISTORY[7:]
+    assert saved > 0
+    # The contents of the session are not changed.
+    assert HISTORY[2].parts[0].function_response.response["result"][0]["pmid"] == "1"
+
+
+def test_compact_history_records_savings():
+    """Tests that the bytes and tokens saved are recorded for the turn."""
+    telemetry.metrics.reset()
+    llm_request = LlmRequest(contents=list(HISTORY))
+    callback_context = SimpleNamespace(
+        agent_name="search_agent", invocation_id="e-compaction"
+    )
+
+    compaction.compact_history(callback_context, llm_request)
+
+    [entry] = telemetry.ledger.get("e-compaction")
+    assert entry["kind"] == "compaction"
+    assert entry["saved_tokens"] == entry["saved_bytes"] // 4 > 0
+    assert (
+        telemetry.metrics.get("hcls_compaction_saved_bytes_total", agent="search_agent")
+        == entry["saved_bytes"]
+    )
+
+
+def test_compact_keeps_single_result_set():
+    """Tests that a history with a single result set is left alone."""
+    assert compaction.compact(HISTORY[:5]) == (HISTORY[:5], 0)
+
+
+def test_compact_replaces_superseded_results_of_other_agents():
+    """
+    Tests that the hypothesis agent gets stubs of the search agent's
+    superseded results, which ADK passes on as "For context:" text.
+    """
+    events = [
+        Event(author="user", content=HISTORY[0]),
+        *(Event(author="search_agent", content=content) for content in HISTORY[1:5]),
+        Event(author="user", content=HISTORY[5]),
+        *(Event(author="search_agent", content=content) for content in HISTORY[6:]),
+        Event(author="user", content=Content(role="user", parts=[Part(text="Go.")])),
+    ]
+    contents = _get_contents(None, events, "hypothesis_agent")
+    texts = [part.text for content in contents for part in content.parts]
+    assert not any(part.function_response for c in contents for part in c.parts)
+
+    compacted, saved = compaction.compact(contents)
+
+    compacted_texts = [part.text for content in compacted for part in content.parts]
+    stubs = [text for text in compacted_texts if "'superseded': True" in text]
+    assert len(stubs) == 2
+    assert stubs[0].startswith("[search_agent] `search_pubmed` tool returned")
+    assert "'search_string': 'KRAS'" in stubs[0]
+    assert "'pmids': ['1', '2']" in stubs[0]
+    # The results of the latest search are passed on in full.
+    assert compacted_texts[-4:] == texts[-4:]
+    assert saved == sum(map(len, texts)) - sum(map(len, compacted_texts)) > 0
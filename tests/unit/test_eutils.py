@@ -0,0 +1,119 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the E-utilities client."""
+
+import asyncio
+
+import httpx
+import pytest
+from fake_eutils import FakeEutilsServer
+
+from agents.hcls_research_agent.shared_libraries import eutils
+from agents.hcls_research_agent.shared_libraries.rate_limiter import NcbiRateLimiter
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
+
+
+@pytest.mark.asyncio
+async def test_eutils_request_retries_throttled_requests(fake_eutils):
+    """Tests that requests answered with HTTP 429 are sent again."""
+    fake_eutils.fail_next(eutils.MAX_TRIES - 1)
+
+    response = await eutils.eutils_request(
+        "esearch", db="pubmed", term="KRAS G13D", retmode="json"
+    )
+
+    assert response.json()["esearchresult"]["count"] == "5"
+    assert fake_eutils.throttled == eutils.MAX_TRIES - 1
+    assert fake_eutils.count("esearch") == eutils.MAX_TRIES
+
+
+@pytest.mark.asyncio
+async def test_eutils_request_gives_up_after_max_tries(fake_eutils):
+    """Tests that a ConnectionError is raised when NCBI keeps throttling."""
+    fake_eutils.fail_next(eutils.MAX_TRIES)
+
+    with pytest.raises(ConnectionError, match="HTTP 429"):
+        await eutils.eutils_request("esearch", db="pubmed", term="KRAS G13D")
+
+
+@pytest.mark.asyncio
+async def test_eutils_request_against_recorded_fixtures(monkeypatch):
+    """Tests the client against the recorded fixtures with latency and a rate limit."""
+    with FakeEutilsServer.from_fixtures(latency=0.01, rate_limit=3) as server:
+        monkeypatch.setattr(eutils, "EUTILS_URL", server.url)
+        monkeypatch.setattr(eutils, "ncbi_rate_limiter", NcbiRateLimiter(rate=2))
+        pmid = server.searches["KRAS G13D"][0]
+
+        for _ in range(4):
+            response = await eutils.eutils_request(
+                "elink",
+                dbfrom="pubmed",
+                linkname="pubmed_pubmed",
+                id=pmid,
+                retmode="json",
+            )
+
+    # The client limiter keeps the requests within the rate limit of the server.
+    assert server.throttled == 0
+    (linkset,) = response.json()["linksets"]
+    assert linkset["ids"] == [pmid]
+    assert linkset["linksetdbs"][0]["links"] == [
+        link for link, _ in server.links["pubmed_pubmed"][pmid]
+    ]
+
+
+def test_blocking_search_closes_its_client(fake_eutils):
+    """Tests that search_pubmed_sync calls leave no open client behind."""
+    for _ in range(3):
+        search_agent_module.search_pubmed_sync("KRAS G13D", "test@example.com", 1)
+
+    assert not [loop for loop in eutils._clients if loop.is_closed()]
+
+
+def test_clients_of_closed_loops_are_dropped(fake_eutils):
+    """Tests that the pool of a closed event loop is dropped with the next one."""
+
+    async def request() -> httpx.AsyncClient:
+        await eutils.eutils_request("esearch", db="pubmed", term="KRAS G13D")
+        return eutils.eutils_client()
+
+    async def request_again() -> list[httpx.AsyncClient]:
+        await request()
+        clients = list(eutils._clients.values())
+        await eutils.close_eutils_client()
+        return clients
+
+    first = asyncio.run(request())
+    clients = asyncio.run(request_again())
+
+    assert first not in clients
+    assert len(clients) == 1
+    assert not eutils._clients
+
+
+@pytest.mark.asyncio
+async def test_missing_email_is_ncbi_email(fake_eutils, monkeypatch):
+    """Tests that requests without an email identify with NCBI_EMAIL."""
+    monkeypatch.setattr(eutils, "EMAIL", "ncbi@example.com")
+
+    await search_agent_module.esearch("KRAS G13D", None, 5)
+    await search_agent_module.fetch_articles(["1"], None)
+
+    assert [params["email"] for _, params in fake_eutils.requests] == [
+        "ncbi@example.com",
+        "ncbi@example.com",
+    ]
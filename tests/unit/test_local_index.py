@@ -0,0 +1,188 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the offline PubMed index."""
+
+import gzip
+import pathlib
+
+import pytest
+
+from agents.hcls_research_agent.shared_libraries.local_index import (
+    LocalIndex,
+    fts_query,
+    get_local_index,
+    main,
+)
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
+
+
+def citation(pmid: str, title: str, abstract: str, mesh: list[str]) -> str:
+    headings = "".join(
+        f'<MeshHeading><DescriptorName MajorTopicYN="N">{heading}</DescriptorName>'
+        "<QualifierName>therapy</QualifierName></MeshHeading>"
+        for heading in mesh
+    )
+    return (
+        f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>"
+        "<Journal><JournalIssue><PubDate><Year>2024</Year><Month>Jan</Month>"
+        "</PubDate></JournalIssue><Title>Journal of Oncology</Title></Journal>"
+        f"<ArticleTitle>{title}</ArticleTitle>"
+        f'<Abstract><AbstractText Label="RESULTS">{abstract}</AbstractText></Abstract>'
+        "<AuthorList><Author><LastName>Doe</LastName><Initials>J</Initials></Author>"
+        "</AuthorList><PublicationTypeList><PublicationType>Journal Article"
+        "</PublicationType></PublicationTypeList></Article>"
+        f"<MeshHeadingList>{headings}</MeshHeadingList>"
+        "</MedlineCitation></PubmedArticle>"
+    )
+
+
+def write_file(path: pathlib.Path, *elements: str) -> str:
+    with gzip.open(path, "wt") as file:
+        file.write(f"<PubmedArticleSet>{''.join(elements)}</PubmedArticleSet>")
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path: pathlib.Path) -> LocalIndex:
+    index = LocalIndex(str(tmp_path / "index.db"))
+    index.ingest(
+        write_file(
+            tmp_path / "pubmed25n0001.xml.gz",
+            citation(
+                "1",
+                "Trastuzumab <i>deruxtecan</i> in HER2-low breast cancer",
+                "Patients responded.",
+                ["Breast Neoplasms"],
+            ),
+            citation(
+                "2", "KRAS G13D in colorectal cancer", "Tumors.", ["Colonic Neoplasms"]
+            ),
+            citation(
+                "3", "Lung cancer screening", "Breast tissue.", ["Lung Neoplasms"]
+            ),
+        )
+    )
+    return index
+
+
+def test_ingest_converts_citations_to_medline(index):
+    """Tests that ingested citations are stored as Medline-like records."""
+    assert index.get_many(["1"])["1"] == {
+        "PMID": "1",
+        "TI": "Trastuzumab deruxtecan in HER2-low breast cancer",
+        "AB": "RESULTS: Patients responded.",
+        "DP": "2024 Jan",
+        "JT": "Journal of Oncology",
+        "AU": ["Doe J"],
+        "PT": ["Journal Article"],
+        "MH": ["Breast Neoplasms/therapy"],
+    }
+
+
+@pytest.mark.parametrize(
+    "search_string, expected",
+    [
+        ("breast", ["1", "3"]),
+        ("breast[ti]", ["1"]),
+        ('"breast neoplasms"[mh]', ["1"]),
+        ('"KRAS G13D"', ["2"]),
+        ("cancer NOT breast", ["2"]),
+        ("(deruxtecan OR screening) AND cancer[tiab]", ["1", "3"]),
+        ("neoplas*[mh]", ["1", "2", "3"]),
+    ],
+)
+def test_search(index, search_string, expected):
+    """Tests that PubMed search strings are answered from the index."""
+    assert sorted(index.search(search_string, 10)) == expected
+    assert index.count(search_string) == len(expected)
+
+
+def test_fts_query_falls_back_to_all_words():
+    """Tests that invalid boolean expressions match all of their words."""
+    assert fts_query("(breast cancer") == '"breast" AND "cancer"'
+
+
+def test_update_files_replace_and_delete_citations(index, tmp_path):
+    """Tests that update files replace and delete citations and are ingested once."""
+    update = write_file(
+        tmp_path / "pubmed25n0002.xml.gz",
+        citation("2", "KRAS G12C in lung cancer", "Revised.", ["Lung Neoplasms"]),
+        "<DeleteCitation><PMID>3</PMID></DeleteCitation>",
+    )
+
+    assert index.ingest(update) == {"updated": 1, "deleted": 1, "skipped": False}
+    assert index.ingest(update)["skipped"]
+    assert sorted(index.search("lung", 10)) == ["2"]
+    assert index.search("colorectal", 10) == []
+    assert index.get_many(["2", "3"])["2"]["TI"] == "KRAS G12C in lung cancer"
+
+
+def test_repeated_citation_in_a_file_keeps_the_last_version(index, tmp_path):
+    """Tests that a citation occurring twice in one file is stored once."""
+    update = write_file(
+        tmp_path / "pubmed25n0002.xml.gz",
+        citation("4", "BRAF V600E in melanoma", "First.", ["Melanoma"]),
+        citation("4", "BRAF V600E in melanoma, revised", "Second.", ["Melanoma"]),
+    )
+
+    assert index.ingest(update)["updated"] == 2
+    assert index.search("braf", 10) == ["4"]
+    assert index.get_many(["4"])["4"]["AB"] == "RESULTS: Second."
+
+
+def test_citation_deleted_later_in_the_same_file_is_removed(index, tmp_path):
+    """Tests that a deletion after a citation in one file removes it."""
+    update = write_file(
+        tmp_path / "pubmed25n0002.xml.gz",
+        citation("4", "BRAF V600E in melanoma", "Withdrawn.", ["Melanoma"]),
+        "<DeleteCitation><PMID>4</PMID></DeleteCitation>",
+    )
+
+    index.ingest(update)
+
+    assert index.search("braf", 10) == []
+    assert index.get_many(["4"]) == {}
+
+
+def test_main_ingests_files(tmp_path, capsys):
+    """Tests that the command line ingests the given files in order."""
+    path = write_file(tmp_path / "pubmed25n0001.xml.gz", citation("7", "T", "A", []))
+
+    main([path, "--index", str(tmp_path / "cli.db")])
+
+    assert "1 citations updated" in capsys.readouterr().out
+    assert LocalIndex(str(tmp_path / "cli.db")).search("T", 10) == ["7"]
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_uses_local_backend(index, monkeypatch):
+    """Tests that search_pubmed answers from the local index when selected."""
+    monkeypatch.setenv("PUBMED_BACKEND", "local")
+    monkeypatch.setenv("PUBMED_INDEX_PATH", index.path)
+    get_local_index.cache_clear()
+
+    articles = await search_agent_module.search_pubmed(
+        "breast[ti]", "test@example.com", 5
+    )
+    abstracts = await search_agent_module.get_abstracts(
+        [articles[0]["pmid"]], "test@example.com"
+    )
+    count = await search_agent_module.count_pubmed("breast")
+
+    assert articles[0]["pmid"] == "1"
+    assert abstracts[0]["article"]["mesh_terms"] == ["Breast Neoplasms"]
+    assert count["count"] == 2
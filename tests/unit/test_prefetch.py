@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the speculative prefetch of proposed search strings."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
+from agents.hcls_research_agent.sub_agents.search_agent import prefetch
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(prefetch, "ENABLED", True)
+    monkeypatch.setattr(prefetch, "PREFETCH_LIMIT", 10)
+
+
+@pytest.mark.asyncio
+async def test_search_after_count_is_served_from_prefetch(fake_eutils):
+    """Tests that the approved search sends no requests of its own."""
+    tool_context = SimpleNamespace(state={})
+    await search_agent_module.count_pubmed("KRAS G13D", tool_context)
+
+    records = await search_agent_module.search_pubmed(
+        "kras  g13d", "test@example.com", 3, tool_context
+    )
+
+    assert [record["pmid"] for record in records] == [
+        "39120576",
+        "38000001",
+        "40470107",
+    ]
+    # Counting, prefetch ESearch and prefetch EFetch.
+    assert [name for name, _ in fake_eutils.requests] == [
+        "esearch",
+        "esummary",
+        "esearch",
+        "efetch",
+    ]
+    assert fake_eutils.requests[2][1]["retmax"] == "10"
+
+
+@pytest.fixture
+def slow_g13d(monkeypatch):
+    """Makes the prefetch of "KRAS G13D" wait until it is cancelled."""
+    original = search_agent_module._prefetch
+
+    async def _prefetch(search_string, retmax):
+        if search_string == "KRAS G13D":
+            await asyncio.Event().wait()
+        await original(search_string, retmax)
+
+    monkeypatch.setattr(search_agent_module, "_prefetch", _prefetch)
+
+
+@pytest.mark.asyncio
+async def test_count_of_other_search_string_cancels_prefetch(fake_eutils, slow_g13d):
+    """Tests that editing the proposed search string cancels its prefetch."""
+    fake_eutils.searches["KRAS G12C"] = ["41000001"]
+    tool_context = SimpleNamespace(state={})
+    await search_agent_module.count_pubmed("KRAS G13D", tool_context)
+    first = prefetch._running[tool_context.state[prefetch.PREFETCH_KEY]][1]
+
+    await search_agent_module.count_pubmed("KRAS G12C", tool_context)
+    records = await search_agent_module.search_pubmed(
+        "KRAS G12C", "test@example.com", 3, tool_context
+    )
+
+    assert first.cancelled()
+    assert [record["pmid"] for record in records] == ["41000001"]
+    assert not prefetch._running
+    # Counting and prefetching, but not searching again.
+    searched = [p["term"] for name, p in fake_eutils.requests if name == "esearch"]
+    assert searched == ["KRAS G13D", "KRAS G12C", "KRAS G12C"]
+
+
+@pytest.mark.asyncio
+async def test_search_of_other_search_string_cancels_prefetch(fake_eutils, slow_g13d):
+    """Tests that the prefetch is dropped when another search string is searched."""
+    tool_context = SimpleNamespace(state={})
+    await search_agent_module.count_pubmed("KRAS G13D", tool_context)
+    task = prefetch._running[tool_context.state[prefetch.PREFETCH_KEY]][1]
+
+    await search_agent_module.search_pubmed(
+        "KRAS G12C", "test@example.com", 3, tool_context
+    )
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+    assert not prefetch._running
@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the ESearch query cache."""
+
+from unittest.mock import patch
+
+import pytest
+
+from agents.hcls_research_agent.shared_libraries import query_cache
+from agents.hcls_research_agent.shared_libraries.query_cache import (
+    QueryCache,
+    normalize_query,
+)
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("KRAS  G13D\n breast cancer", "kras g13d Breast Cancer"),
+        ('(("T-DXd"))', '"t-dxd"'),
+        (
+            '("T-DXd" OR "trastuzumab deruxtecan") AND (cancer)',
+            '("Trastuzumab Deruxtecan" OR "T-DXd") AND cancer',
+        ),
+        ("(a OR b) OR (c OR d)", "d OR c OR b OR a"),
+        ("HER2[MeSH  Terms] OR ADC", "adc OR her2[mesh terms]"),
+    ],
+)
+def test_equivalent_queries_share_a_key(first, second):
+    """Tests that equivalent search strings are normalized to the same key."""
+    assert normalize_query(first) == normalize_query(second)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("a AND b OR c", "a AND (b OR c)"),
+        ("a NOT b", "b NOT a"),
+        ('"breast cancer"', "breast cancer"),
+    ],
+)
+def test_different_queries_have_different_keys(first, second):
+    """Tests that search strings with different results are not merged."""
+    assert normalize_query(first) != normalize_query(second)
+
+
+def test_unparsable_query_is_normalized_for_whitespace_and_case():
+    """Tests that a search string with unbalanced parentheses is still a key."""
+    assert normalize_query("(KRAS  OR  NRAS") == "(kras or nras"
+
+
+def test_entries_expire_after_ttl():
+    """Tests that cached searches are only served within the TTL."""
+    cache = QueryCache(ttl=60)
+    with patch.object(query_cache.time, "monotonic", return_value=0.0):
+        cache.put("KRAS", 5, ["1", "2"])
+    with patch.object(query_cache.time, "monotonic", return_value=59.0):
+        assert cache.get("kras", 5) == ["1", "2"]
+        assert cache.get("kras", 10) is None
+    with patch.object(query_cache.time, "monotonic", return_value=61.0):
+        assert cache.get("kras", 5) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 0}
+
+
+def test_smaller_retmax_is_served_from_larger_entry():
+    """Tests that a search for fewer PMIDs reuses the results of a larger one."""
+    cache = QueryCache(ttl=60)
+    cache.put("KRAS", 4, ["1", "2", "3", "4"])
+    cache.put("kras", 2, ["1", "2"])
+
+    assert cache.get("KRAS", 2) == ["1", "2"]
+    assert cache.get("KRAS", 4) == ["1", "2", "3", "4"]
+    assert cache.get("KRAS", 8) is None
+    cache.put("KRAS", 8, ["1", "2", "3", "4", "5"])
+    assert cache.get("KRAS", 3) == ["1", "2", "3"]
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_skips_esearch_for_equivalent_query(fake_eutils):
+    """Tests that a repeated, reformatted search does not call ESearch again."""
+    fake_eutils.searches["(KRAS OR NRAS) AND G13D"] = ["1", "2"]
+
+    await search_agent_module.search_pubmed(
+        "(KRAS OR NRAS) AND G13D", "test@example.com", 5
+    )
+    records = await search_agent_module.search_pubmed(
+        "(nras  OR kras) AND g13d", "test@example.com", 5
+    )
+
+    assert [record["pmid"] for record in records] == ["1", "2"]
+    assert fake_eutils.count("esearch") == 1
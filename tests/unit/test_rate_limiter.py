@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the NCBI rate limiter."""
+
+from unittest.mock import patch
+
+import pytest
+
+from agents.hcls_research_agent.shared_libraries import rate_limiter
+from agents.hcls_research_agent.shared_libraries.rate_limiter import NcbiRateLimiter
+
+
+@pytest.fixture
+def frozen_clock():
+    """Stops time.monotonic so reservations all happen at the same instant."""
+    with patch.object(rate_limiter.time, "monotonic", return_value=1000.0):
+        yield
+
+
+def test_default_rate_without_api_key(frozen_clock):
+    """Tests that requests without an API key are spaced 1/3 s apart."""
+    limiter = NcbiRateLimiter()
+
+    delays = [limiter.reserve() for _ in range(4)]
+
+    assert [api_key for api_key, _ in delays] == [None] * 4
+    assert [delay for _, delay in delays] == pytest.approx([0, 1 / 3, 2 / 3, 1])
+
+
+def test_api_key_rate(frozen_clock):
+    """Tests that requests with an API key are spaced 1/10 s apart."""
+    limiter = NcbiRateLimiter(["key"])
+
+    delays = [limiter.reserve()[1] for _ in range(3)]
+
+    assert limiter.rate == 10
+    assert delays == pytest.approx([0, 0.1, 0.2])
+
+
+def test_api_key_pool(frozen_clock):
+    """Tests that a pool of API keys adds up the quota of every key."""
+    limiter = NcbiRateLimiter(["key1", "key2"])
+
+    reservations = [limiter.reserve() for _ in range(4)]
+
+    assert limiter.rate == 20
+    assert sorted(api_key for api_key, _ in reservations) == [
+        "key1",
+        "key1",
+        "key2",
+        "key2",
+    ]
+    assert [delay for _, delay in reservations] == pytest.approx([0, 0, 0.1, 0.1])
+
+
+def test_tokens_refill_over_time():
+    """Tests that requests are not delayed once the quota has refilled."""
+    clock = [0.0, 0.0, 0.5, 0.6]
+    with patch.object(rate_limiter.time, "monotonic", side_effect=clock):
+        limiter = NcbiRateLimiter()
+        delays = [limiter.reserve()[1] for _ in range(3)]
+
+    assert delays == pytest.approx([0, 0, 1 / 3 - 0.1])
+
+
+def test_queue_wait_stats(frozen_clock):
+    """Tests that the limiter reports how long requests were queued."""
+    limiter = NcbiRateLimiter(rate=2)
+
+    for _ in range(3):
+        limiter.reserve()
+
+    stats = limiter.stats()
+    assert stats["requests"] == 3
+    assert stats["waited"] == 2
+    assert stats["total_wait_seconds"] == pytest.approx(1.5)
+    assert stats["max_wait_seconds"] == pytest.approx(1.0)
+
+
+def test_api_keys_from_env(monkeypatch):
+    """Tests that the API key pool is read from the environment."""
+    monkeypatch.delenv("NCBI_API_KEY", raising=False)
+    monkeypatch.setenv("NCBI_API_KEYS", "key1, key2,")
+
+    assert rate_limiter.api_keys_from_env() == ["key1", "key2"]
@@ -0,0 +1,94 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the PubMed record cache."""
+
+from unittest.mock import patch
+
+import pytest
+
+from agents.hcls_research_agent.shared_libraries import record_cache
+from agents.hcls_research_agent.shared_libraries.record_cache import RecordCache
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
+
+
+def medline(pmid: str) -> dict:
+    return {"PMID": pmid, "TI": f"Article {pmid} Title", "AU": ["Doe J"]}
+
+
+def test_get_many_returns_stored_records(tmp_path):
+    """Tests that stored records are returned and counted as hits."""
+    cache = RecordCache(str(tmp_path / "cache.db"))
+    cache.put_many({"1": medline("1"), "2": medline("2")})
+
+    assert cache.get_many(["1", "2", "3"]) == {"1": medline("1"), "2": medline("2")}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 2)
+
+
+def test_expired_records_are_misses(tmp_path):
+    """Tests that records older than the TTL are not returned."""
+    cache = RecordCache(str(tmp_path / "cache.db"), ttl=60)
+    with patch.object(record_cache.time, "time", return_value=1000.0):
+        cache.put_many({"1": medline("1")})
+    with patch.object(record_cache.time, "time", return_value=1061.0):
+        assert cache.get_many(["1"]) == {}
+
+
+def test_least_recently_used_records_are_evicted(tmp_path):
+    """Tests that the cache evicts the least recently used records when full."""
+    cache = RecordCache(str(tmp_path / "cache.db"))
+    with patch.object(record_cache.time, "time", return_value=1000.0):
+        cache.put_many({"1": medline("1"), "2": medline("2")})
+    cache.max_bytes = cache.stats()["bytes"]
+    with patch.object(record_cache.time, "time", return_value=1001.0):
+        cache.get_many(["1"])
+    with patch.object(record_cache.time, "time", return_value=1002.0):
+        cache.put_many({"3": medline("3")})
+        assert sorted(cache.get_many(["1", "2", "3"])) == ["1", "3"]
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_only_fetches_missing_records(fake_eutils):
+    """Tests that search_pubmed only sends uncached PMIDs to EFetch."""
+    await search_agent_module.search_pubmed("KRAS G13D", "test@example.com", 2)
+    records = await search_agent_module.search_pubmed(
+        "KRAS G13D", "test@example.com", 5
+    )
+
+    efetch_ids = [
+        params["id"] for name, params in fake_eutils.requests if name == "efetch"
+    ]
+    assert efetch_ids == ["39120576,38000001", "40470107,38000002,39921935"]
+    assert [record["article"]["title"] for record in records] == [
+        "Article 39120576 Title",
+        "Article 38000001 Title",
+        "Article 40470107 Title",
+        "Article 38000002 Title",
+        "Article 39921935 Title",
+    ]
+
+
+def test_replaced_records_are_not_counted_twice(tmp_path):
+    """Tests that storing a cached record again does not evict other records."""
+    cache = RecordCache(str(tmp_path / "cache.db"))
+    cache.put_many({"1": medline("1"), "2": medline("2")})
+    cache.max_bytes = cache.stats()["bytes"]
+
+    for _ in range(3):
+        cache.put_many({"1": medline("1")})
+
+    assert sorted(cache.get_many(["1", "2"])) == ["1", "2"]
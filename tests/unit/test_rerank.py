@@ -0,0 +1,127 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the BM25 reranking of fetched records."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
+from agents.hcls_research_agent.sub_agents.search_agent.rerank import (
+    bm25_scores,
+    rerank,
+    tokenize,
+)
+
+
+def _record(pmid: str, title: str, abstract: str = "") -> dict:
+    return {"pmid": pmid, "article": [{"TI": title, "AB": abstract}]}
+
+
+def test_tokenize_drops_stopwords():
+    """Tests that words are lowercased and stopwords dropped."""
+    assert tokenize("What is the role of KRAS G13D in T-DXd therapy?") == [
+        "role",
+        "kras",
+        "g13d",
+        "t-dxd",
+        "therapy",
+    ]
+
+
+def test_bm25_prefers_rare_matching_terms():
+    """Tests that documents matching rarer query terms score higher."""
+    scores = bm25_scores(
+        "KRAS G13D colorectal cancer",
+        [
+            "Breast cancer outcomes in a large cohort",
+            "KRAS G13D mutant colorectal cancer responds to cetuximab",
+            "Colorectal cancer screening",
+            "",
+        ],
+    )
+
+    assert scores.argmax() == 1
+    assert scores[2] > scores[0] > scores[3] == 0
+
+
+def test_rerank_keeps_order_of_ties():
+    """Tests that records with equal scores keep the order of PubMed."""
+    records = [
+        _record("1", "Unrelated"),
+        _record("2", "KRAS inhibitors"),
+        _record("3", "Also unrelated"),
+    ]
+
+    assert [r["pmid"] for r in rerank(records, "KRAS", 2)] == ["2", "1"]
+
+
+@pytest.mark.asyncio
+async def test_search_overfetches_and_reranks(fake_eutils):
+    """Tests that a search with a research question returns the best matches."""
+    fake_eutils.records["38000002"] = (
+        "PMID- 38000002\n"
+        "TI  - Sotorasib resistance in KRAS G13D colorectal cancer\n"
+        "AB  - Colorectal tumors with KRAS G13D acquire sotorasib resistance.\n"
+    )
+    tool_context = SimpleNamespace(
+        state={
+            "research_question": (
+                "How does KRAS G13D drive sotorasib resistance in colorectal cancer?"
+            )
+        }
+    )
+
+    results = await search_agent_module.search_pubmed(
+        "KRAS G13D", "test@example.com", 2, tool_context
+    )
+
+    assert next(result["pmid"] for result in results) == "38000002"
+    assert len(results) == 2
+    searched = [params for name, params in fake_eutils.requests if name == "esearch"]
+    assert searched[0]["retmax"] == str(2 * search_agent_module.RERANK_FACTOR)
+
+
+@pytest.mark.asyncio
+async def test_search_more_returns_ranked_out_articles_first(fake_eutils, monkeypatch):
+    """Tests that articles fetched but ranked out by a search are not skipped."""
+    monkeypatch.setattr(search_agent_module, "RERANK_FACTOR", 2)
+    fake_eutils.records["38000002"] = (
+        "PMID- 38000002\nTI  - Sotorasib resistance in KRAS G13D colorectal cancer\n"
+    )
+    tool_context = SimpleNamespace(
+        state={"research_question": "Sotorasib resistance in colorectal cancer?"}
+    )
+
+    first = await search_agent_module.search_pubmed(
+        "KRAS G13D", "test@example.com", 2, tool_context
+    )
+    second = await search_agent_module.search_more_pubmed(
+        "test@example.com", 2, tool_context
+    )
+    third = await search_agent_module.search_more_pubmed(
+        "test@example.com", 2, tool_context
+    )
+
+    pmids = [result["pmid"] for result in first + second + third]
+    assert pmids[0] == "38000002"
+    assert sorted(pmids[2:4]) == sorted(
+        {"39120576", "38000001", "40470107"} - set(pmids[:2])
+    )
+    assert pmids[4:] == ["39921935"]
+    # The ranked-out articles are read from the record cache.
+    assert fake_eutils.count("efetch") == 2
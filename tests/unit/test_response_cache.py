@@ -0,0 +1,141 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the model response cache."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, GenerateContentConfig, Part
+
+from agents.hcls_research_agent.shared_libraries import response_cache
+from agents.hcls_research_agent.sub_agents.research_question_agent.agent import (
+    research_question_agent,
+)
+
+QUESTION = "What is known about KRAS G13D in colorectal cancer?"
+
+
+def _request(text: str, **config) -> LlmRequest:
+    return LlmRequest(
+        model="gemini-2.5-flash",
+        contents=[Content(role="user", parts=[Part(text=text)])],
+        config=GenerateContentConfig(
+            **{"system_instruction": "Be brief.", "temperature": 0, **config}
+        ),
+    )
+
+
+def test_request_key():
+    """Tests that the key covers the request but not its labels."""
+    key = response_cache.request_key(_request(QUESTION))
+
+    assert key == response_cache.request_key(_request(QUESTION, labels={"a": "b"}))
+    assert key != response_cache.request_key(_request(QUESTION + " "))
+    assert key != response_cache.request_key(
+        _request(QUESTION, system_instruction="Be verbose.")
+    )
+    assert response_cache.request_key(_request(QUESTION, temperature=0.7)) is None
+    assert response_cache.request_key(_request(QUESTION, temperature=None)) is None
+    assert response_cache.request_key(_request(QUESTION, candidate_count=2)) is None
+
+
+def test_cached_agents_sample_at_temperature_zero(monkeypatch):
+    """Tests that the cached agents only sample at temperature 0 with LLM_CACHE."""
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    assert response_cache.generation_config() is None
+
+    monkeypatch.setenv("LLM_CACHE", "sqlite")
+    assert response_cache.generation_config().temperature == 0
+
+
+def test_memory_backend_evicts_and_expires():
+    """Tests the size and TTL bounds of the in-memory backend."""
+    cache = response_cache.MemoryBackend(ttl=60, max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert [cache.get(key) for key in "abc"] == ["1", None, "3"]
+
+    cache = response_cache.MemoryBackend(ttl=0.01)
+    cache.put("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path):
+    """Tests that the SQLite backend is shared and stays within its size."""
+    path = str(tmp_path / "llm.db")
+    cache = response_cache.SqliteBackend(path, max_bytes=1000)
+    cache.put("a", "x" * 2000)
+    cache.put("b", "y")
+
+    other = response_cache.SqliteBackend(path)
+    assert other.get("b") == "y"
+    assert other.get("a") == "x" * 2000  # compressed below max_bytes
+
+    cache = response_cache.SqliteBackend(path, ttl=-1)
+    assert cache.get("b") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_repeated_question_is_answered_from_cache(backend, monkeypatch, tmp_path):
+    """Tests that the same question in a new session does not call the model."""
+    monkeypatch.setenv("LLM_CACHE", backend)
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.db"))
+    session_service = InMemorySessionService()
+    agent = research_question_agent.clone(
+        update={"generate_content_config": response_cache.generation_config()}
+    )
+    runner = Runner(
+        agent=agent,
+        app_name="test_app",
+        session_service=session_service,
+    )
+    calls = []
+
+    async def mock_generate_content_async(gemini, llm_request, stream=False):
+        calls.append(llm_request)
+        yield LlmResponse(
+            content=Content(
+                role="model", parts=[Part(text="This is an excellent question!")]
+            )
+        )
+
+    answers = []
+    with patch(
+        "google.adk.models.Gemini.generate_content_async",
+        new=mock_generate_content_async,
+    ):
+        for _ in range(2):
+            session = await session_service.create_session(
+                app_name="test_app", user_id="test_user"
+            )
+            async for event in runner.run_async(
+                session_id=session.id,
+                user_id=session.user_id,
+                new_message=Content(role="user", parts=[Part(text=QUESTION)]),
+            ):
+                if event.is_final_response():
+                    answers.append(event.content.parts[0].text)
+
+    assert len(calls) == 1
+    assert answers == ["This is an excellent question!"] * 2
@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the rule-based router of the root agent."""
+
+from unittest.mock import patch
+
+import pytest
+from google.adk.models import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+from agents.hcls_research_agent import router
+from agents.hcls_research_agent.agent import root_agent
+from agents.hcls_research_agent.shared_libraries import telemetry
+
+QUESTION = "What is known about KRAS G13D in colorectal cancer?"
+VALIDATED = {"research_question": "This is an excellent research question!"}
+REJECTED = {"research_question": "The question is too broad. Which cancer type?"}
+SEARCHED = {**VALIDATED, "pubmed_results": "I have successfully completed my search."}
+
+
+@pytest.mark.parametrize(
+    ("state", "message", "agent"),
+    [
+        ({}, QUESTION, "research_question_agent"),
+        ({}, "Hello there!", None),
+        ({}, "Yes", None),
+        ({}, "me@example.com", None),
+        (REJECTED, "Yes", None),
+        (REJECTED, "ok", None),
+        (REJECTED, "me@example.com", None),
+        (REJECTED, "Please search PubMed for it.", None),
+        (VALIDATED, "Yes", "search_agent"),
+        (VALIDATED, "I'm fine with this.", "search_agent"),
+        (VALIDATED, "me@example.com", "search_agent"),
+        (VALIDATED, "Please search PubMed for it.", "search_agent"),
+        (VALIDATED, "No, I want to change the question.", None),
+        (VALIDATED, "Can you make it about lung cancer instead?", None),
+        (SEARCHED, "Yes, please.", "hypothesis_agent"),
+        (SEARCHED, "Please create hypotheses.", "hypothesis_agent"),
+        (SEARCHED, "Why were these articles chosen?", None),
+    ],
+)
+def test_decide(state, message, agent):
+    """Tests that only clear messages are routed without the model."""
+    assert router.decide(state, message) == agent
+
+
+@pytest.mark.asyncio
+async def test_route_skips_the_root_model_call():
+    """Tests that a clear message is transferred without calling the root model."""
+    telemetry.metrics.reset()
+    session_service = InMemorySessionService()
+    runner = Runner(
+        agent=root_agent, app_name="test_app", session_service=session_service
+    )
+    session = await session_service.create_session(
+        app_name="test_app", user_id="test_user"
+    )
+    agents = []
+
+    async def mock_generate_content_async(gemini, llm_request, stream=False):
+        agents.append(llm_request.config.labels["adk_agent_name"])
+        yield LlmResponse(
+            content=Content(role="model", parts=[Part(text="Research question: ...")])
+        )
+
+    with patch(
+        "google.adk.models.Gemini.generate_content_async",
+        new=mock_generate_content_async,
+    ):
+        events = [
+            event
+            async for event in runner.run_async(
+                session_id=session.id,
+                user_id=session.user_id,
+                new_message=Content(role="user", parts=[Part(text=QUESTION)]),
+            )
+        ]
+
+    assert agents == ["research_question_agent"]
+    transfer = events[0].get_function_calls()[0]
+    assert transfer.name == "transfer_to_agent"
+    assert transfer.args == {"agent_name": "research_question_agent"}
+    assert (
+        telemetry.metrics.get(
+            "hcls_router_decisions_total",
+            result="hit",
+            agent="research_question_agent",
+        )
+        == 1
+    )
+    assert router.hit_rate() == 1.0
@@ -14,6 +14,8 @@
 
 """Unit tests for the search agent."""
 
+import asyncio
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
@@ -22,9 +24,16 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai.types import Content, Part
 
+from agents.hcls_research_agent.sub_agents.search_agent import (
+    agent as search_agent_module,
+)
 from agents.hcls_research_agent.sub_agents.search_agent.agent import (
     search_agent,
 )
+from agents.hcls_research_agent.sub_agents.search_agent.fusion import fuse_rankings
+from agents.hcls_research_agent.sub_agents.search_agent.summarize import (
+    summarize_records,
+)
 
 
 @pytest.mark.asyncio
@@ -180,3 +189,381 @@ async def test_connection_error():
 
             # Assert the response
             assert expected_response in final_response
+
+
+def test_search_pubmed_batches_efetch(fake_eutils):
+    """Tests that search_pubmed fetches articles with one EFetch call per batch."""
+    with patch.object(search_agent_module, "EFETCH_BATCH_SIZE", 2):
+        records = search_agent_module.search_pubmed_sync(
+            "KRAS G13D", "test@example.com", 5
+        )
+
+    # One ESearch plus ceil(5 / 2) EFetch round-trips instead of one per PMID.
+    assert fake_eutils.count("esearch") == 1
+    assert fake_eutils.count("efetch") == 3
+    assert [record["pmid"] for record in records] == [
+        "39120576",
+        "38000001",
+        "40470107",
+        "38000002",
+        "39921935",
+    ]
+    for record in records:
+        assert record["article"]["title"] == f"Article {record['pmid']} Title"
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_reuses_connection(fake_eutils):
+    """Tests that search_pubmed sends all requests over one keep-alive connection."""
+    with patch.object(search_agent_module, "EFETCH_BATCH_SIZE", 2):
+        records = await search_agent_module.search_pubmed(
+            "KRAS G13D", "test@example.com", 5
+        )
+
+    assert len(records) == 5
+    assert len(fake_eutils.requests) == 4
+    assert len(set(fake_eutils.ports)) == 1
+
+
+@pytest.mark.asyncio
+async def test_parse_medline_yields_records_as_they_complete():
+    """Tests that Medline records are parsed from a stream line by line."""
+    received = []
+
+    async def lines():
+        for line in [
+            "PMID- 1",
+            "TI  - A title that continues",
+            "      on a second line",
+            "",
+        ]:
+            yield line
+        # The first record is complete before the second one arrives.
+        assert [record["PMID"] for record in received] == ["1"]
+        for line in ["PMID- 2", "MH  - Humans", "MH  - Neoplasms"]:
+            yield line
+
+    async for record in search_agent_module.parse_medline(lines()):
+        received.append(record)
+
+    assert received[0]["TI"] == "A title that continues on a second line"
+    assert received[1]["MH"] == ["Humans", "Neoplasms"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_articles_reports_progress(fake_eutils):
+    """Tests that fetch_articles reports every record as it arrives."""
+    progress = []
+
+    records = await search_agent_module.fetch_articles(
+        ["3", "1", "2"],
+        "test@example.com",
+        batch_size=2,
+        on_progress=lambda *p: progress.append(p),
+    )
+
+    assert [record["pmid"] for record in records] == ["3", "1", "2"]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+@pytest.mark.asyncio
+async def test_fetch_articles_keeps_only_needed_tags(fake_eutils):
+    """Tests that fetch_articles drops the tags no tool projects or reranks."""
+    records = await search_agent_module.fetch_articles(["1"], "test@example.com")
+
+    record = records[0]["article"][0]
+    assert {"PMID", "TI", "AB", "MH"} <= record.keys()
+    assert not {"AD", "FAU", "GR"} & record.keys()
+
+
+@pytest.mark.asyncio
+async def test_count_pubmed_does_not_fetch_records(fake_eutils):
+    """Tests that count_pubmed returns the hit count and titles without EFetch."""
+    with patch.object(search_agent_module, "COUNT_TITLES", 2):
+        result = await search_agent_module.count_pubmed("KRAS G13D")
+
+    assert result == {
+        "count": 5,
+        "titles": [
+            {"pmid": "39120576", "title": "Article 39120576 Title"},
+            {"pmid": "38000001", "title": "Article 38000001 Title"},
+        ],
+    }
+    assert fake_eutils.count("efetch") == 0
+    assert fake_eutils.requests[0][1]["retmax"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_search_more_pubmed_fetches_next_page(fake_eutils):
+    """Tests that search_more_pubmed continues after the articles already returned."""
+    tool_context = SimpleNamespace(state={})
+    first = await search_agent_module.search_pubmed(
+        "KRAS G13D", "test@example.com", 2, tool_context
+    )
+    second = await search_agent_module.search_more_pubmed(
+        "test@example.com", 2, tool_context
+    )
+    third = await search_agent_module.search_more_pubmed(
+        "test@example.com", 2, tool_context
+    )
+    last = await search_agent_module.search_more_pubmed(
+        "test@example.com", 2, tool_context
+    )
+
+    assert [record["pmid"] for record in first + second + third] == [
+        "39120576",
+        "38000001",
+        "40470107",
+        "38000002",
+        "39921935",
+    ]
+    assert last == ["Could not find any more articles"]
+    # The results are stored once and then paged through with their WebEnv.
+    assert fake_eutils.count("esearch") == 2
+    fetched = [params for name, params in fake_eutils.requests if name == "efetch"]
+    assert [params.get("retstart") for params in fetched] == [None, "2", "4"]
+    assert tool_context.state["pubmed_cursor"]["retstart"] == 5
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_summarizes_many_articles(fake_eutils):
+    """Tests that large result sets are returned as PMID-cited batch summaries."""
+    prompts = []
+
+    async def mock_generate_content_async(gemini, llm_request, stream=False):
+        prompts.append(llm_request.contents[0].parts[0].text)
+        yield LlmResponse(
+            content=Content(role="model", parts=[Part(text="* Finding [39120576]")])
+        )
+
+    tool_context = SimpleNamespace(state={"research_question": "KRAS G13D?"})
+    with (
+        patch.object(search_agent_module, "MAP_REDUCE_THRESHOLD", 2),
+        patch(
+            "google.adk.models.Gemini.generate_content_async",
+            new=mock_generate_content_async,
+        ),
+    ):
+        results = await search_agent_module.search_pubmed(
+            "KRAS G13D", "test@example.com", 5, tool_context
+        )
+
+    assert results == [
+        {
+            "pmids": ["39120576", "38000001", "40470107", "38000002", "39921935"],
+            "summary": "* Finding [39120576]",
+        }
+    ]
+    assert "KRAS G13D?" in prompts[0]
+    assert "Article 39921935 Title" in prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_summarize_records_limits_concurrency(fake_eutils):
+    """Tests that batches are summarized concurrently up to the limit."""
+    records = await search_agent_module.fetch_articles(
+        [str(pmid) for pmid in range(1, 8)], "test@example.com"
+    )
+    running = []
+    peak = 0
+
+    async def mock_generate_content_async(gemini, llm_request, stream=False):
+        nonlocal peak
+        running.append(llm_request)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01)
+        running.remove(llm_request)
+        if "Article 7 Title" in llm_request.contents[0].parts[0].text:
+            raise ConnectionError("model unavailable")
+        yield LlmResponse(content=Content(role="model", parts=[Part(text="ok")]))
+
+    with patch(
+        "google.adk.models.Gemini.generate_content_async",
+        new=mock_generate_content_async,
+    ):
+        results = await summarize_records(records, batch_size=2, concurrency=2)
+
+    assert peak == 2
+    assert [result["pmids"] for result in results] == [
+        ["1", "2"],
+        ["3", "4"],
+        ["5", "6"],
+        ["7"],
+    ]
+    assert [result.get("summary") for result in results] == ["ok", "ok", "ok", None]
+    # A batch that could not be summarized is returned as its articles.
+    assert results[3]["articles"][0]["pmid"] == "7"
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_multi_fetches_union_once(fake_eutils):
+    """Tests that several search strings are merged by rank with provenance."""
+    fake_eutils.searches["T-DXd"] = ["40470107", "41000001", "39120576"]
+
+    results = await search_agent_module.search_pubmed_multi(
+        ["KRAS G13D", "T-DXd", "KRAS G13D"], "test@example.com", 4
+    )
+
+    # PMIDs found by both search strings come first, then by rank.
+    assert [(result["pmid"], result["queries"]) for result in results] == [
+        ("39120576", ["KRAS G13D", "T-DXd"]),
+        ("40470107", ["KRAS G13D", "T-DXd"]),
+        ("38000001", ["KRAS G13D"]),
+        ("41000001", ["T-DXd"]),
+    ]
+    assert fake_eutils.count("esearch") == 2
+    fetched = [params for name, params in fake_eutils.requests if name == "efetch"]
+    assert len(fetched) == 1
+    assert sorted(fetched[0]["id"].split(",")) == [
+        "38000001",
+        "39120576",
+        "40470107",
+        "41000001",
+    ]
+
+
+def test_fuse_rankings():
+    """Tests reciprocal rank fusion of two rankings."""
+    hits = fuse_rankings({"a": ["1", "2", "3"], "b": ["3", "4"]}, k=1)
+
+    assert [(hit.pmid, hit.queries) for hit in hits] == [
+        ("3", {"a": 3, "b": 1}),
+        ("1", {"a": 1}),
+        ("2", {"a": 2}),
+        ("4", {"b": 2}),
+    ]
+    assert hits[0].score == pytest.approx(1 / 4 + 1 / 2)
+
+
+def _user_context(user_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        state={}, _invocation_context=SimpleNamespace(user_id=user_id)
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_updates_fetches_only_new_articles(fake_eutils):
+    """Tests that a re-run searches by entry date and fetches only new PMIDs."""
+    alice = _user_context("alice")
+    first = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 10, alice
+    )
+    fake_eutils.searches["KRAS G13D"].insert(0, "41000001")
+    second = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 10, alice
+    )
+
+    assert first["last_run"] is None
+    assert len(first["new_articles"]) == 5
+    assert second["previously_seen"] == 5
+    assert [article["pmid"] for article in second["new_articles"]] == ["41000001"]
+    assert (second["new_count"], second["remaining"]) == (1, 0)
+    searched = [params for name, params in fake_eutils.requests if name == "esearch"]
+    assert "mindate" not in searched[0]
+    assert searched[1]["datetype"] == "edat"
+    assert searched[1]["mindate"] == second["last_run"]
+    fetched = [params for name, params in fake_eutils.requests if name == "efetch"]
+    assert fetched[-1]["id"] == "41000001"
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_updates_are_saved_per_user(fake_eutils):
+    """Tests that the run of one user does not mark articles as seen for another."""
+    await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 10, _user_context("alice")
+    )
+    bob = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 10, _user_context("bob")
+    )
+
+    assert bob["last_run"] is None
+    assert len(bob["new_articles"]) == 5
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_updates_keeps_new_articles_beyond_limit(fake_eutils):
+    """Tests that new articles past the limit are returned by the next run."""
+    alice = _user_context("alice")
+    await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 10, alice
+    )
+    fake_eutils.searches["KRAS G13D"][:0] = ["41000001", "41000002", "41000003"]
+
+    second = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 2, alice
+    )
+    third = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 2, alice
+    )
+
+    assert [a["pmid"] for a in second["new_articles"]] == ["41000001", "41000002"]
+    assert (second["new_count"], second["remaining"]) == (3, 1)
+    assert [a["pmid"] for a in third["new_articles"]] == ["41000003"]
+    assert (third["new_count"], third["remaining"]) == (1, 0)
+    assert third["previously_seen"] == 7
+
+
+@pytest.mark.asyncio
+async def test_search_pubmed_updates_keeps_first_run_beyond_limit(fake_eutils):
+    """Tests that the articles of a first run past the limit are not lost."""
+    alice = _user_context("alice")
+    first = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 2, alice
+    )
+    second = await search_agent_module.search_pubmed_updates(
+        "KRAS G13D", "test@example.com", 10, alice
+    )
+
+    assert [a["pmid"] for a in first["new_articles"]] == ["39120576", "38000001"]
+    assert (first["new_count"], first["remaining"]) == (5, 3)
+    assert [a["pmid"] for a in second["new_articles"]] == [
+        "40470107",
+        "38000002",
+        "39921935",
+    ]
+    assert (second["new_count"], second["remaining"]) == (3, 0)
+
+
+@pytest.mark.asyncio
+async def test_expand_pubmed_citations_prunes_by_score(fake_eutils):
+    """Tests a two-hop expansion with one ELink call per link and hop."""
+    fake_eutils.links = {
+        "pubmed_pubmed": {
+            "1": [["1", 100], ["10", 80], ["11", 20]],
+            "2": [["2", 100], ["12", 90], ["10", 60]],
+            "10": [["10", 100], ["14", 70], ["1", 90]],
+        },
+        "pubmed_pubmed_citedin": {"1": [["13", 0]]},
+    }
+
+    results = await search_agent_module.expand_pubmed_citations(
+        ["1", "2"], "test@example.com", 6, hops=2
+    )
+
+    # 10 is related to both seeds, 13 cites one, 11 is too dissimilar.
+    assert [(result["pmid"], result["linked_from"]) for result in results] == [
+        ("10", ["1", "2"]),
+        ("13", ["1"]),
+        ("12", ["2"]),
+        ("14", ["10"]),
+    ]
+    assert results[0]["article"]["title"] == "Article 10 Title"
+    assert fake_eutils.count("elink") == 4
+    assert fake_eutils.count("efetch") == 1
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_reads_searched_records_from_cache(fake_eutils):
+    """Tests that searches return snippets and full abstracts come from the cache."""
+    handles = await search_agent_module.search_pubmed(
+        "KRAS G13D", "test@example.com", 2
+    )
+    abstracts = await search_agent_module.get_abstracts(
+        ["38000001", "38000001"], "test@example.com"
+    )
+
+    assert "abstract" not in handles[0]["article"]
+    assert handles[0]["article"]["snippet"].endswith("...")
+    assert [article["pmid"] for article in abstracts] == ["38000001"]
+    assert abstracts[0]["article"]["abstract"].startswith("Article 38000001 Abstract")
+    assert fake_eutils.count("efetch") == 1
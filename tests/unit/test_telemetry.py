@@ -0,0 +1,186 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the latency and token accounting."""
+
+from unittest.mock import patch
+
+import pytest
+from google.adk.models import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, FunctionCall, Part
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from agents.hcls_research_agent.shared_libraries import telemetry
+from agents.hcls_research_agent.sub_agents.search_agent.agent import search_agent
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Records the spans of the telemetry module in memory."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(telemetry, "tracer", provider.get_tracer("test"))
+    telemetry.metrics.reset()
+    return exporter
+
+
+def test_metrics_render_prometheus_text():
+    """Tests that counters and summaries are rendered in the Prometheus format."""
+    metrics = telemetry.Metrics()
+    metrics.observe("hcls_tool_call_seconds", 0.5, tool="search_pubmed")
+    metrics.observe("hcls_tool_call_seconds", 1.5, tool="search_pubmed")
+    metrics.inc("hcls_cache_lookups_total", 3, cache="record", result="hit")
+
+    assert metrics.render() == (
+        "# HELP hcls_cache_lookups_total Cache lookups by cache and result.\n"
+        "# TYPE hcls_cache_lookups_total counter\n"
+        'hcls_cache_lookups_total{cache="record",result="hit"} 3\n'
+        "# HELP hcls_tool_call_seconds Duration of tool calls.\n"
+        "# TYPE hcls_tool_call_seconds summary\n"
+        'hcls_tool_call_seconds_count{tool="search_pubmed"} 2\n'
+        'hcls_tool_call_seconds_sum{tool="search_pubmed"} 2\n'
+    )
+
+
+def test_ledger_keeps_the_latest_turns():
+    """Tests that the ledger forgets the oldest turns."""
+    ledger = telemetry.TurnLedger(max_turns=2)
+    for turn in ("a", "b", "c"):
+        ledger.record(turn, {"kind": "model", "name": "x", "seconds": 1.0})
+
+    assert ledger.get("a") == []
+    assert ledger.summary("c") == {"model": {"calls": 1, "seconds": 1.0, "tokens": 0}}
+
+
+@pytest.mark.asyncio
+async def test_search_turn_is_recorded(fake_eutils, spans):
+    """Tests that model, tool and E-utilities calls of a turn are recorded."""
+    session_service = InMemorySessionService()
+    runner = Runner(
+        agent=search_agent, app_name="test_app", session_service=session_service
+    )
+    session = await session_service.create_session(
+        app_name="test_app",
+        user_id="test_user",
+        state={"research_question": "KRAS G13D"},
+    )
+    responses = iter(
+        [
+            Part(
+                function_call=FunctionCall(
+                    name="search_pubmed",
+                    args={
+                        "search_string": "KRAS G13D",
+                        "email": "test@example.com",
+                        "limit": 5,
+                    },
+                )
+            ),
+            Part(text="I have successfully completed my search."),
+        ]
+    )
+
+    async def mock_generate_content_async(*args, **kwargs):
+        yield LlmResponse(content=Content(role="model", parts=[next(responses)]))
+
+    with patch(
+        "google.adk.models.Gemini.generate_content_async",
+        new=mock_generate_content_async,
+    ):
+        async for event in runner.run_async(
+            session_id=session.id,
+            user_id=session.user_id,
+            new_message=Content(role="user", parts=[Part(text="Search please")]),
+        ):
+            invocation_id = event.invocation_id
+
+    entries = telemetry.ledger.get(invocation_id)
+    assert [(entry["kind"], entry["name"]) for entry in entries] == [
+        ("model", "search_agent"),
+        ("cache", "query"),
+        ("eutils", "esearch"),
+        ("cache", "record"),
+        ("eutils", "efetch"),
+        ("tool", "search_pubmed"),
+        ("model", "search_agent"),
+    ]
+    assert entries[-2]["response_bytes"] > 1000
+    assert entries[-1]["request_tokens"] > entries[0]["request_tokens"]
+    assert (
+        telemetry.metrics.get("hcls_eutils_request_seconds_count", utility="efetch")
+        == 1
+    )
+    assert 'hcls_cache_lookups_total{cache="record",result="miss"} 5' in (
+        telemetry.render_metrics()
+    )
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    tool_span = finished["tool search_pubmed"]
+    assert finished["eutils efetch"].parent.span_id == tool_span.context.span_id
+    assert finished["call_llm search_agent"].attributes["hcls.request_bytes"] > 0
+
+
+@pytest.mark.asyncio
+async def test_tool_call_that_raises_is_finished(spans):
+    """Tests that the span of a tool that raised ends with the error."""
+
+    async def get_abstracts(pmids: list[str], email: str) -> list:
+        """Fails like a request to Pubmed that does not get through."""
+        raise ConnectionError("Pubmed is down")
+
+    agent = search_agent.clone(update={"tools": [get_abstracts]})
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name="test_app", session_service=session_service)
+    session = await session_service.create_session(
+        app_name="test_app",
+        user_id="test_user",
+        state={"research_question": "KRAS G13D"},
+    )
+    call = Part(
+        function_call=FunctionCall(
+            name="get_abstracts", args={"pmids": ["1"], "email": "test@example.com"}
+        )
+    )
+
+    async def mock_generate_content_async(*args, **kwargs):
+        yield LlmResponse(content=Content(role="model", parts=[call]))
+
+    with (
+        patch(
+            "google.adk.models.Gemini.generate_content_async",
+            new=mock_generate_content_async,
+        ),
+        pytest.raises(ConnectionError),
+    ):
+        async for _ in runner.run_async(
+            session_id=session.id,
+            user_id=session.user_id,
+            new_message=Content(role="user", parts=[Part(text="Abstracts")]),
+        ):
+            pass
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    tool_span = finished["tool get_abstracts"]
+    assert not tool_span.status.is_ok
+    assert tool_span.attributes["hcls.error"] == "ConnectionError"
+    assert telemetry.metrics.get("hcls_tool_errors_total", tool="get_abstracts") == 1
+    assert not trace.get_current_span().is_recording()
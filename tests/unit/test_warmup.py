@@ -0,0 +1,60 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the warmup after a cold start."""
+
+import asyncio
+import sys
+
+import pytest
+
+from agents.hcls_research_agent import warmup
+from agents.hcls_research_agent.shared_libraries import eutils
+
+
+def test_preload_imports_lazy_modules():
+    """Tests that the modules imported on first use are imported."""
+    eutils.ssl_context.cache_clear()
+
+    warmup.preload()
+
+    assert all(module in sys.modules for module in warmup.LAZY_MODULES)
+    assert eutils.ssl_context.cache_info().currsize == 1
+
+
+@pytest.mark.asyncio
+async def test_warmup_connects_in_the_background(fake_eutils):
+    """Tests that the connection pool of the running loop is opened."""
+    warmup.warmup()
+    await asyncio.gather(*warmup._tasks)
+
+    assert fake_eutils.count("einfo") == 1
+    assert not eutils.eutils_client().is_closed
+
+
+@pytest.mark.asyncio
+async def test_connect_reports_unreachable_eutils(monkeypatch):
+    """Tests that a failed connection does not raise."""
+    monkeypatch.setattr(eutils, "EUTILS_URL", "http://127.0.0.1:9/")
+    monkeypatch.setattr(eutils, "MAX_TRIES", 1)
+
+    assert await warmup.connect() is False
+
+
+def test_warmup_without_event_loop_only_preloads(fake_eutils):
+    """Tests that no connection is opened without a running loop."""
+    warmup.warmup()
+
+    assert not warmup._tasks
+    assert fake_eutils.count("einfo") == 0